@@ -1,9 +1,11 @@
 import os
+from datetime import date, datetime
+
+import click
 from flask import Flask, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
 
-# Initialize SQLAlchemy globally
-db = SQLAlchemy()
+# Models and routes share the SQLAlchemy instance from extensions
+from numerology_app.extensions import db
 
 
 def register_cli(app):
@@ -20,26 +22,446 @@ def register_cli(app):
         with app.app_context():
             db.drop_all()
             db.create_all()
+            # the fresh schema already has everything the migrations add
+            from numerology_app import migrations
+            migrations.mark_applied(db.engine)
             print("✅ All tables dropped and recreated successfully!")
 
+    @app.cli.command("migrate")
+    @click.option("--list", "list_only", is_flag=True, help="Show applied and pending migrations.")
+    @click.option("--dedupe", is_flag=True,
+                  help="Keep the first of clients sharing a first name and DOB; the others are exported to CSV, then deleted.")
+    def migrate(list_only, dedupe):
+        """Create missing tables and apply pending schema migrations (clients are only deleted with --dedupe, after being exported)."""
+        from numerology_app import migrations, models  # ensure all models are loaded
+        if list_only:
+            done = migrations.applied(db.engine)
+            for migration_id, description, _ in migrations.MIGRATIONS:
+                mark = "✅" if migration_id in done else "…"
+                print(f"{mark} {migration_id}: {description}")
+            return
+
+        db.create_all()  # only creates tables that do not exist yet
+
+        def report(migration_id, description, note):
+            print(f"✅ {migration_id}: {description}" + (f" ({note})" if note else ""))
+
+        options = {}
+        if dedupe:
+            os.makedirs(app.instance_path, exist_ok=True)
+            options["dedupe_export"] = os.path.join(
+                app.instance_path, f"dropped-clients-{datetime.now():%Y%m%d-%H%M%S}.csv"
+            )
+        try:
+            ran = migrations.migrate(db.engine, progress=report, options=options)
+        except migrations.MigrationError as exc:
+            raise SystemExit(f"❌ {exc}")
+        if ran:
+            from numerology_app.utils import matching
+            matching.bump_clients_version()  # duplicates may have been removed
+        else:
+            print("✅ Database is up to date.")
+
+    @app.cli.command("bench-migrations")
+    @click.option("--rows", default=1_000_000, show_default=True)
+    @click.option("--repeat", default=5, show_default=True)
+    def bench_migrations(rows, repeat):
+        """Query plans and timings on a synthetic clients table, before and after migrating."""
+        from numerology_app import migrations
+        print(f"Building {rows:,} synthetic clients...")
+        for result in migrations.benchmark(rows, repeat):
+            print(f"\n{result['query']}")
+            print(f"  before: {result['before_ms']:9.3f} ms  {result['before_plan']}")
+            print(f"  after:  {result['after_ms']:9.3f} ms  {result['after_plan']}")
+
+    @app.cli.command("verify-batch")
+    @click.option("--start-year", default=1900, show_default=True)
+    @click.option("--end-year", default=2100, show_default=True)
+    def verify_batch(start_year, end_year):
+        """Check the vectorized engine against the scalar functions."""
+        from numerology_app.utils import batch
+        mismatches = batch.verify_against_scalar(
+            date(start_year, 1, 1), date(end_year, 12, 31)
+        )
+        for dob, field in mismatches[:20]:
+            print(f"❌ {dob}: {field} differs")
+        if mismatches:
+            raise SystemExit(f"{len(mismatches)} mismatches found.")
+        print(f"✅ Batch engine matches every date from {start_year} to {end_year}.")
+
+    @app.cli.command("build-date-table")
+    def build_date_table():
+        """Precompute the per-date profile table into the instance folder."""
+        from numerology_app.utils import date_table
+        path = date_table.save_table(date_table.build_table())
+        print(f"✅ Date table written to {path}")
+
+    @app.cli.command("verify-date-table")
+    def verify_date_table():
+        """Check every row of the date table against the scalar functions."""
+        from numerology_app.utils import date_table
+        mismatches = date_table.verify_table()
+        for dob in mismatches[:20]:
+            print(f"❌ {dob} differs")
+        if mismatches:
+            raise SystemExit(f"{len(mismatches)} mismatches found.")
+        print(f"✅ Date table matches every date from {date_table.START} to {date_table.END}.")
+
+    @app.cli.command("bench-date-table")
+    @click.option("--samples", default=20000, show_default=True)
+    def bench_date_table(samples):
+        """Compare date table lookups with the scalar functions."""
+        from numerology_app.utils import date_table
+        result = date_table.benchmark(samples)
+        print(f"Scalar functions: {result['scalar_us']:.1f} µs per DOB")
+        print(f"Date table:       {result['table_us']:.1f} µs per DOB")
+        print(f"Speedup:          {result['speedup']:.1f}x")
+
+    @app.cli.command("verify-names")
+    @click.option("--samples", default=100000, show_default=True)
+    def verify_names(samples):
+        """Check the compiled name scorer against the scalar functions."""
+        from numerology_app.utils import names
+        mismatches = names.verify_names(names.sample_names(samples))
+        for name in mismatches[:20]:
+            print(f"❌ {name!r} differs")
+        if mismatches:
+            raise SystemExit(f"{len(mismatches)} mismatches found.")
+        print(f"✅ Name scorer matches the scalar functions on {samples} names.")
+
+    @app.cli.command("bench-names")
+    @click.option("--samples", default=100000, show_default=True)
+    def bench_names(samples):
+        """Compare the compiled name scorer with the scalar functions."""
+        from numerology_app.utils import names
+        result = names.benchmark(names.common_names(samples))
+        print(f"Scalar functions: {result['scalar_us']:.1f} µs per name")
+        print(f"Single name:      {result['single_us']:.1f} µs per name")
+        print(f"Batch:            {result['batch_us']:.1f} µs per name")
+        print(f"Speedup:          {result['speedup']:.1f}x")
+
+    @app.cli.command("import-clients")
+    @click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]),
+                  help="Defaults to the file extension.")
+    @click.option("--batch-size", default=1000, show_default=True)
+    @click.option("--commit-every", default=5000, show_default=True)
+    def import_clients(source, fmt, batch_size, commit_every):
+        """Stream clients from a CSV or NDJSON file ('-' for stdin)."""
+        from numerology_app.utils import client_import
+        fmt = fmt or ("ndjson" if source.name.endswith((".ndjson", ".jsonl")) else "csv")
+
+        def report(stats, elapsed):
+            rate = stats["read"] / elapsed if elapsed else 0
+            print(
+                f"  {stats['read']} read, {stats['inserted']} inserted, "
+                f"{stats['duplicates']} duplicates, {stats['invalid']} invalid "
+                f"({rate:,.0f} rows/s)"
+            )
+
+        records = client_import.read_records(source, fmt)
+        stats = client_import.import_clients(records, batch_size, commit_every, progress=report)
+        print(f"✅ Imported {stats['inserted']} clients.")
+
+    @app.cli.command("recompute-results")
+    @click.option("--stale-only", is_flag=True,
+                  help="Only rows whose algorithm version or inputs changed.")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def recompute_results(stale_only, batch_size):
+        """Recompute the results stored on every client."""
+        from numerology_app.utils import readings
+
+        def report(stats):
+            print(f"  {stats['checked']} checked, {stats['recomputed']} recomputed")
+
+        stats = readings.recompute_stored(stale_only, batch_size, progress=report)
+        print(f"✅ Recomputed {stats['recomputed']} of {stats['checked']} clients "
+              f"({stats['cleared']} with an invalid DOB cleared).")
+
+    @app.cli.command("precompute-daily")
+    @click.option("--days", default=7, show_default=True, help="Days to store, from --start.")
+    @click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), help="Defaults to today.")
+    @click.option("--batch-size", default=20_000, show_default=True)
+    def precompute_daily(days, start, batch_size):
+        """Store every client's lucky year, month and day for the next days."""
+        from numerology_app.utils import daily_luck
+
+        def report(done, elapsed):
+            print(f"  {done:,} clients ({done / elapsed if elapsed else 0:,.0f}/s)")
+
+        stats = daily_luck.precompute(days, start.date() if start else None, batch_size, progress=report)
+        print(f"✅ Stored {stats['rows']:,} rows for {stats['clients']:,} clients "
+              f"({stats['invalid']} with an invalid DOB skipped).")
+
+    @app.cli.command("export-clients")
+    @click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default="csv", show_default=True)
+    @click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-",
+                  help="Defaults to stdout.")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def export_clients(fmt, output, batch_size):
+        """Stream every client with the computed numbers."""
+        from numerology_app.utils import client_export
+        for chunk in client_export.export(fmt, batch_size):
+            output.write(chunk)
+
+    @app.cli.command("lucky-calendar")
+    @click.option("--client-id", type=int, help="A saved client (instead of --name and --dob).")
+    @click.option("--name")
+    @click.option("--dob", help="DD MM YYYY or YYYY-MM-DD.")
+    @click.option("--start", help="YYYY-MM-DD, defaults to today.")
+    @click.option("--end", help="YYYY-MM-DD (instead of --years).")
+    @click.option("--years", type=int, default=1, show_default=True)
+    @click.option("--numbers", help="Only days whose --field is one of these, e.g. 1,5,22.")
+    @click.option("--field", type=click.Choice(["lucky_day", "lucky_month", "lucky_year"]),
+                  default="lucky_day", show_default=True)
+    @click.option("--format", "fmt", type=click.Choice(["json", "csv", "ics"]), default="ics", show_default=True)
+    @click.option("--output", "-o", type=click.File("w", encoding="utf-8", lazy=True), default="-",
+                  help="Defaults to stdout.")
+    def lucky_calendar_cmd(client_id, name, dob, start, end, years, numbers, field, fmt, output):
+        """Write a person's lucky day, month and year timeline."""
+        import time
+        from numerology_app.models import Client
+        from numerology_app.utils import lucky_calendar, reading_api
+
+        if client_id is not None:
+            client = db.session.get(Client, client_id)
+            if client is None:
+                raise SystemExit(f"❌ No client with id {client_id}.")
+            name, dob = client.full_name, client.dob
+        started = time.perf_counter()
+        try:
+            name, dob = reading_api.parse_person({"name": name, "dob": dob})
+            start, end, numbers, field = lucky_calendar.options({
+                "start": start, "end": end, "years": years, "numbers": numbers, "field": field,
+            })
+        except ValueError as exc:
+            raise SystemExit(f"❌ {exc}")
+        columns = lucky_calendar.calendar(dob, start, end, numbers, field)
+        output.write(lucky_calendar.export(fmt, columns, name, dob, start, end, numbers, field))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        click.echo(f"✅ {len(columns['date']):,} days from {start} to {end} in {elapsed_ms:.1f} ms.", err=True)
+
+    @app.cli.command("check-queries")
+    def check_queries():
+        """Fail when a report or detail route goes over its query budget."""
+        from numerology_app.utils import query_budget
+        failures, counts = query_budget.check_routes(app)
+        for route, route_counts in counts.items():
+            print(f"  {route}: {route_counts}")
+        for route, problem in failures:
+            print(f"❌ {route} {problem}")
+        if failures:
+            raise SystemExit(f"{len(failures)} routes failed.")
+        print("✅ Every route answers 200 with a constant number of queries within its budget.")
+
+    @app.cli.command("bench-concurrency")
+    @click.option("--rows", default=50_000, show_default=True)
+    @click.option("--readers", default=4, show_default=True)
+    @click.option("--writers", default=1, show_default=True)
+    @click.option("--seconds", default=5.0, show_default=True)
+    def bench_concurrency(rows, readers, writers, seconds):
+        """Concurrent read/write load test: SQLite defaults vs the configured pragmas."""
+        from numerology_app.utils import load_test
+        print(f"{readers} readers and {writers} writers for {seconds:g}s on {rows:,} clients...")
+        for label, result in load_test.compare(rows, readers, writers, seconds).items():
+            print(f"\n{label}")
+            for role, stats in result.items():
+                if stats["p50_ms"] is None:
+                    print(f"  {role}s: no successful operations, {stats['errors']} errors")
+                    continue
+                print(
+                    f"  {role}s: {stats['ops_per_s']:8.0f} ops/s  p50 {stats['p50_ms']:7.2f} ms  "
+                    f"p99 {stats['p99_ms']:7.2f} ms  max {stats['max_ms']:8.2f} ms  "
+                    f"{stats['errors']} errors"
+                )
+
+
+    @app.cli.command("bench-matching")
+    @click.option("--clients", default=200_000, show_default=True)
+    @click.option("--searches", default=20, show_default=True)
+    def bench_matching(clients, searches):
+        """Time one-vs-all best-match searches against scalar scoring."""
+        from numerology_app.utils import matching
+        result = matching.benchmark(clients, searches)
+        print(f"Index build ({result['clients']:,} clients): {result['build_s']:.2f} s")
+        print(f"Indexed search:   {result['search_ms']:.2f} ms per search")
+        print(f"Scalar scoring:   {result['scalar_ms']:.0f} ms per search (estimated)")
+        print(f"Speedup:          {result['speedup']:.0f}x")
+
+
+    @app.cli.command("bench")
+    @click.option("--sizes", default="1000,100000,1000000", show_default=True,
+                  help="Comma-separated client counts of the seeded databases.")
+    @click.option("--calls", default=5000, show_default=True, help="Calls per scalar function.")
+    @click.option("--requests", default=50, show_default=True, help="Requests per route and size.")
+    @click.option("--output", "-o", type=click.File("w"), help="Write the results as JSON.")
+    @click.option("--compare", "baseline", type=click.File("r"),
+                  help="JSON from an earlier run to compare medians with.")
+    @click.option("--threshold", default=1.25, show_default=True,
+                  help="With --compare, fail when a median grows by more than this factor.")
+    @click.option("--reseed", is_flag=True, help="Rebuild the seeded databases.")
+    def bench(sizes, calls, requests, output, baseline, threshold, reseed):
+        """Benchmark the numerology functions and the main routes."""
+        import json
+        from numerology_app.utils import benchmarks
+        sizes = [int(size) for size in sizes.split(",") if size.strip()]
+        result = benchmarks.run(sizes, calls, requests, reseed, progress=print)
+
+        print(f"\n{'Benchmark':<44}{'p50':>12}{'p95':>12}")
+        for name, stats in result["functions"].items():
+            print(f"{name:<44}{stats['p50_us']:>9.1f} us{stats['p95_us']:>9.1f} us")
+        for size, routes in result["routes"].items():
+            for name, stats in routes.items():
+                if isinstance(stats, dict):
+                    print(f"{name + ' @ ' + size:<44}{stats['p50_ms']:>9.2f} ms{stats['p95_ms']:>9.2f} ms")
+        if output:
+            json.dump(result, output, indent=2)
+            print(f"✅ Results written to {output.name}.")
+
+        if baseline:
+            regressions = 0
+            print(f"\nMedian vs {baseline.name}:")
+            for name, old, new, ratio in benchmarks.compare(json.load(baseline), result):
+                slower = ratio is not None and ratio > threshold
+                regressions += slower
+                print(f"{'❌' if slower else '✅'} {name}: {old:.2f} -> {new:.2f} "
+                      f"({f'{ratio:.2f}x' if ratio is not None else 'n/a'})")
+            if regressions:
+                raise SystemExit(f"{regressions} benchmarks slower than {threshold}x the baseline.")
+
+    @app.cli.command("compat-matrix")
+    @click.argument("source", type=click.File("r", encoding="utf-8-sig"))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]),
+                  help="Defaults to the file extension.")
+    @click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-",
+                  help="Pairwise CSV; defaults to stdout.")
+    @click.option("--top", default=20, show_default=True, help="Pairs listed in the summary.")
+    def compat_matrix(source, fmt, output, top):
+        """All-pairs compatibility for a participant list (name, dob)."""
+        import sys
+        from numerology_app.utils import compat_matrix as matrix
+        fmt = fmt or ("ndjson" if source.name.endswith((".ndjson", ".jsonl")) else "csv")
+        participants, invalid = matrix.read_participants(source, fmt)
+
+        summary = {}
+        for chunk in matrix.matrix_csv(participants, summary=summary, top=top):
+            output.write(chunk)
+        output.flush()
+
+        # keep stdout clean when the CSV goes there
+        log = sys.stderr if output.name == "<stdout>" else sys.stdout
+        print(f"✅ {summary['pairs']:,} pairs for {summary['participants']} participants "
+              f"({invalid} invalid rows skipped).", file=log)
+        for title, count in summary["titles"].items():
+            print(f"  {title}: {count:,}", file=log)
+        print(f"\nTop {len(summary['top_pairs'])} pairs:", file=log)
+        for pair in summary["top_pairs"]:
+            print(f"  {pair['score']:3d}  {pair['p1']['name']} ({pair['p1_life_path']}) + "
+                  f"{pair['p2']['name']} ({pair['p2_life_path']}): {pair['title']}", file=log)
+
+
+    @app.cli.command("report-worker")
+    @click.option("--workers", type=int, help="Defaults to REPORT_WORKERS.")
+    def report_worker(workers):
+        """Render queued PDF reports (e.g. left by a restart) and purge old ones."""
+        from numerology_app.utils import report_jobs
+
+        def report(job_id, status):
+            print(f"{'✅' if status == report_jobs.DONE else '❌'} {job_id}: {status or 'skipped'}")
+
+        count = report_jobs.run_pending(workers, progress=report)
+        purged = report_jobs.purge()
+        print(f"✅ {count} queued reports processed, {purged} old reports deleted.")
+
+    @app.cli.command("purge-readings")
+    @click.option("--hours", type=int, help="Defaults to READING_TTL_S.")
+    def purge_readings(hours):
+        """Delete stored numerology readings nobody has opened recently."""
+        from numerology_app.utils import reading_store
+        removed = reading_store.purge(hours * 3600 if hours is not None else None)
+        print(f"✅ {removed} expired readings deleted.")
+
+    @app.cli.command("bench-report-render")
+    @click.option("--reports", default=10, show_default=True)
+    def bench_report_render(reports):
+        """Time PDF rendering from scratch against a reused render context."""
+        from numerology_app.utils import readings, report_render, reports as report_pages
+        person = {"first_name": "Asha", "middle_name": "", "last_name": "Mehta", "dob": "14 08 1991"}
+        results = readings.compute_results_batch(["Asha Mehta"], ["1991-08-14"])[0]
+        with app.test_request_context():
+            html = report_pages.render_report(results, person)
+            try:
+                result = report_render.benchmark(html, reports)
+            except (ImportError, OSError) as exc:
+                raise SystemExit(f"❌ WeasyPrint is not available: {exc}")
+        print(f"From scratch:     {result['fresh_ms']:.0f} ms per report")
+        print(f"Context, first:   {result['first_ms']:.0f} ms (parses the stylesheet, loads fonts)")
+        print(f"Context, reused:  {result['reused_ms']:.0f} ms per report")
+        print(f"Speedup:          {result['speedup']:.1f}x over {result['reports']} reports")
+        if not result["same_layout"]:
+            raise SystemExit("❌ The reused context lays the report out differently.")
+        print("✅ Both lay the report out box for box alike.")
+
+    @app.cli.command("export-reports")
+    @click.option("--ids", help="Comma-separated client ids.")
+    @click.option("--q", help="Name search, as in the client list.")
+    @click.option("--created-from", type=click.DateTime(["%Y-%m-%d"]))
+    @click.option("--created-to", type=click.DateTime(["%Y-%m-%d"]))
+    @click.option("--output", "-o", type=click.File("wb"), required=True, help="ZIP file to write.")
+    @click.option("--workers", type=int, help="Defaults to REPORT_WORKERS.")
+    @click.option("--base-url", default="http://localhost:5000/", show_default=True,
+                  help="Where the reports' static files are served from.")
+    def export_reports(ids, q, created_from, created_to, output, workers, base_url):
+        """Render the PDF reports of the selected clients into one ZIP."""
+        from numerology_app.utils import bulk_reports
+        ids = [int(i) for i in ids.split(",") if i.strip()] if ids else None
+        client_ids = bulk_reports.select_client_ids(
+            ids, q, created_from and created_from.date(), created_to and created_to.date()
+        )
+        if not client_ids:
+            raise SystemExit("❌ No clients with a valid date of birth match.")
+
+        failed = []
+
+        def report(client_id, filename, error, done, total):
+            if error:
+                failed.append(client_id)
+                print(f"❌ [{done}/{total}] client {client_id}: {error}")
+            else:
+                print(f"✅ [{done}/{total}] {filename}")
+
+        # the report template builds URLs, which needs a request context
+        with app.test_request_context(base_url=base_url):
+            for chunk in bulk_reports.zip_reports(client_ids, base_url, workers, progress=report):
+                output.write(chunk)
+        print(f"✅ {len(client_ids) - len(failed)} reports written to {output.name}"
+              f"{f', {len(failed)} failed (see errors.txt)' if failed else ''}.")
+
+
+def create_app(config=None):
+    """
+    Application factory for the Numerology software.
+    `config` is an optional dict of settings applied over config.Config.
+    """
+    from numerology_app.config import Config, apply_sqlite_pragmas, engine_options
 
-def create_app():
-    """Application factory for the Numerology software."""
     app = Flask(__name__)
-    app.secret_key = "supersecret"
 
     # -----------------------------
-    # Database Configuration
+    # Configuration (see config.py; the database URI comes from the environment)
     # -----------------------------
-    base_dir = os.path.abspath(os.path.dirname(__file__))
-    db_path = os.path.join(base_dir, "..", "instance", "numerology.db")
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+        if "SQLALCHEMY_DATABASE_URI" in config and "SQLALCHEMY_ENGINE_OPTIONS" not in config:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(config["SQLALCHEMY_DATABASE_URI"])
+    app.secret_key = app.config["SECRET_KEY"]
+    os.makedirs(app.instance_path, exist_ok=True)
 
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config["SQLITE_PRAGMAS"])
 
     # Import models so SQLAlchemy sees them
     from numerology_app import models
@@ -54,6 +476,7 @@ def create_app():
     from numerology_app.routes.matchmaking import matchmaking_bp
     from numerology_app.routes.clients import clients_bp
     from numerology_app.routes.docs import docs_bp
+    from numerology_app.routes.api import api_bp
     
 
 
@@ -62,6 +485,7 @@ def create_app():
     app.register_blueprint(home_bp)
     app.register_blueprint(matchmaking_bp)
     app.register_blueprint(clients_bp)
+    app.register_blueprint(api_bp)
 
     app.register_blueprint(auth_bp)
 
@@ -79,6 +503,14 @@ def create_app():
             return redirect(url_for("auth.login"))
         return redirect(url_for("home.dashboard"))
 
+    # -----------------------------
+    # Request metrics and profilers (only when METRICS_ENABLED / SQL_PROFILER / PROFILER_ENABLED)
+    # -----------------------------
+    from numerology_app.utils import metrics, request_profiler, sql_profiler
+    metrics.init_app(app)
+    sql_profiler.init_app(app)
+    request_profiler.init_app(app)
+
     # -----------------------------
     # CLI Commands
     # -----------------------------
@@ -0,0 +1,117 @@
+"""
+Application configuration.
+
+Everything deployment-specific comes from the environment (a .env file is
+picked up by the flask CLI through python-dotenv):
+
+    NUMEROLOGY_DATABASE_URL   SQLAlchemy URI, e.g. postgresql+psycopg://...
+                              (DATABASE_URL is accepted too); defaults to
+                              SQLite at instance/numerology.db
+    NUMEROLOGY_SECRET_KEY     session signing key
+    NUMEROLOGY_REPORT_WORKERS processes rendering PDF reports (default 2)
+    NUMEROLOGY_REPORT_JOB_LEASE_MIN minutes a PDF job may stay queued or running
+                              before it counts as lost (default 10)
+    NUMEROLOGY_REPORT_CACHE_MB size cap of the rendered report cache (default 200)
+    NUMEROLOGY_READING_TTL_HOURS how long an untouched reading stays in
+                              instance/readings/ (default 168)
+    NUMEROLOGY_API_TOKENS     comma-separated bearer tokens for /api/v1
+                              (the logged-in web session works as well)
+    NUMEROLOGY_METRICS        "1" to record request metrics and serve /metrics
+    NUMEROLOGY_METRICS_TOKEN  bearer token required by /metrics (optional)
+    NUMEROLOGY_SQL_PROFILER   "1" to profile the SQL of every request and serve
+                              /_debug/requests (development and staging only)
+    NUMEROLOGY_PROFILER       "1" to let authenticated requests ask to be profiled
+                              (X-Profile header or ?_profile=, see request_profiler)
+    NUMEROLOGY_PROFILER_TOKEN token accepted in X-Profile-Token instead of a login
+    NUMEROLOGY_DB_POOL_SIZE, NUMEROLOGY_DB_MAX_OVERFLOW,
+    NUMEROLOGY_DB_POOL_TIMEOUT, NUMEROLOGY_DB_POOL_RECYCLE
+
+SQLite connections get the pragmas in SQLITE_PRAGMAS as they are opened:
+WAL lets readers carry on while a client is being inserted, and
+synchronous=NORMAL is safe under WAL while only syncing at checkpoints.
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_SQLITE_PATH = os.path.join(BASE_DIR, "instance", "numerology.db")
+
+# Applied in order on every new SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,            # ms to wait for a lock instead of failing
+    "mmap_size": 256 * 1024 * 1024,  # read pages through the OS page cache
+    "cache_size": -64000,            # negative = KiB, so 64 MB per connection
+    "temp_store": "MEMORY",
+}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def database_uri():
+    uri = os.environ.get("NUMEROLOGY_DATABASE_URL") or os.environ.get("DATABASE_URL")
+    return uri or f"sqlite:///{DEFAULT_SQLITE_PATH}"
+
+
+def engine_options(uri):
+    """Pool settings for the engine behind `uri`."""
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {}  # in-memory databases use a single shared connection
+        return {
+            "pool_size": _env_int("NUMEROLOGY_DB_POOL_SIZE", 10),
+            "max_overflow": _env_int("NUMEROLOGY_DB_MAX_OVERFLOW", 20),
+            "pool_timeout": _env_int("NUMEROLOGY_DB_POOL_TIMEOUT", 30),
+            "connect_args": {"timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000},
+        }
+    return {
+        "pool_size": _env_int("NUMEROLOGY_DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("NUMEROLOGY_DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("NUMEROLOGY_DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("NUMEROLOGY_DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+
+
+class Config:
+    SECRET_KEY = os.environ.get("NUMEROLOGY_SECRET_KEY", "supersecret")
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
+    REPORT_WORKERS = _env_int("NUMEROLOGY_REPORT_WORKERS", 2)
+    REPORT_JOB_LEASE_S = _env_int("NUMEROLOGY_REPORT_JOB_LEASE_MIN", 10) * 60
+    REPORT_CACHE_MAX_BYTES = _env_int("NUMEROLOGY_REPORT_CACHE_MB", 200) * 1024 * 1024
+    READING_TTL_S = _env_int("NUMEROLOGY_READING_TTL_HOURS", 168) * 3600
+    API_TOKENS = [t.strip() for t in os.environ.get("NUMEROLOGY_API_TOKENS", "").split(",") if t.strip()]
+    API_MAX_BATCH = _env_int("NUMEROLOGY_API_MAX_BATCH", 5000)
+    METRICS_ENABLED = os.environ.get("NUMEROLOGY_METRICS", "").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.environ.get("NUMEROLOGY_METRICS_TOKEN") or None
+    SQL_PROFILER = os.environ.get("NUMEROLOGY_SQL_PROFILER", "").lower() in ("1", "true", "yes")
+    SQL_PROFILER_HISTORY = 200  # profiles kept in memory
+    SQL_PROFILER_NPLUS1 = 3  # runs of one statement shape in a request that make an N+1 suspect
+    SQL_PROFILER_ENFORCE = False  # raise QueryBudgetExceeded over budget (for tests)
+    PROFILER_ENABLED = os.environ.get("NUMEROLOGY_PROFILER", "").lower() in ("1", "true", "yes")
+    PROFILER_TOKEN = os.environ.get("NUMEROLOGY_PROFILER_TOKEN") or None
+    PROFILER_INTERVAL_MS = 5
+    PROFILER_MAX_PROFILES = 100  # newest profiles kept in instance/profiles/
+
+
+def apply_sqlite_pragmas(engine, pragmas=SQLITE_PRAGMAS):
+    """Run `pragmas` on every connection `engine` opens (SQLite only)."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
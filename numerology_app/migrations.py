@@ -0,0 +1,297 @@
+"""
+Lightweight schema migrations for the SQLite database.
+
+Each migration is a function that runs raw DDL on one connection, inside
+its own transaction, and is recorded in the schema_migrations table once it
+has run. Migrations are idempotent (IF NOT EXISTS, column checks), so a
+database built by `flask create-db` from the current models can be marked
+as migrated without running anything.
+
+No migration deletes data on its own. One that would (0002, on duplicate
+clients) raises MigrationError listing the rows instead, and only goes
+ahead when `options["dedupe_export"]` names a CSV file to write the
+dropped rows to first.
+
+    flask migrate            # apply pending migrations
+    flask migrate --list     # show applied / pending
+    flask migrate --dedupe   # let 0002 drop duplicate clients, exporting them
+"""
+import csv
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from numerology_app.utils.lookups import MODEL_MAP
+
+MIGRATIONS = []
+MAX_LISTED = 20  # conflicting client groups shown in a MigrationError
+
+
+class MigrationError(RuntimeError):
+    """A migration cannot run without losing data; nothing was changed."""
+
+
+def migration(migration_id, description):
+    """Register a migration function; they run in the order defined."""
+    def register(fn):
+        MIGRATIONS.append((migration_id, description, fn))
+        return fn
+    return register
+
+
+def _tables(conn):
+    rows = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in rows}
+
+
+def _columns(conn, table):
+    # table_xinfo also lists generated columns
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_xinfo({table})")}
+
+
+# -------------------
+# Migrations
+# -------------------
+@migration("0001_clients_indexes", "Index clients on created_at and on name prefixes")
+def _clients_indexes(conn, options):
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_clients_created_at ON clients (created_at)")
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_clients_first_name_nocase ON clients (first_name COLLATE "NOCASE")'
+    )
+    conn.exec_driver_sql(
+        'CREATE INDEX IF NOT EXISTS ix_clients_last_name_nocase ON clients (last_name COLLATE "NOCASE")'
+    )
+
+
+@migration("0002_clients_unique_name_dob", "Make (first_name, dob) unique on clients")
+def _clients_unique_name_dob(conn, options):
+    groups = conn.exec_driver_sql(
+        "SELECT first_name, dob, GROUP_CONCAT(id) FROM clients "
+        "GROUP BY first_name, dob HAVING COUNT(*) > 1 ORDER BY MIN(id)"
+    ).all()
+    removed = 0
+    if groups:
+        export_path = options.get("dedupe_export")
+        if not export_path:
+            listed = "\n".join(
+                f"  {first_name} / {dob}: ids {ids.replace(',', ', ')}"
+                for first_name, dob, ids in groups[:MAX_LISTED]
+            )
+            more = f"\n  ... and {len(groups) - MAX_LISTED} more" if len(groups) > MAX_LISTED else ""
+            raise MigrationError(
+                f"{len(groups)} (first_name, dob) pairs belong to more than one client:\n"
+                f"{listed}{more}\n"
+                "Merge or edit them, or rerun with --dedupe to keep the first of each "
+                "(the others are exported to a CSV file first)."
+            )
+        # keep the first saved row of every (first_name, dob), as numerology_home would find it
+        dropped = "FROM clients WHERE id NOT IN (SELECT MIN(id) FROM clients GROUP BY first_name, dob)"
+        result = conn.exec_driver_sql(f"SELECT * {dropped} ORDER BY id")
+        with open(export_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(result.keys())
+            writer.writerows(result)
+        removed = conn.exec_driver_sql(f"DELETE {dropped}").rowcount
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_first_name_dob ON clients (first_name, dob)"
+    )
+    if removed:
+        return f"{removed} duplicate clients removed, exported to {options['dedupe_export']}"
+
+
+@migration("0003_lookup_number_keys", "Add indexed integer number_key columns to the lookup tables")
+def _lookup_number_keys(conn, options):
+    tables = _tables(conn)
+    for model in MODEL_MAP.values():
+        table = model.__tablename__
+        if "number_key" not in model.__table__.c or table not in tables:
+            continue
+        if "number_key" not in _columns(conn, table):
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table} ADD COLUMN number_key INTEGER "
+                "GENERATED ALWAYS AS (CAST(number AS INTEGER)) VIRTUAL"
+            )
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{table}_number_key ON {table} (number_key)")
+
+
+@migration("0004_report_jobs_cache_key", "Add an indexed cache_key column to report_jobs")
+def _report_jobs_cache_key(conn, options):
+    if "report_jobs" not in _tables(conn):
+        return "report_jobs not created yet"  # create_all adds it with the column
+    if "cache_key" not in _columns(conn, "report_jobs"):
+        conn.exec_driver_sql("ALTER TABLE report_jobs ADD COLUMN cache_key VARCHAR(64)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_report_jobs_cache_key ON report_jobs (cache_key)"
+    )
+
+
+# -------------------
+# Runner
+# -------------------
+def _ensure_version_table(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations "
+        "(id VARCHAR(100) PRIMARY KEY, applied_at DATETIME NOT NULL)"
+    )
+
+
+def _record(conn, migration_id):
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO schema_migrations (id, applied_at) VALUES (?, ?)",
+        (migration_id, datetime.utcnow().isoformat(sep=" ")),
+    )
+
+
+def applied(engine):
+    """Ids of the migrations already recorded in the database."""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.exec_driver_sql("SELECT id FROM schema_migrations")}
+
+
+def pending(engine):
+    done = applied(engine)
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def migrate(engine, progress=None, options=None):
+    """
+    Apply every pending migration, each in its own transaction.
+    `progress` is called with (id, description, note) after each one;
+    `options` is passed to every migration (see the module docstring).
+    Returns the ids applied; a MigrationError stops at the migration that
+    raised it, with that one rolled back.
+    """
+    ran = []
+    for migration_id, description, fn in pending(engine):
+        with engine.begin() as conn:
+            note = fn(conn, options or {})
+            _record(conn, migration_id)
+        ran.append(migration_id)
+        if progress:
+            progress(migration_id, description, note)
+    return ran
+
+
+def mark_applied(engine):
+    """Record every migration as applied (for a schema fresh from create_all)."""
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        for migration_id, _, _ in MIGRATIONS:
+            _record(conn, migration_id)
+
+
+# -------------------
+# Query-Plan Benchmark
+# -------------------
+# The clients table as it was before these migrations
+BASELINE_CLIENTS = """
+CREATE TABLE clients (
+    id INTEGER NOT NULL,
+    first_name VARCHAR(100) NOT NULL,
+    middle_name VARCHAR(100),
+    last_name VARCHAR(100),
+    dob VARCHAR(20) NOT NULL,
+    results JSON,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+)
+"""
+
+_FIRST = ["Aarav", "Ada", "Amit", "Ananya", "Diya", "Emma", "Ishaan", "Kiran", "Lee", "Liam",
+          "Maya", "Meera", "Noah", "Omar", "Priya", "Ravi", "Riya", "Sara", "Tom", "Zoe"]
+_LAST = ["Brown", "Chan", "Gupta", "Khan", "Lopez", "Mehta", "Moore", "Patel", "Raman", "Shah",
+         "Singh", "Smith", "Thakar", "Verma"]
+
+
+def _synthetic_clients(rows, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for i in range(rows):
+        dob = f"{rng.randint(1940, 2015)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        created = start + timedelta(seconds=i * 60 + rng.randint(0, 59))
+        yield (
+            i + 1, f"{rng.choice(_FIRST)}{i % 5000}", rng.choice(_LAST), dob,
+            created.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        )
+
+
+def _bench_queries(rows):
+    """(label, sql, params) for the hot client queries."""
+    middle = datetime(2020, 1, 1) + timedelta(seconds=rows * 30)
+    return [
+        ("numerology_home lookup",
+         "SELECT * FROM clients WHERE first_name = ? AND dob = ? LIMIT 1",
+         (f"Priya{rows // 2 % 5000}", "1987-06-24")),
+        ("client list, first page",
+         "SELECT * FROM clients WHERE created_at IS NOT NULL "
+         "ORDER BY created_at DESC, id DESC LIMIT 51", ()),
+        ("client list, deep page",
+         "SELECT * FROM clients WHERE created_at IS NOT NULL AND (created_at, id) < (?, ?) "
+         "ORDER BY created_at DESC, id DESC LIMIT 51",
+         (middle.strftime("%Y-%m-%d %H:%M:%S.%f"), rows // 2)),
+        ("typeahead search",
+         "SELECT * FROM clients WHERE first_name LIKE ? ESCAPE '\\' "
+         'ORDER BY first_name COLLATE "NOCASE", id LIMIT 20', ("pri%",)),
+    ]
+
+
+def _measure(conn, sql, params, repeat):
+    plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return plan, statistics.median(timings) * 1000
+
+
+def benchmark(rows=1_000_000, repeat=5, path=None):
+    """
+    Build a synthetic clients table with `rows` rows in a scratch database,
+    time the hot queries and capture their plans, run the migrations and
+    measure again. Returns a list of dicts, one per query.
+    """
+    owned = path is None
+    if owned:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    try:
+        with sqlite3.connect(path) as conn:
+            conn.execute("DROP TABLE IF EXISTS clients")
+            conn.execute(BASELINE_CLIENTS)
+            conn.executemany(
+                "INSERT INTO clients (id, first_name, last_name, dob, created_at) VALUES (?, ?, ?, ?, ?)",
+                _synthetic_clients(rows),
+            )
+        queries = _bench_queries(rows)
+
+        def measure_all():
+            with sqlite3.connect(path) as conn:
+                return [_measure(conn, sql, params, repeat) for _, sql, params in queries]
+
+        before = measure_all()
+        engine = create_engine(f"sqlite:///{path}")
+        migrate(engine, options={"dedupe_export": f"{path}.dropped.csv"})  # synthetic names collide
+        engine.dispose()
+        after = measure_all()
+
+        return [
+            {
+                "query": label,
+                "before_plan": b_plan, "before_ms": b_ms,
+                "after_plan": a_plan, "after_ms": a_ms,
+            }
+            for (label, _, _), (b_plan, b_ms), (a_plan, a_ms) in zip(queries, before, after)
+        ]
+    finally:
+        if os.path.exists(f"{path}.dropped.csv"):
+            os.remove(f"{path}.dropped.csv")
+        if owned:
+            os.remove(path)
@@ -13,6 +13,7 @@ class LifePath(db.Model):
     __tablename__ = "life_path"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)  # integer copy of number for typed lookups
 
     # Time Related
     lucky_date = db.Column(db.String(50))
@@ -56,6 +57,7 @@ class LifeExpression(db.Model):
     __tablename__ = "life_expression"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
 
     description = db.Column(db.Text)
     key_traits = db.Column(db.Text)
@@ -67,6 +69,7 @@ class SoulUrge(db.Model):
     __tablename__ = "soul_urge"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
     description = db.Column(db.Text)
 # -------------- BIRTHDAY DETAILS ---------------- #
 # -------------- BIRTHDAY DETAILS ---------------- #
@@ -74,6 +77,7 @@ class BirthdayDetails(db.Model):
     __tablename__ = "birthday_details"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
     description = db.Column(db.Text)
 # -------------- ALPHABET DETAILS ---------------- #
 # -------------- ALPHABET DETAILS ---------------- #
@@ -100,6 +104,7 @@ class MissingNumber(db.Model):
     __tablename__ = "missing_numbers"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
     details = db.Column(db.Text)  # interpretation of missing energy or lesson
 
 
@@ -141,6 +146,15 @@ class Client(db.Model):
     results = db.Column(db.JSON)  # Store computed numerology results
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # One client per first name and DOB; also serves the numerology_home lookup
+        db.Index("uq_clients_first_name_dob", "first_name", "dob", unique=True),
+        db.Index("ix_clients_created_at", "created_at"),
+        # Case-insensitive prefix search (LIKE 'abc%') on first and last names
+        db.Index("ix_clients_first_name_nocase", first_name.collate("NOCASE")),
+        db.Index("ix_clients_last_name_nocase", last_name.collate("NOCASE")),
+    )
+
     @property
     def full_name(self):
         parts = [self.first_name, self.middle_name, self.last_name]
@@ -153,6 +167,7 @@ class LuckyDayMeaning(db.Model):
     __tablename__ = "lucky_day_meaning"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
     description = db.Column(db.Text)
     color = db.Column(db.String(100)) # For the new color data
 
@@ -161,4 +176,35 @@ class LuckyYearMonthMeaning(db.Model):
     __tablename__ = "lucky_year_month_meaning"
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(5), nullable=False, unique=True)
-    description = db.Column(db.Text) # Renamed from 'meaning' for clarity
\ No newline at end of file
+    number_key = db.Column(db.Integer, db.Computed("CAST(number AS INTEGER)"), index=True)
+    description = db.Column(db.Text) # Renamed from 'meaning' for clarity
+
+# -------------- REPORT JOBS ---------------- #
+class ReportJob(db.Model):
+    """A PDF report queued for the worker pool (see utils/report_jobs.py)."""
+    __tablename__ = "report_jobs"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, also the file name
+    status = db.Column(db.String(10), nullable=False, default="queued", index=True)  # queued/running/done/failed
+    filename = db.Column(db.String(200), nullable=False)  # download name
+    html = db.Column(db.Text)  # rendered report, cleared once the PDF exists
+    base_url = db.Column(db.String(200))
+    error = db.Column(db.Text)
+    cache_key = db.Column(db.String(64), index=True)  # report_cache key of the PDF, if cacheable
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+# -------------- DAILY LUCK ---------------- #
+class DailyLuck(db.Model):
+    """A client's lucky numbers on one day, precomputed (see utils/daily_luck.py)."""
+    __tablename__ = "daily_luck"
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    lucky_year = db.Column(db.SmallInteger, nullable=False)
+    lucky_month = db.Column(db.SmallInteger, nullable=False)
+    lucky_day = db.Column(db.SmallInteger, nullable=False)
+
+    __table_args__ = (
+        # "Whose lucky day is N today": counts and listings for one day
+        db.Index("ix_daily_luck_day_lucky_day", "day", "lucky_day", "client_id"),
+    )
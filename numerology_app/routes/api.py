@@ -0,0 +1,129 @@
+import hmac
+
+from flask import (
+    Blueprint, request, session, jsonify, current_app, Response, stream_with_context
+)
+from numerology_app.utils import lookups, lucky_calendar, readings, reading_api
+from numerology_app.utils.client_export import CHUNK_SIZE, chunked
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+NDJSON = "application/x-ndjson"
+
+
+@api_bp.before_request
+def require_token():
+    """Bearer token from API_TOKENS, or the logged-in web session."""
+    if "user" in session:
+        return None
+    auth = request.headers.get("Authorization", "")
+    token = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+    if token and any(hmac.compare_digest(token, t) for t in current_app.config["API_TOKENS"]):
+        return None
+    return _error("Authentication required.", 401)
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def _wants_meanings(body=None):
+    value = request.args.get("meanings")
+    if value is None and isinstance(body, dict):
+        value = body.get("meanings")
+    return value is None or str(value).lower() not in ("0", "false", "no")
+
+
+@api_bp.route("/reading", methods=["GET", "POST"])
+def reading():
+    """
+    Numbers (and their meanings, unless ?meanings=0) for one person, from
+    query parameters or a JSON body.
+    """
+    record = request.get_json(silent=True) if request.method == "POST" else request.args.to_dict()
+    try:
+        name, dob = reading_api.parse_person(record)
+    except reading_api.InvalidPerson as exc:
+        return _error(str(exc), 400)
+    snapshot = lookups.get_snapshot() if _wants_meanings(record) else None
+    results = readings.compute_results_batch([name], [dob])[0]
+    return jsonify(reading_api.reading(name, dob, results, snapshot))
+
+
+@api_bp.route("/readings:batch", methods=["POST"])
+def readings_batch():
+    """
+    Readings for a list of people: {"people": [...]} or a bare list.
+    Invalid records get {"index", "error"} instead of failing the batch.
+    Meanings (unless ?meanings=0) come once, in a "meanings" table keyed
+    by lookup table and number. With Accept: application/x-ndjson (or
+    ?format=ndjson) readings are streamed one per line as they are
+    computed, and the last line is {"meanings": ...}.
+    """
+    body = request.get_json(silent=True)
+    records = body.get("people") if isinstance(body, dict) else body
+    if not isinstance(records, list):
+        return _error('Send a JSON list of people or {"people": [...]}.', 400)
+    limit = current_app.config["API_MAX_BATCH"]
+    if len(records) > limit:
+        return _error(f"At most {limit} people per batch.", 413)
+
+    snapshot = lookups.get_snapshot() if _wants_meanings(body) else None
+    refs = set() if snapshot else None
+    documents = reading_api.iter_readings(records, refs)
+
+    if request.args.get("format") == "ndjson" or request.accept_mimetypes.best == NDJSON:
+        def lines():
+            yield from reading_api.ndjson_lines(documents)
+            if snapshot:
+                yield from reading_api.ndjson_lines([{"meanings": reading_api.meanings_table(refs, snapshot)}])
+
+        return Response(stream_with_context(chunked(lines(), CHUNK_SIZE)), mimetype=NDJSON)
+
+    readings_list = list(documents)
+    response = {
+        "count": len(readings_list),
+        "errors": sum(1 for document in readings_list if "error" in document),
+        "readings": readings_list,
+    }
+    if snapshot:
+        response["meanings"] = reading_api.meanings_table(refs, snapshot)
+    return jsonify(response)
+
+
+@api_bp.route("/match", methods=["POST"])
+def match():
+    """Matchmaking for {"p1": person, "p2": person}."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return _error('Send {"p1": {...}, "p2": {...}}.', 400)
+    try:
+        p1 = reading_api.parse_person(body.get("p1"))
+        p2 = reading_api.parse_person(body.get("p2"))
+    except reading_api.InvalidPerson as exc:
+        return _error(str(exc), 400)
+    return jsonify(reading_api.match(p1, p2, lookups.get_snapshot()))
+
+
+@api_bp.route("/lucky-calendar", methods=["GET", "POST"])
+def lucky_calendar_view():
+    """
+    Lucky day, month and year for every date from ?start= (today) to ?end=
+    (or ?years=, default 1; ten at most) for one person, optionally only
+    the days whose ?field= (lucky_day) is in ?numbers=1,5,22. ?format=
+    json (default), csv or ics.
+    """
+    record = request.get_json(silent=True) if request.method == "POST" else request.args.to_dict()
+    if not isinstance(record, dict):
+        return _error("Send a JSON object.", 400)
+    fmt = record.get("format") or "json"
+    if fmt not in lucky_calendar.MIMETYPES:
+        return _error(f"format must be one of {', '.join(lucky_calendar.MIMETYPES)}.", 400)
+    try:
+        name, dob = reading_api.parse_person(record)
+        start, end, numbers, field = lucky_calendar.options(record)
+    except ValueError as exc:  # InvalidPerson included
+        return _error(str(exc), 400)
+    columns = lucky_calendar.calendar(dob, start, end, numbers, field)
+    body = lucky_calendar.export(fmt, columns, name, dob, start, end, numbers, field)
+    return Response(body, mimetype=lucky_calendar.MIMETYPES[fmt])
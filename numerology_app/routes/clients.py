@@ -1,6 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+import io
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, session, flash,
+    Response, abort, stream_with_context, jsonify, send_file
+)
+from sqlalchemy.exc import IntegrityError
 from numerology_app.models import Client
 from numerology_app.extensions import db 
+from numerology_app.utils import (
+    bulk_reports, client_export, client_listing, daily_luck, lucky_calendar, matching, readings
+)
+from datetime import date, datetime
 
 clients_bp = Blueprint("clients", __name__, url_prefix="/clients")
 
@@ -13,8 +22,155 @@ def require_login():
 
 @clients_bp.route("/")
 def clients_list():
-    clients = Client.query.order_by(Client.created_at.desc()).all()
-    return render_template("clients/list.html", clients=clients)
+    """First page of clients; the rest are fetched from clients.clients_page."""
+    clients, next_cursor = client_listing.page_clients()
+    return render_template("clients/list.html", clients=clients, next_cursor=next_cursor)
+
+@clients_bp.route("/page")
+def clients_page():
+    """JSON page of clients after ?cursor=, newest first."""
+    try:
+        clients, next_cursor = client_listing.page_clients(
+            request.args.get("cursor") or None,
+            request.args.get("limit", client_listing.PAGE_SIZE, type=int),
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({
+        "clients": [client_listing.client_json(c) for c in clients],
+        "next_cursor": next_cursor,
+    })
+
+@clients_bp.route("/search")
+def clients_search():
+    """JSON typeahead: clients whose first or last name starts with ?q=."""
+    clients = client_listing.search_clients(
+        request.args.get("q", ""),
+        request.args.get("limit", client_listing.SEARCH_LIMIT, type=int),
+    )
+    return jsonify({"clients": [client_listing.client_json(c) for c in clients]})
+
+@clients_bp.route("/lucky-today")
+def lucky_today():
+    """
+    Clients by lucky day number on ?date= (today), from the daily_luck
+    table; ?number= lists the clients with that number.
+    """
+    try:
+        day = date.fromisoformat(request.args["date"]) if request.args.get("date") else date.today()
+    except ValueError:
+        flash("Invalid date; showing today.", "error")
+        day = date.today()
+    number = request.args.get("number", type=int)
+    clients, next_after = [], None
+    if number is not None:
+        clients, next_after = daily_luck.lucky_clients(day, number, request.args.get("after", 0, type=int))
+    return render_template(
+        "clients/lucky_today.html",
+        day=day,
+        counts=daily_luck.counts(day),
+        numbers=daily_luck.LUCKY_NUMBERS,
+        number=number,
+        clients=clients,
+        next_after=next_after,
+    )
+
+@clients_bp.route("/<int:client_id>/lucky-calendar.<fmt>")
+def client_lucky_calendar(client_id, fmt):
+    """
+    A client's lucky calendar as a download (JSON, CSV or iCalendar); see
+    lucky_calendar.options() for ?start=, ?end=/?years=, ?numbers=, ?field=.
+    """
+    if fmt not in lucky_calendar.MIMETYPES:
+        abort(404)
+    client = Client.query.get_or_404(client_id)
+    if not readings.is_valid_dob(client.dob):
+        return jsonify({"error": "This client's date of birth is not a valid date."}), 400
+    try:
+        start, end, numbers, field = lucky_calendar.options(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    columns = lucky_calendar.calendar(client.dob, start, end, numbers, field)
+    body = lucky_calendar.export(fmt, columns, client.full_name, client.dob, start, end, numbers, field)
+    fname = f"Lucky_Calendar_{client.first_name}_{start:%Y%m%d}-{end:%Y%m%d}.{fmt}"
+    return send_file(
+        io.BytesIO(body.encode("utf-8")),
+        mimetype=lucky_calendar.MIMETYPES[fmt],
+        as_attachment=True,
+        download_name=fname,  # quoted, with an RFC 5987 filename* for non-ASCII names
+    )
+
+@clients_bp.route("/export.<fmt>")
+def export_clients(fmt):
+    """Streams every client with the computed numbers as CSV or NDJSON."""
+    if fmt not in client_export.MIMETYPES:
+        abort(404)
+    fname = f"clients_{datetime.utcnow().strftime('%Y%m%d_%H%M')}.{fmt}"
+    return Response(
+        stream_with_context(client_export.export(fmt)),
+        mimetype=client_export.MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={fname}"}
+    )
+
+@clients_bp.route("/reports/export", methods=["POST"])
+def start_report_export():
+    """
+    Start a bulk PDF export for {"ids": [...]} and/or a filter ("q",
+    "created_from", "created_to" as YYYY-MM-DD). Returns the ZIP download
+    URL and a progress URL to poll while it streams.
+    """
+    body = request.get_json(silent=True)
+    if body is None:  # form post: one "ids" field per client
+        body = request.form.to_dict()
+        ids = request.form.getlist("ids") or None
+    elif isinstance(body, dict):
+        ids = body.get("ids")
+    else:
+        return jsonify({"error": "Send a JSON object."}), 400
+    if ids is not None and not isinstance(ids, list):
+        return jsonify({"error": "ids must be a list of client ids."}), 400
+    try:
+        ids = [int(i) for i in ids] if ids is not None else None
+        created_from = date.fromisoformat(body["created_from"]) if body.get("created_from") else None
+        created_to = date.fromisoformat(body["created_to"]) if body.get("created_to") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid ids or dates."}), 400
+    if ids is None and not (body.get("q") or created_from or created_to):
+        return jsonify({"error": "Select clients or give a filter."}), 400
+
+    client_ids = bulk_reports.select_client_ids(ids, body.get("q"), created_from, created_to)
+    if not client_ids:
+        return jsonify({"error": "No clients with a valid date of birth match."}), 400
+    bulk_reports.purge_exports()
+    export_id = bulk_reports.start_export(client_ids)
+    return jsonify({
+        "export_id": export_id,
+        "total": len(client_ids),
+        "download_url": url_for("clients.download_report_export", export_id=export_id),
+        "progress_url": url_for("clients.report_export_progress", export_id=export_id),
+    })
+
+@clients_bp.route("/reports/export/<export_id>.zip")
+def download_report_export(export_id):
+    """Streams the ZIP, adding each client's PDF as soon as it is rendered."""
+    progress = bulk_reports.load_progress(export_id) or abort(404)
+    if progress["started_at"]:
+        return jsonify({"error": "This export has already been downloaded."}), 409
+    fname = f"numerology_reports_{datetime.utcnow().strftime('%Y%m%d_%H%M')}.zip"
+    return Response(
+        stream_with_context(bulk_reports.zip_reports(
+            progress["client_ids"], request.host_url,
+            progress=bulk_reports.progress_recorder(export_id),
+        )),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={fname}"}
+    )
+
+@clients_bp.route("/reports/export/<export_id>/progress")
+def report_export_progress(export_id):
+    progress = bulk_reports.load_progress(export_id) or abort(404)
+    progress.pop("client_ids")
+    return jsonify(progress)
 
 @clients_bp.route("/edit/<int:client_id>", methods=["POST"])
 def edit_client(client_id):
@@ -25,7 +181,18 @@ def edit_client(client_id):
         client.middle_name = request.form.get("middle_name")
         client.last_name = request.form.get("last_name")
         client.dob = request.form.get("dob")
-        db.session.commit()
+        daily_luck.forget_client(client.id)
+        # Name or DOB may have changed: refresh the stored results
+        if readings.is_valid_dob(client.dob):
+            readings.client_results(client)
+        else:
+            client.results = None
+        try:
+            db.session.commit()
+            matching.bump_clients_version()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Another client already has this first name and date of birth.", "error")
     return redirect(url_for("clients.clients_list"))
 
 @clients_bp.route("/delete/<int:client_id>", methods=["POST"])
@@ -33,6 +200,8 @@ def delete_client(client_id):
     """Handles the submission from the Delete Client modal."""
     client = Client.query.get_or_404(client_id)
     if client:
+        daily_luck.forget_client(client.id)
         db.session.delete(client)
         db.session.commit()
+        matching.bump_clients_version()
     return redirect(url_for("clients.clients_list"))
\ No newline at end of file
@@ -0,0 +1,29 @@
+from flask import Blueprint, render_template, session, redirect, url_for, flash, current_app, abort
+
+# Registered by utils.sql_profiler.init_app() only when SQL_PROFILER is on
+debug_bp = Blueprint("debug", __name__, url_prefix="/_debug")
+
+@debug_bp.before_request
+def require_login():
+    """Gatekeeper for all routes in this blueprint."""
+    if "user" not in session:
+        flash("You must be logged in to view this page.", "error")
+        return redirect(url_for("auth.login"))
+
+@debug_bp.route("/requests")
+def recent_requests():
+    """The most recent profiled requests, newest first."""
+    return render_template(
+        "debug/requests.html",
+        profiles=current_app.extensions["sql_profiler"].recent(),
+        threshold=current_app.config["SQL_PROFILER_NPLUS1"],
+    )
+
+@debug_bp.route("/requests/<profile_id>")
+def request_profile(profile_id):
+    """Every statement of one request, with the N+1 suspects first."""
+    profile = current_app.extensions["sql_profiler"].get(profile_id) or abort(404)
+    threshold = current_app.config["SQL_PROFILER_NPLUS1"]
+    return render_template(
+        "debug/request.html", profile=profile, suspects=profile.suspects(threshold), threshold=threshold,
+    )
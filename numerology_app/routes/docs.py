@@ -1,12 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
 from numerology_app.extensions import db
-from numerology_app.models import (
-    LifePath, LifeExpression, SoulUrge,
-    BirthdayDetails, AlphabetDetails,
-    RepeatingNumber, MissingNumber,
-    KarmicLineMeaning,
-    LuckyYearMonthMeaning, LuckyDayMeaning
-)
+from numerology_app.utils import lookups
+from numerology_app.utils.lookups import MODEL_MAP
 
 docs_bp = Blueprint("docs", __name__, url_prefix="/docs")
 
@@ -17,20 +12,6 @@ def require_login():
         flash("You must be logged in to view this page.", "error")
         return redirect(url_for("auth.login"))
 
-# A dictionary mapping table names to their models
-MODEL_MAP = {
-    "life_path": LifePath,
-    "life_expression": LifeExpression,
-    "soul_urge": SoulUrge,
-    "birthday": BirthdayDetails,
-    "alphabet": AlphabetDetails,
-    "repeating": RepeatingNumber,
-    "missing": MissingNumber,
-    "karmic_lines": KarmicLineMeaning,
-    "lucky_year_month": LuckyYearMonthMeaning,
-    "lucky_day": LuckyDayMeaning
-}
-
 @docs_bp.route("/", methods=["GET"])
 def docs_home():
     data = {
@@ -48,7 +29,11 @@ def get_entry(table, item_id):
         return jsonify({"error": "Table not found"}), 404
         
     record = model.query.get_or_404(item_id)
-    return jsonify({col.name: getattr(record, col.name) for col in record.__table__.columns})
+    # generated columns (number_key) are derived, not editable
+    return jsonify({
+        col.name: getattr(record, col.name)
+        for col in record.__table__.columns if col.computed is None
+    })
 
 
 @docs_bp.route("/edit/<table>/<int:item_id>", methods=["POST"])
@@ -60,8 +45,9 @@ def edit_entry(table, item_id):
 
     record = model.query.get_or_404(item_id)
     
+    editable = {col.name for col in model.__table__.columns if col.computed is None}
     for key, val in request.form.items():
-        if hasattr(record, key):
+        if key in editable:
             try:
                 setattr(record, key, val)
             except Exception as e:
@@ -71,6 +57,7 @@ def edit_entry(table, item_id):
                 
     try:
         db.session.commit()
+        lookups.bump_version()  # workers reload their lookup snapshot
         flash(f"{table.replace('_', ' ').title()} record updated successfully!", "success")
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,11 @@
-from flask import Blueprint, render_template, request, flash, session, redirect, url_for
-from numerology_app.utils import numerology
-from numerology_app.models import MissingNumber, LifePath
+import io
+
+from flask import (
+    Blueprint, render_template, request, flash, session, redirect, url_for,
+    Response, stream_with_context
+)
+from numerology_app.utils import date_table, matching, readings, compat_matrix
+from numerology_app.models import Client, MissingNumber, LifePath
 from numerology_app.extensions import db
 
 matchmaking_bp = Blueprint("matchmaking", __name__, url_prefix="/matchmaking")
@@ -29,50 +34,33 @@ def matchmaking_home():
         # --------------------
         # NUMEROLOGY CALCULATIONS
         # --------------------
-        p1_life_path = numerology.life_path(p1_dob)
-        p2_life_path = numerology.life_path(p2_dob)
-
-        # --- Compatibility lookup ---
-        compat_lookup = {
-            "1": {"friends": [4, 8], "same": [2, 3, 7, 9], "enemies": [5, 6], "god": "Surya"},
-            "2": {"friends": [7, 9], "same": [1, 3, 4, 6], "enemies": [5, 8], "god": "Chandra"},
-            "3": {"friends": [6, 9], "same": [1, 2, 5, 7], "enemies": [4, 8], "god": "Vishnu"},
-            "4": {"friends": [1, 8], "same": [2, 6, 7, 9], "enemies": [3, 5], "god": "Laxmi"},
-            "5": {"friends": [3, 9], "same": [1, 6, 7, 8], "enemies": [2, 4], "god": "Devi"},
-            "6": {"friends": [3, 9], "same": [2, 4, 5, 7], "enemies": [1, 8], "god": "Narsinh"},
-            "7": {"friends": [2, 6], "same": [3, 4, 5, 8], "enemies": [1, 9], "god": "Bhairav"},
-            "8": {"friends": [1, 4], "same": [2, 5, 7, 9], "enemies": [3, 6], "god": "Hanuman"},
-            "9": {"friends": [3, 6], "same": [2, 4, 5, 8], "enemies": [1, 7], "god": "Hanuman"},
-        }
-
-        def get_profile(num):
-            data = compat_lookup.get(str(num), {"friends": [], "same": [], "enemies": [], "god": "-"})
-            data["num"] = num
-            return data
+        p1_profile = date_table.date_profile(p1_dob)
+        p2_profile = date_table.date_profile(p2_dob)
+        p1_life_path = p1_profile["life_path"]
+        p2_life_path = p2_profile["life_path"]
 
-        p1 = get_profile(p1_life_path)
-        p2 = get_profile(p2_life_path)
+        p1 = matching.life_path_profile(p1_life_path)
+        p2 = matching.life_path_profile(p2_life_path)
 
         # --------------------
         # MISSING NUMBERS (Reuse Numerology Logic)
         # --------------------
-        def find_missing_numbers(name, dob):
-            # This function might need to be defined in numerology.py if it isn't already
-            # For now, assuming it's available or logic is here
-            missing_list_str = numerology.missing_numbers(dob) # Assumes this returns a list of strings/ints
-            missing_list = [str(m) for m in missing_list_str]
-
-            missing_rows = MissingNumber.query.filter(
-                MissingNumber.number.in_(missing_list)
-            ).order_by(MissingNumber.number).all()
-
+        # One query for both people's missing numbers
+        p1_missing = [str(m) for m in p1_profile["missing"]]
+        p2_missing = [str(m) for m in p2_profile["missing"]]
+        missing_rows = MissingNumber.query.filter(
+            MissingNumber.number_key.in_(sorted({int(m) for m in p1_missing + p2_missing}))
+        ).order_by(MissingNumber.number_key).all()
+
+        def find_missing_numbers(missing_list):
+            rows = [row for row in missing_rows if row.number in missing_list]
             missing_text = ", ".join(missing_list) or "None"
-            missing_details = "; ".join([f"{row.number}: {row.details}" for row in missing_rows]) or "No missing numbers."
+            missing_details = "; ".join([f"{row.number}: {row.details}" for row in rows]) or "No missing numbers."
 
             return missing_text, missing_details
 
-        p1_missing_no, p1_missing_details = find_missing_numbers(p1_name, p1_dob)
-        p2_missing_no, p2_missing_details = find_missing_numbers(p2_name, p2_dob)
+        p1_missing_no, p1_missing_details = find_missing_numbers(p1_missing)
+        p2_missing_no, p2_missing_details = find_missing_numbers(p2_missing)
         p1["missing_no"], p1["missing_details"] = p1_missing_no, p1_missing_details
         p2["missing_no"], p2["missing_details"] = p2_missing_no, p2_missing_details
 
@@ -82,8 +70,13 @@ def matchmaking_home():
         p1_crystal = None
         p2_crystal = None
 
-        p1_life = LifePath.query.filter_by(number=str(p1_life_path)).first()
-        p2_life = LifePath.query.filter_by(number=str(p2_life_path)).first()
+        life_rows = {}
+        for row in LifePath.query.filter(
+            LifePath.number_key.in_([p1_life_path, p2_life_path])
+        ).order_by(LifePath.id):
+            life_rows.setdefault(row.number_key, row)
+        p1_life = life_rows.get(p1_life_path)
+        p2_life = life_rows.get(p2_life_path)
 
         if p1_life and p1_life.stone:
             p1_crystal = p1_life.stone
@@ -101,16 +94,7 @@ def matchmaking_home():
         # --------------------
         # RELATIONSHIP TITLE
         # --------------------
-        if {p1_life_path, p2_life_path} == {3, 9}:
-            title = "LOVE, SACRIFICE, PURE RELATION"
-        elif p1_life_path == p2_life_path:
-            title = "STRONG SAME-NUMBER CONNECTION"
-        elif p2_life_path in p1["friends"]:
-            title = "GOOD COMPATIBILITY (Friendly Numbers)"
-        elif p2_life_path in p1["enemies"]:
-            title = "CHALLENGING COMPATIBILITY"
-        else:
-            title = "GENERAL COMPATIBILITY"
+        title = matching.relationship_title(p1_life_path, p2_life_path)
 
         result = {
             "title": title,
@@ -119,4 +103,63 @@ def matchmaking_home():
             "crystal_suggestion": combined_crystal_text,
         }
 
-    return render_template("matchmaking/home.html", result=result)
\ No newline at end of file
+    return render_template("matchmaking/home.html", result=result)
+
+
+@matchmaking_bp.route("/best/<int:client_id>", endpoint="best_matches")
+def best_matches(client_id):
+    """Top-K stored clients that match one client best (?k=, default 10)."""
+    client = Client.query.get_or_404(client_id)
+    k = max(1, min(request.args.get("k", matching.DEFAULT_TOP_K, type=int), 100))
+
+    profile = None
+    if readings.is_valid_dob(client.dob):
+        profile = matching.life_path_profile(date_table.date_profile(client.dob)["life_path"])
+    else:
+        flash("This client has no valid date of birth to match on.", "warning")
+
+    return render_template(
+        "matchmaking/best.html",
+        client=client,
+        profile=profile,
+        matches=matching.best_matches(client, k) if profile else [],
+        k=k,
+    )
+
+
+@matchmaking_bp.route("/matrix", methods=["GET", "POST"], endpoint="group_matrix")
+def group_matrix():
+    """
+    All-pairs compatibility for an uploaded participant list (CSV or NDJSON
+    with name and dob): the pairwise CSV as a streamed download, or a
+    summary of titles and top pairs.
+    """
+    if request.method == "GET":
+        return render_template("matchmaking/matrix.html", summary=None)
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Please choose a participants file.", "warning")
+        return redirect(url_for("matchmaking.group_matrix"))
+
+    fmt = "ndjson" if upload.filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+    try:
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig")
+        participants, invalid = compat_matrix.read_participants(stream, fmt)
+    except (UnicodeDecodeError, ValueError):
+        flash("Could not read the file; upload UTF-8 CSV or NDJSON.", "error")
+        return redirect(url_for("matchmaking.group_matrix"))
+    if len(participants) < 2:
+        flash("The file needs at least two participants with a name and valid date of birth.", "warning")
+        return redirect(url_for("matchmaking.group_matrix"))
+
+    if request.form.get("action") == "csv":
+        return Response(
+            stream_with_context(compat_matrix.matrix_csv(participants)),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=compatibility_matrix.csv"}
+        )
+
+    top = max(1, min(request.form.get("top", compat_matrix.DEFAULT_TOP, type=int), 100))
+    summary = compat_matrix.summarize(participants, top=top)
+    return render_template("matchmaking/matrix.html", summary=summary, invalid=invalid, top=top)
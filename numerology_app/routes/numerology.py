@@ -2,17 +2,13 @@
 
 from flask import (
     Blueprint, render_template, request, session, 
-    redirect, url_for, Response, current_app, flash
+    redirect, url_for, Response, current_app, flash,
+    abort, jsonify, send_file
 )
-from numerology_app.utils import numerology
+from numerology_app.utils import matching, reading_store, readings, report_cache, report_jobs, reports
 from numerology_app.extensions import db
-from numerology_app.models import (
-    LifePath, LifeExpression, SoulUrge, BirthdayDetails, AlphabetDetails,
-    RepeatingNumber, MissingNumber, KarmicLineMeaning, Client,
-    LuckyDayMeaning, LuckyYearMonthMeaning
-)
+from numerology_app.models import Client
 from datetime import datetime
-import re
 
 numerology_bp = Blueprint("numerology", __name__, url_prefix="/numerology")
 
@@ -37,78 +33,45 @@ def numerology_home():
         dob_from_form = request.form.get("dob", "").strip()
         
         try:
-            # --- START OF NEW, MORE ROBUST FIX ---
-            
-            # 1. Replace all common separators with a single hyphen
-            temp_dob = dob_from_form.replace(" ", "-").replace("/", "-").replace(".", "-").replace("+", "-")
-            
-            # 2. Condense multiple hyphens (e.g., "15--04") into one
-            temp_dob = re.sub(r'-+', '-', temp_dob) 
-            
-            # 3. Now split by the single hyphen
-            parts = temp_dob.split('-')
-            # --- END OF NEW FIX ---
-            
-            if len(parts) == 3:
-                day, month, year = parts[0], parts[1], parts[2]
-                
-                # Sanity check for year length
-                if len(year) != 4:
-                    raise ValueError("Year must be 4 digits")
-                    
-                # Re-assemble in the correct YYYY-MM-DD format
-                dob_for_backend = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            else:
-                raise ValueError("Invalid date format")
-        except Exception as e:
-            # This error will now only trigger if the format is truly wrong
+            dob = readings.normalize_dob(dob_from_form)
+        except ValueError:
             flash(f"Invalid date format: '{dob_from_form}'. Please use DD MM YYYY.", "error")
             return redirect(url_for("numerology.numerology_home"))
-        
-        dob = dob_for_backend 
-
-        full_name = " ".join([p for p in [first_name, middle_name, last_name] if p])
-
-        results = {
-            "life_path": numerology.life_path(dob),
-            "expression": numerology.expression_number(full_name, numerology.PYTHAGOREAN_MAPPING),
-            "soul_urge": numerology.soul_urge(full_name),
-            "birthday": numerology.birthday_number(dob),
-            "alphabet": full_name[0].upper() if full_name else "—",
-            "karmic_chart": numerology.karmic_chart_and_lines(dob),
-            "future_prediction": numerology.future_predictions(dob),
-        }
-
-        repeat_dict = numerology.repeating_numbers(dob)
-        missing_list = numerology.missing_numbers(dob)
-        results["missing_repeat"] = {"repeating": repeat_dict, "missing": missing_list}
-
-        if first_name and dob:
-            existing = Client.query.filter_by(first_name=first_name, dob=dob).first()
-            if not existing:
+
+        full_name = readings.full_name(first_name, middle_name, last_name)
+        fields = (first_name, middle_name, last_name, dob)
+
+        existing = Client.query.filter_by(first_name=first_name, dob=dob).first() if first_name else None
+        if existing and (existing.middle_name or "", existing.last_name or "") == (middle_name, last_name):
+            # Reopened client: serve the stored results while their stamp matches
+            results = readings.client_results(existing)
+            db.session.commit()
+        else:
+            results = readings.compute_results(full_name, dob)
+            if first_name and not existing:
                 new_client = Client(
                     first_name=first_name,
                     middle_name=middle_name,
                     last_name=last_name,
-                    dob=dob 
+                    dob=dob,
+                    results=readings.stamp_results(results, *fields),
                 )
                 db.session.add(new_client)
                 db.session.commit()
+                matching.bump_clients_version()
 
-        session["numerology_input"] = {
+        reading_store.remember(results, {
             "first_name": first_name,
             "middle_name": middle_name,
             "last_name": last_name,
             "dob": dob_from_form, # Save the original "DD MM YYYY"
-        }
-        session["numerology_results"] = results
+        })
 
         return redirect(url_for("numerology.numerology_home"))
 
-    # GET request logic
-    results = session.get("numerology_results", {}) or {}
-    clients = Client.query.order_by(Client.created_at.desc()).all()
-    return render_template("numerology/home.html", results=results, clients=clients)
+    # GET request logic; the load-client modal fetches clients on demand
+    results, person = reading_store.current()
+    return render_template("numerology/home.html", results=results, person=person)
 
 # ... (rest of your .py file) ...
 @numerology_bp.route("/clear", methods=["GET"])
@@ -117,168 +80,108 @@ def clear_session():
     Clears the numerology results and input from the session and redirects
     back to the home page, effectively resetting it.
     """
-    session.pop("numerology_results", None)
-    session.pop("numerology_input", None)
+    reading_store.forget()
     return redirect(url_for("numerology.numerology_home"))
 # ---------------------------
 
-def _active_lines_from_chart(karmic_chart_dict):
-    """
-    Returns (positive_line_codes, negative_line_codes) based on the Lo Shu chart counts.
-    """
-    lines = [
-        ('1-2-3', [1, 2, 3]),
-        ('4-5-6', [4, 5, 6]),
-        ('7-8-9', [7, 8, 9]),
-        ('1-4-7', [1, 4, 7]),
-        ('2-5-8', [2, 5, 8]),
-        ('3-6-9', [3, 6, 9]),
-        ('1-5-9', [1, 5, 9]),
-        ('3-5-7', [3, 5, 7]),
-    ]
-
-    chart = karmic_chart_dict.get("chart", {}) if karmic_chart_dict else {}
-    def count(n):  # handles int keys and string keys
-        return chart.get(n, chart.get(str(n), 0)) or 0
-
-    positives, negatives = [], []
-    for code, trio in lines:
-        counts = [count(n) for n in trio]
-        if all(c > 0 for c in counts):
-            positives.append(code)
-        if all(c == 0 for c in counts):
-            negatives.append(code)
-    return positives, negatives
-
-
-def _fetch_lookup_details(results):
-    """
-    Given session['numerology_results'], fetches full text from lookup tables.
-    Returns a dict with all sections ready for the report template.
-    """
-    if not results:
-        return {}
-
-    # Core numbers from results
-    life_path_no = results.get('life_path')
-    expression_no = results.get('expression')
-    soul_urge_no = results.get('soul_urge')
-    birthday_no = results.get('birthday')
-    first_alpha = results.get('alphabet')
-
-    # DB lookups (safe fallbacks)
-    life_path = LifePath.query.filter_by(number=str(life_path_no)).first() if life_path_no else None
-    life_expression = LifeExpression.query.filter_by(number=str(expression_no)).first() if expression_no else None
-    soul_urge = SoulUrge.query.filter_by(number=str(soul_urge_no)).first() if soul_urge_no else None
-    birthday = BirthdayDetails.query.filter_by(number=str(birthday_no)).first() if birthday_no else None
-    alphabet = AlphabetDetails.query.filter_by(letter=str(first_alpha)).first() if first_alpha and first_alpha != '—' else None
-
-    # Missing / repeating numbers
-    missings = results.get('missing_repeat', {}).get('missing', []) or []
-    repeating = results.get('missing_repeat', {}).get('repeating', {}) or {}
-
-    missing_rows = []
-    if missings:
-        for m in missings:
-            row = MissingNumber.query.filter_by(number=str(m)).first()
-            missing_rows.append({
-                "number": str(m),
-                "details": (row.details if row and row.details else "—")
-            })
-
-    repeating_rows = []
-    if repeating:
-        for k, v in repeating.items():  # k is number, v is count
-            row = RepeatingNumber.query.filter_by(number=str(k)).first()
-            repeating_rows.append({
-                "number": str(k),
-                "value": v,
-                "meaning": (row.meaning if row and row.meaning else "—")
-            })
-
-    # Karmic chart + lines
-    karmic = results.get('karmic_chart') or {}
-    pos_codes, neg_codes = _active_lines_from_chart(karmic) 
-
-    pos_lines = []
-    if pos_codes:
-        pos_lines = KarmicLineMeaning.query.filter(
-            KarmicLineMeaning.line_type == 'positive',
-            KarmicLineMeaning.numbers.in_(pos_codes)
-        ).order_by(KarmicLineMeaning.numbers).all()
-
-    neg_lines = []
-    if neg_codes:
-        neg_lines = KarmicLineMeaning.query.filter(
-            KarmicLineMeaning.line_type == 'negative',
-            KarmicLineMeaning.numbers.in_(neg_codes)
-        ).order_by(KarmicLineMeaning.numbers).all()
-
-    return {
-        "life_path_no": life_path_no,
-        "expression_no": expression_no,
-        "soul_urge_no": soul_urge_no,
-        "birthday_no": birthday_no,
-        "first_alpha": first_alpha,
-
-        "life_path": life_path,
-        "life_expression": life_expression,
-        "soul_urge": soul_urge,
-        "birthday": birthday,
-        "alphabet": alphabet,
-
-        "karmic": karmic,
-        "positive_line_rows": pos_lines,
-        "negative_line_rows": neg_lines,
-
-        "missing_rows": missing_rows,
-        "repeating_rows": repeating_rows,
-    }
+def _not_modified(key):
+    response = Response(status=304)
+    response.set_etag(key)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @numerology_bp.route("/report", methods=["GET"])
 def numerology_report_html():
     """HTML preview of the report (nice for quick check / print from browser)."""
-    results = session.get("numerology_results", {}) or {}
-    person = session.get("numerology_input", {}) or {}
-    ctx = _fetch_lookup_details(results)
-    if not ctx:
+    results, person = reading_store.current()
+    if not results:
         return redirect(url_for("numerology.numerology_home"))
 
-    ctx["generated_at"] = datetime.utcnow()
-    ctx["person"] = person
-    return render_template("numerology/report.html", **ctx)
+    # Unchanged report: answer from the ETag alone
+    key, day = report_cache.cache_key(results, person), report_cache.served_on()
+    etag = report_cache.dated_key(key, day)
+    if etag in request.if_none_match:
+        return _not_modified(etag)
+
+    response = Response(reports.report_html(results, person, key, day), mimetype="text/html")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @numerology_bp.route("/report.pdf", methods=["GET"])
 def numerology_report_pdf():
-    """Download as PDF using WeasyPrint (server-side)."""
-    import os
-    import sys
-
-    # Force Windows to see GTK3 runtime path
-    gtk_path = r"C:\Program Files\GTK3-Runtime Win64\bin"
-    if gtk_path not in os.environ["PATH"]:
-        os.environ["PATH"] = gtk_path + os.pathsep + os.environ["PATH"]
-
-    from weasyprint import HTML, CSS
-
-    results = session.get("numerology_results", {}) or {}
-    person = session.get("numerology_input", {}) or {}
-    ctx = _fetch_lookup_details(results)
-    if not ctx:
+    """
+    Serve the PDF from the report cache, or queue it for the worker pool
+    (see utils/report_jobs.py). JSON callers get the job id; browsers go
+    to a page that waits for the file.
+    """
+    results, person = reading_store.current()
+    if not results:
         return redirect(url_for("numerology.numerology_home"))
 
-    ctx["generated_at"] = datetime.utcnow()
-    ctx["person"] = person
-
-    # Render HTML (same template as preview)
-    html_str = render_template("numerology/report.html", **ctx)
-
-    pdf = HTML(string=html_str, base_url=request.host_url).write_pdf()
+    key, day = report_cache.cache_key(results, person), report_cache.served_on()
+    pdf_key = report_cache.dated_key(key, day)  # the PDF shows the date it was generated
     fname = f"Numerology_Report_{person.get('first_name','Client')}_{datetime.utcnow().strftime('%Y%m%d_%H%M')}.pdf"
-    return Response(
-        pdf,
+    cached = report_cache.get(pdf_key, "pdf")
+    if cached:
+        if pdf_key in request.if_none_match:
+            return _not_modified(pdf_key)
+        return _send_pdf(cached, fname, pdf_key)
+
+    # Same report already being rendered: wait for that job instead
+    job = report_jobs.active_job(pdf_key)
+    if job is None:
+        # Render HTML (same template as preview); WeasyPrint runs in a worker
+        html_str = reports.report_html(results, person, key, day)
+        job = report_jobs.enqueue(html_str, request.host_url, fname, cache_key=pdf_key)
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "job_id": job.id,
+            "status_url": url_for("numerology.report_job_status", job_id=job.id),
+        }), 202
+    return redirect(url_for("numerology.report_job", job_id=job.id))
+
+
+def _send_pdf(path, fname, etag):
+    response = send_file(
+        path,
         mimetype="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={fname}"}
-    )
\ No newline at end of file
+        as_attachment=True,
+        download_name=fname,
+        etag=etag,
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@numerology_bp.route("/reports/<job_id>", methods=["GET"])
+def report_job(job_id):
+    """Waits for a queued report and starts the download when it is ready."""
+    job = report_jobs.get_job(job_id) or abort(404)
+    return render_template("numerology/report_job.html", job=job)
+
+
+@numerology_bp.route("/reports/<job_id>/status", methods=["GET"])
+def report_job_status(job_id):
+    job = report_jobs.get_job(job_id) or abort(404)
+    status = report_jobs.job_status(job)
+    if job.status == report_jobs.DONE:
+        status["download_url"] = url_for("numerology.report_job_download", job_id=job.id)
+    return jsonify(status)
+
+
+@numerology_bp.route("/reports/<job_id>/download", methods=["GET"])
+def report_job_download(job_id):
+    job = report_jobs.get_job(job_id) or abort(404)
+    if job.status != report_jobs.DONE:
+        return jsonify(report_jobs.job_status(job)), 409
+    path = report_jobs.pdf_path(job.id)
+    if job.cache_key:
+        # later downloads of this report skip the queue
+        if report_cache.get(job.cache_key, "pdf") is None:
+            report_cache.put_file(job.cache_key, "pdf", path)
+        return _send_pdf(path, job.filename, job.cache_key)
+    return _send_pdf(path, job.filename, job.id)
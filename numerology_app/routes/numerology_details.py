@@ -1,16 +1,12 @@
-from flask import Blueprint, flash, redirect, render_template, session, url_for
+from flask import Blueprint, current_app, flash, redirect, render_template, session, url_for
 from numerology_app.models import (
-    LifePath,
-    LifeExpression,
-    SoulUrge,
-    BirthdayDetails,
-    AlphabetDetails,
     RepeatingNumber,
     MissingNumber,
     LuckyDayMeaning,
     LuckyYearMonthMeaning
 )
-from datetime import datetime
+from numerology_app.utils import daily_luck, lookups, reading_store, readings
+from datetime import date
 import re # Added import
 
 numerology_details_bp = Blueprint(
@@ -25,12 +21,13 @@ def require_login():
         return redirect(url_for("auth.login"))
 
 # ----------------------------------------------
-# Utility function: get stored session results
+# Utility function: get the session's stored reading
 # ----------------------------------------------
-def get_results():
-    results = session.get("numerology_results")
+def get_results(*sections):
+    """The session's results, decoding only `sections` (see reading_store)."""
+    results, _ = reading_store.current(*sections)
     if not results:
-        print("⚠️ No results found in session.")
+        current_app.logger.debug("No stored reading for this session.")
     return results
 
 
@@ -39,7 +36,7 @@ def get_results():
 # ----------------------------------------------
 @numerology_details_bp.route("/life-path/<int:number>")
 def life_path_detail(number):
-    data = LifePath.query.filter_by(number=str(number)).first()
+    data = lookups.get_snapshot().life_path.get(str(number))
     return render_template("numerology/details/life_path.html", number=number, data=data)
 
 
@@ -48,7 +45,7 @@ def life_path_detail(number):
 # ----------------------------------------------
 @numerology_details_bp.route("/life-expression/<int:number>")
 def life_expression_detail(number):
-    data = LifeExpression.query.filter_by(number=str(number)).first()
+    data = lookups.get_snapshot().life_expression.get(str(number))
     return render_template("numerology/details/life_expression.html", number=number, data=data)
 
 
@@ -57,7 +54,7 @@ def life_expression_detail(number):
 # ----------------------------------------------
 @numerology_details_bp.route("/soul-urge/<int:number>")
 def soul_urge_detail(number):
-    data = SoulUrge.query.filter_by(number=str(number)).first()
+    data = lookups.get_snapshot().soul_urge.get(str(number))
     return render_template("numerology/details/soul_urge.html", number=number, data=data)
 
 
@@ -66,7 +63,7 @@ def soul_urge_detail(number):
 # ----------------------------------------------
 @numerology_details_bp.route("/birthday/<int:number>")
 def birthday_detail(number):
-    data = BirthdayDetails.query.filter_by(number=str(number)).first()
+    data = lookups.get_snapshot().birthday.get(str(number))
     return render_template("numerology/details/birthday.html", number=number, data=data)
 
 
@@ -75,7 +72,7 @@ def birthday_detail(number):
 # ----------------------------------------------
 @numerology_details_bp.route("/alphabet/<string:letter>")
 def alphabet_detail(letter):
-    data = AlphabetDetails.query.filter_by(letter=letter.upper()).first()
+    data = lookups.get_snapshot().alphabet.get(letter.upper())
     return render_template("numerology/details/alphabet.html", letter=letter.upper(), data=data)
 
 
@@ -84,7 +81,7 @@ def alphabet_detail(letter):
 # ----------------------------------------------
 @numerology_details_bp.route("/repeating")
 def repeating_detail():
-    results = get_results()
+    results = get_results("missing_repeat")
     if not results:
         return render_template("numerology/details/repeating.html", repeated_data=None)
 
@@ -92,20 +89,26 @@ def repeating_detail():
     if not repeating_dict:
         return render_template("numerology/details/repeating.html", repeated_data=None)
 
-    template_data = {}
-
+    counts = {}
     for number, count in repeating_dict.items():
         try:
-            num_int = int(number)
-            rep_count = int(count)
+            counts[int(number)] = int(count)
         except ValueError:
             continue 
 
-        meanings = RepeatingNumber.query.filter(
-            RepeatingNumber.number == num_int,
-            RepeatingNumber.repetitions <= rep_count
-        ).order_by(RepeatingNumber.repetitions).all()
-        
+    # One query for every repeated digit, grouped by number in Python
+    meanings_by_number = {}
+    if counts:
+        rows = RepeatingNumber.query.filter(
+            RepeatingNumber.number.in_(list(counts))
+        ).order_by(RepeatingNumber.number, RepeatingNumber.repetitions).all()
+        for row in rows:
+            if row.repetitions <= counts[row.number]:
+                meanings_by_number.setdefault(row.number, []).append(row)
+
+    template_data = {}
+    for num_int, rep_count in counts.items():
+        meanings = meanings_by_number.get(num_int)
         if meanings:
             template_data[num_int] = {
                 'count': rep_count,
@@ -121,7 +124,7 @@ def repeating_detail():
 # ----------------------------------------------
 @numerology_details_bp.route("/missing")
 def missing_detail():
-    results = get_results()
+    results = get_results("missing_repeat")
     if not results:
         return render_template("numerology/details/missing.html", missing_numbers=None)
 
@@ -130,8 +133,8 @@ def missing_detail():
         return render_template("numerology/details/missing.html", missing_numbers=None)
 
     missing_numbers = MissingNumber.query.filter(
-        MissingNumber.number.in_([str(m) for m in missing_list])
-    ).order_by(MissingNumber.number).all()
+        MissingNumber.number_key.in_([int(m) for m in missing_list])
+    ).order_by(MissingNumber.number_key).all()
 
     return render_template("numerology/details/missing.html", missing_numbers=missing_numbers)
 
@@ -142,7 +145,7 @@ def missing_detail():
 def karmic_lines_detail():
     from numerology_app.models import KarmicLineMeaning
 
-    results = get_results()
+    results = get_results("karmic_chart")
     if not results or 'karmic_chart' not in results:
         flash("Please generate a report first...", "error")
         return redirect(url_for('numerology.numerology_home'))
@@ -180,28 +183,35 @@ def karmic_lines_detail():
 @numerology_details_bp.route("/future-predictions")
 def future_prediction_detail():
     """
-    Displays all three future prediction meanings on one page.
+    Displays all three future prediction meanings on one page, for today
+    (the stored reading may be from another day).
     """
-    results = get_results() # Get calculations from the session
-    if not results or 'future_prediction' not in results:
+    _, person = reading_store.current("future_prediction")
+    if not person:
         flash("Please generate a report first.", "error")
         return redirect(url_for('numerology.numerology_home'))
 
-    predictions = results['future_prediction']
+    today = date.today()
+    predictions = daily_luck.for_person(person["first_name"], readings.normalize_dob(person["dob"]), today)
     lucky_year_num = predictions.get('lucky_year')
     lucky_month_num = predictions.get('lucky_month')
     lucky_day_num = predictions.get('lucky_day')
 
-    # Fetch all meanings from the database
+    # Fetch all meanings from the database: one query per table
+    year_month_rows = {}
+    for row in LuckyYearMonthMeaning.query.filter(
+        LuckyYearMonthMeaning.number_key.in_([int(lucky_year_num), int(lucky_month_num)])
+    ).order_by(LuckyYearMonthMeaning.id):
+        year_month_rows.setdefault(row.number_key, row)
     meanings = {
-        'year': LuckyYearMonthMeaning.query.filter_by(number=str(lucky_year_num)).first(),
-        'month': LuckyYearMonthMeaning.query.filter_by(number=str(lucky_month_num)).first(),
-        'day': LuckyDayMeaning.query.filter_by(number=str(lucky_day_num)).first()
+        'year': year_month_rows.get(int(lucky_year_num)),
+        'month': year_month_rows.get(int(lucky_month_num)),
+        'day': LuckyDayMeaning.query.filter_by(number_key=int(lucky_day_num)).first()
     }
 
     return render_template(
         "numerology/details/future_prediction.html",
         predictions=predictions,
         meanings=meanings,
-        today_date=datetime.now().strftime("%d %B %Y")
+        today_date=today.strftime("%d %B %Y")
     )
\ No newline at end of file
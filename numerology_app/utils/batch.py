@@ -0,0 +1,305 @@
+"""
+Vectorized versions of the date-based calculations in utils/numerology.py.
+
+Every function here takes integer year/month/day columns (or a datetime64
+array via split_dates) and returns NumPy column arrays instead of one dict
+per DOB. The results are identical to the scalar functions for every
+zero-padded "YYYY-MM-DD" date; see verify_against_scalar().
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from numerology_app.utils import numerology
+
+# Karmic lines in the same order as numerology.karmic_chart_and_lines().
+# Bit i of a line mask refers to KARMIC_LINES[i].
+KARMIC_LINES = [
+    ("Physical Line (1-4-7)", (1, 4, 7)),
+    ("Emotional Line (2-5-8)", (2, 5, 8)),
+    ("Mental Line (3-6-9)", (3, 6, 9)),
+    ("Creativity Line (1-2-3)", (1, 2, 3)),
+    ("Willpower Line (4-5-6)", (4, 5, 6)),
+    ("Intellect Line (7-8-9)", (7, 8, 9)),
+    ("Determination Line (1-5-9)", (1, 5, 9)),
+    ("Passion Line (3-5-7)", (3, 5, 7)),
+]
+
+
+# -------------------
+# Helper Functions
+# -------------------
+def split_dates(dobs):
+    """
+    Split an array of dates into int year, month and day columns.
+    Accepts datetime64 values or "YYYY-MM-DD" strings.
+    """
+    dobs = np.asarray(dobs, dtype="datetime64[D]")
+    years = dobs.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = dobs.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    days = (dobs - dobs.astype("datetime64[M]")).astype(np.int64) + 1
+    return years, months, days
+
+
+def _digit_sum(values):
+    """Sum of decimal digits for every element of a non-negative int array."""
+    values = np.array(values, dtype=np.int64)
+    total = np.zeros_like(values)
+    while values.any():
+        total += values % 10
+        values //= 10
+    return total
+
+
+def reduce_array(values, masters=(11, 22, 33)):
+    """
+    Array version of reduce_to_single_digit(): repeatedly sum digits of
+    every element above 9 that is not one of `masters`.
+    """
+    values = np.array(values, dtype=np.int64)
+    while True:
+        todo = (values > 9) & ~np.isin(values, masters)
+        if not todo.any():
+            return values
+        values = np.where(todo, _digit_sum(values), values)
+
+
+def _date_digits(years, months, days):
+    """The eight digits of the zero-padded "YYYY-MM-DD" string, as columns."""
+    return [
+        years // 1000 % 10, years // 100 % 10, years // 10 % 10, years % 10,
+        months // 10 % 10, months % 10,
+        days // 10 % 10, days % 10,
+    ]
+
+
+def _as_columns(years, months, days):
+    return (
+        np.asarray(years, dtype=np.int64),
+        np.asarray(months, dtype=np.int64),
+        np.asarray(days, dtype=np.int64),
+    )
+
+
+# -------------------
+# Main Calculations
+# -------------------
+def life_path(years, months, days):
+    """Array version of numerology.life_path()."""
+    years, months, days = _as_columns(years, months, days)
+    total = reduce_array(days) + reduce_array(months) + reduce_array(_digit_sum(years))
+    return reduce_array(total, masters=())
+
+
+def birthday_number(years, months, days):
+    """Array version of numerology.birthday_number()."""
+    _, _, days = _as_columns(years, months, days)
+    return reduce_array(days)
+
+
+def digit_counts(years, months, days):
+    """
+    (n, 10) array with the count of every digit 0-9 in the DOB string.
+    Row i is numerology.repeating_numbers() for date i, zeros included.
+    """
+    years, months, days = _as_columns(years, months, days)
+    n = years.shape[0]
+    offsets = np.arange(n) * 10
+    flat = np.concatenate([offsets + digit for digit in _date_digits(years, months, days)])
+    return np.bincount(flat, minlength=n * 10).reshape(n, 10)
+
+
+def missing_mask(years, months, days):
+    """
+    Array version of numerology.missing_numbers() as a 9-bit mask.
+    Bit n-1 is set when number n (1-9) is missing.
+    """
+    years, months, days = _as_columns(years, months, days)
+    digits = _date_digits(years, months, days)
+
+    def mark(num):
+        # remove_if_missing() only ever touches numbers 1-9
+        in_range = (num >= 1) & (num <= 9)
+        return np.where(in_range, np.left_shift(1, np.clip(num - 1, 0, 8)), 0)
+
+    present = np.zeros_like(years)
+    for digit in digits:
+        present |= mark(digit)
+
+    # DAY and MONTH grouped sums: a single digit sum, no master rule
+    for first, second in ((digits[6], digits[7]), (digits[4], digits[5])):
+        present |= mark(first)
+        total = first + second
+        present |= mark(np.where(total <= 9, total, _digit_sum(total)))
+
+    # YEAR grouped sums, reduced with the master rule
+    total = np.zeros_like(years)
+    for digit in digits[:4]:
+        total = total + digit
+        present |= mark(reduce_array(total))
+
+    # LIFE PATH removal
+    lp = reduce_array(
+        reduce_array(digits[6] + digits[7])
+        + reduce_array(digits[4] + digits[5])
+        + reduce_array(_digit_sum(years))
+    )
+    present |= mark(lp)
+
+    return ~present & 0x1FF
+
+
+def karmic_chart(years, months, days):
+    """(n, 9) array of the Karmic Chart counts for numbers 1-9."""
+    return digit_counts(years, months, days)[:, 1:]
+
+
+def karmic_line_masks(years, months, days):
+    """
+    Positive and negative karmic lines as 8-bit masks over KARMIC_LINES.
+    Returns (positive_mask, negative_mask).
+    """
+    chart = karmic_chart(years, months, days) > 0
+    positive = np.zeros(chart.shape[0], dtype=np.int64)
+    negative = np.zeros(chart.shape[0], dtype=np.int64)
+    for bit, (_, nums) in enumerate(KARMIC_LINES):
+        trio = chart[:, [n - 1 for n in nums]]
+        positive |= np.where(trio.all(axis=1), 1 << bit, 0)
+        negative |= np.where(~trio.any(axis=1), 1 << bit, 0)
+    return positive, negative
+
+
+def future_predictions(years, months, days, today=None):
+    """
+    Array version of numerology.future_predictions().
+    `today` defaults to datetime.now(), like the scalar helpers.
+    Returns (lucky_year, lucky_month, lucky_day).
+    """
+    years, months, days = _as_columns(years, months, days)
+    today = today or datetime.now()
+    masters = (11, 22)
+
+    lucky_year = reduce_array(
+        reduce_array(_digit_sum(days), masters) + reduce_array(_digit_sum(months), masters),
+        masters,
+    )
+    lucky_month = reduce_array(lucky_year + reduce_array(today.month, masters), masters)
+
+    today_sum = sum(int(d) for d in today.strftime("%d%m%Y"))
+    dob_sum = _digit_sum(years) + _digit_sum(months) + _digit_sum(days)
+    lucky_day = reduce_array(dob_sum + today_sum, masters)
+    return lucky_year, lucky_month, lucky_day
+
+
+def lucky_timeline(years, months, days, dates):
+    """
+    future_predictions() for every DOB on every date of `dates` (datetime64
+    values or "YYYY-MM-DD" strings) in one pass. Returns (lucky_year [n],
+    lucky_month [n, len(dates)], lucky_day [n, len(dates)]) as int8 arrays.
+    """
+    years, months, days = _as_columns(years, months, days)
+    date_years, date_months, date_days = split_dates(dates)
+    masters = (11, 22)
+
+    lucky_year = reduce_array(
+        reduce_array(_digit_sum(days), masters) + reduce_array(_digit_sum(months), masters),
+        masters,
+    )
+    dob_sums = _digit_sum(years) + _digit_sum(months) + _digit_sum(days)
+    date_sums = _digit_sum(date_years) + _digit_sum(date_months) + _digit_sum(date_days)
+    # Every sum below is small (a lucky month is at most 22 + 11): reduce
+    # each possible value once, then index
+    largest = max(int(dob_sums.max(initial=0) + date_sums.max(initial=0)), 33)
+    reduced = reduce_array(np.arange(largest + 1), masters).astype(np.int8)
+
+    lucky_month = reduced[lucky_year[:, None] + reduced[date_months][None, :]]
+    lucky_day = reduced[dob_sums[:, None] + date_sums[None, :]]
+    return lucky_year.astype(np.int8), lucky_month, lucky_day
+
+
+def compute(years, months, days, today=None):
+    """
+    Run every date-based calculation over the given columns.
+    Returns a dict of column arrays, one entry per DOB.
+    """
+    years, months, days = _as_columns(years, months, days)
+    positive, negative = karmic_line_masks(years, months, days)
+    lucky_year, lucky_month, lucky_day = future_predictions(years, months, days, today)
+    return {
+        "life_path": life_path(years, months, days),
+        "birthday": birthday_number(years, months, days),
+        "digit_counts": digit_counts(years, months, days),
+        "missing_mask": missing_mask(years, months, days),
+        "positive_lines": positive,
+        "negative_lines": negative,
+        "lucky_year": lucky_year,
+        "lucky_month": lucky_month,
+        "lucky_day": lucky_day,
+    }
+
+
+def compute_dates(dobs, today=None):
+    """compute() for an array of datetime64 values or "YYYY-MM-DD" strings."""
+    return compute(*split_dates(dobs), today=today)
+
+
+# -------------------
+# Mask Decoding
+# -------------------
+def mask_to_numbers(mask: int) -> list[int]:
+    """Decode a missing-number mask into the list missing_numbers() returns."""
+    return [n for n in range(1, 10) if mask >> (n - 1) & 1]
+
+
+def mask_to_lines(mask: int) -> list[str]:
+    """Decode a karmic line mask into the line names."""
+    return [name for bit, (name, _) in enumerate(KARMIC_LINES) if mask >> bit & 1]
+
+
+# -------------------
+# Verification
+# -------------------
+def verify_against_scalar(start=date(1900, 1, 1), end=date(2100, 12, 31)):
+    """
+    Compare compute() with the scalar functions for every date in
+    [start, end]. Returns a list of (dob, field) mismatches.
+    """
+    today = datetime.now()
+    count = (end - start).days + 1
+    dobs = np.arange(np.datetime64(start), np.datetime64(start) + count)
+    columns = compute_dates(dobs, today=today)
+
+    mismatches = []
+    for i in range(count):
+        dob = (start + timedelta(days=i)).isoformat()
+        karmic = numerology.karmic_chart_and_lines(dob)
+        future = numerology.future_predictions(dob, today)
+        repeating = {d: int(c) for d, c in enumerate(columns["digit_counts"][i]) if c}
+        expected = {
+            "life_path": numerology.life_path(dob),
+            "birthday": numerology.birthday_number(dob),
+            "repeating": numerology.repeating_numbers(dob),
+            "missing": numerology.missing_numbers(dob),
+            "chart": karmic["chart"],
+            "positive_lines": karmic["positive_lines"],
+            "negative_lines": karmic["negative_lines"],
+            "lucky_year": future["lucky_year"],
+            "lucky_month": future["lucky_month"],
+            "lucky_day": future["lucky_day"],
+        }
+        actual = {
+            "life_path": int(columns["life_path"][i]),
+            "birthday": int(columns["birthday"][i]),
+            "repeating": repeating,
+            "missing": mask_to_numbers(int(columns["missing_mask"][i])),
+            "chart": {n: int(columns["digit_counts"][i][n]) for n in range(1, 10)},
+            "positive_lines": mask_to_lines(int(columns["positive_lines"][i])),
+            "negative_lines": mask_to_lines(int(columns["negative_lines"][i])),
+            "lucky_year": int(columns["lucky_year"][i]),
+            "lucky_month": int(columns["lucky_month"][i]),
+            "lucky_day": int(columns["lucky_day"][i]),
+        }
+        for field, value in expected.items():
+            if actual[field] != value:
+                mismatches.append((dob, field))
+    return mismatches
@@ -0,0 +1,283 @@
+"""
+Benchmark suite for the numerology engine and the main routes.
+
+run() times the scalar functions in utils/numerology.py on a seeded
+corpus of realistic names and DOBs, then the main routes through the
+Flask test client on databases of 1k, 100k and 1M synthetic clients.
+The result is a JSON-able dict; compare() lines two of them up (e.g. the
+output of two commits) by median latency.
+
+Seeded databases are built once, through client_import (so they hold
+stamped results and matching profiles like real data), and kept in
+instance/bench/clients-<n>/. Every run works on a scratch copy, so the
+clients the POST routes insert do not leak into the next run.
+"""
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.engine import make_url
+
+from numerology_app.extensions import db
+from numerology_app.utils import numerology
+
+BENCH_DIR = "bench"  # inside the instance folder
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Bhavna", "Chirag", "Deepa", "Dev", "Diya",
+    "Gaurav", "Harsh", "Isha", "Jalpa", "Kalp", "Kavya", "Kiran", "Krish", "Meera", "Mihir",
+    "Nandini", "Neha", "Nihar", "Nirmal", "Pooja", "Pranav", "Priya", "Rahul", "Riya", "Rohan",
+    "Saanvi", "Sameer", "Shreya", "Tanay", "Tithi", "Ujjval", "Vihaan", "Yash", "Zara", "Het",
+    "Ada", "Alexander", "Amelia", "Benjamin", "Charlotte", "Chloe", "Daniel", "Elizabeth",
+    "Emma", "Ethan", "Grace", "Hannah", "Isabella", "Jack", "James", "Leo", "Lily", "Lucas",
+    "Maya", "Mia", "Noah", "Oliver", "Olivia", "Sophia", "Thomas", "William", "Yusuf", "Zoe",
+    "Ahmed", "Aisha", "Fatima", "Hassan", "Layla", "Omar", "Hiro", "Mei", "Sakura", "Wei",
+]
+MIDDLE_NAMES = ["Kumar", "Rani", "Devi", "Lal", "Marie", "Anne", "James", "Rose", "Lee", "Prakash"]
+LAST_NAMES = [
+    "Patel", "Shah", "Mody", "Thakar", "Prajapati", "Ruparelia", "Mehta", "Desai", "Joshi",
+    "Iyer", "Sharma", "Gupta", "Reddy", "Nair", "Kapoor", "Chatterjee", "Smith", "Johnson",
+    "Williams", "Brown", "Garcia", "Martinez", "Anderson", "Thompson", "O'Connor",
+    "Fitzgerald-Hughes", "Van der Berg", "Nakamura", "Khan", "Al-Sayed",
+]
+FIRST_DOB, LAST_DOB = date(1940, 1, 1), date(2015, 12, 31)
+
+
+# -------------------
+# Corpora
+# -------------------
+def people(n, seed=1):
+    """
+    `n` (first, middle, last, "YYYY-MM-DD") tuples: common first and last
+    names from several cultures, a middle name for about a third, and
+    DOBs spread evenly over 1940-2015.
+    """
+    rng = random.Random(seed)
+    span = (LAST_DOB - FIRST_DOB).days
+    return [
+        (
+            rng.choice(FIRST_NAMES),
+            rng.choice(MIDDLE_NAMES) if rng.random() < 0.35 else "",
+            rng.choice(LAST_NAMES),
+            (FIRST_DOB + timedelta(days=rng.randint(0, span))).isoformat(),
+        )
+        for _ in range(n)
+    ]
+
+
+def _stats(seconds, unit):
+    """Latency summary of a list of timings, in `unit` ("us" or "ms")."""
+    scale = 1e6 if unit == "us" else 1e3
+    ordered = sorted(s * scale for s in seconds)
+    return {
+        "count": len(ordered),
+        f"mean_{unit}": statistics.fmean(ordered),
+        f"p50_{unit}": statistics.median(ordered),
+        f"p95_{unit}": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        f"max_{unit}": ordered[-1],
+    }
+
+
+def _time_each(fn, args_list):
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+# -------------------
+# Scalar Functions
+# -------------------
+def bench_functions(calls=5000, seed=1):
+    """Per-call latency of the scalar numerology functions over `calls` people."""
+    corpus = people(calls, seed)
+    full_names = [(" ".join(p for p in person[:3] if p),) for person in corpus]
+    dobs = [(person[3],) for person in corpus]
+    mapping = numerology.PYTHAGOREAN_MAPPING
+    cases = {
+        "life_path": (numerology.life_path, dobs),
+        "expression_number": (numerology.expression_number, [(name, mapping) for (name,) in full_names]),
+        "soul_urge": (numerology.soul_urge, full_names),
+        "missing_numbers": (numerology.missing_numbers, dobs),
+        "karmic_chart_and_lines": (numerology.karmic_chart_and_lines, dobs),
+        "future_predictions": (numerology.future_predictions, dobs),
+    }
+    return {name: _stats(_time_each(fn, args), "us") for name, (fn, args) in cases.items()}
+
+
+# -------------------
+# Seeded Databases
+# -------------------
+def _seed_dir(clients):
+    return os.path.join(current_app.instance_path, BENCH_DIR, f"clients-{clients}")
+
+
+def _source_database():
+    url = make_url(current_app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise RuntimeError("Benchmarks copy the lookup tables from a SQLite database file.")
+    return url.database
+
+
+def seed_database(clients, reseed=False, progress=None):
+    """
+    Path of a database with the lookup tables and `clients` synthetic
+    clients, building it on first use (or with reseed=True).
+    """
+    from numerology_app import create_app
+    from numerology_app.utils import client_import
+
+    directory = _seed_dir(clients)
+    path = os.path.join(directory, "numerology.db")
+    if os.path.exists(path) and not reseed:
+        return path
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+    # Current schema and lookup tables, without the real clients
+    with sqlite3.connect(_source_database()) as source, sqlite3.connect(path) as target:
+        source.backup(target)
+        for table in ("clients", "report_jobs", "daily_luck"):
+            target.execute(f"DELETE FROM {table}")
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    app.instance_path = directory
+    inserted, seed = 0, 100
+    with app.app_context():
+        while inserted < clients:  # common names collide on (first_name, dob)
+            records = (
+                {"first_name": first, "middle_name": middle, "last_name": last, "dob": dob}
+                for first, middle, last, dob in people(clients - inserted, seed)
+            )
+            inserted += client_import.import_clients(records, batch_size=5000, commit_every=50_000)["inserted"]
+            seed += 1
+            if progress:
+                progress(inserted, clients)
+        db.session.execute(db.text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        db.engine.dispose()
+    return path
+
+
+# -------------------
+# Routes
+# -------------------
+def bench_routes(database_path, requests=50, seed=2):
+    """
+    Request latency of the main routes on a scratch copy of `database_path`,
+    after one warm-up request each. Every numerology request is for a new
+    person, so the POST inserts a client and the report is never cached.
+    """
+    from numerology_app import create_app
+
+    workdir = tempfile.mkdtemp(prefix="numerology-bench-")
+    try:
+        path = os.path.join(workdir, "numerology.db")
+        with sqlite3.connect(database_path) as source, sqlite3.connect(path) as target:
+            source.backup(target)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+        app.instance_path = workdir
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user"] = "bench"
+
+        corpus = people(2 * (requests + 1), seed)
+        timings = {}
+
+        def timed(name, method, url, **kwargs):
+            started = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {url} returned {response.status_code}")
+            timings.setdefault(name, []).append(elapsed)
+
+        for i in range(requests + 1):
+            (first, middle, last, dob), other = corpus[2 * i], corpus[2 * i + 1]
+            year, month, day = dob.split("-")
+            timed("POST /numerology/", "POST", "/numerology/", data={
+                "first_name": f"{first}{i}", "middle_name": middle, "last_name": last,
+                "dob": f"{day} {month} {year}",
+            })
+            timed("GET /numerology/report", "GET", "/numerology/report")
+            timed("POST /matchmaking/", "POST", "/matchmaking/", data={
+                "p1_name": first, "p1_dob": dob, "p2_name": other[0], "p2_dob": other[3],
+            })
+            timed("GET /clients/", "GET", "/clients/")
+            timed("GET /clients/search", "GET", f"/clients/search?q={first[:3]}")
+        with app.app_context():
+            db.engine.dispose()
+        return {name: _stats(values[1:], "ms") for name, values in timings.items()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# -------------------
+# Suite
+# -------------------
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=current_app.root_path, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, calls=5000, requests=50, reseed=False, progress=None):
+    """The whole suite as a JSON-able dict. `progress` gets status lines."""
+    say = progress or (lambda message: None)
+    result = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "calls": calls,
+            "requests": requests,
+        },
+    }
+    say(f"Scalar functions ({calls:,} calls each)...")
+    result["functions"] = bench_functions(calls)
+    result["routes"] = {}
+    for size in sizes:
+        say(f"Seeding {size:,} clients...")
+        started = time.perf_counter()
+        path = seed_database(size, reseed, progress=lambda done, total: say(f"  {done:,} / {total:,}"))
+        say(f"Routes on {size:,} clients ({requests} requests each)...")
+        result["routes"][str(size)] = {
+            "seed_s": time.perf_counter() - started,
+            **bench_routes(path, requests),
+        }
+    return result
+
+
+def _medians(result):
+    """{"functions.life_path": p50, "routes.1000.GET /clients/": p50, ...}"""
+    medians = {f"functions.{name}": stats["p50_us"] for name, stats in result.get("functions", {}).items()}
+    for size, routes in result.get("routes", {}).items():
+        for name, stats in routes.items():
+            if isinstance(stats, dict):
+                medians[f"routes.{size}.{name}"] = stats["p50_ms"]
+    return medians
+
+
+def compare(old, new):
+    """(benchmark, old median, new median, new / old) for benchmarks in both runs."""
+    old_medians, new_medians = _medians(old), _medians(new)
+    return [
+        (name, old_medians[name], value, value / old_medians[name] if old_medians[name] else None)
+        for name, value in new_medians.items()
+        if name in old_medians
+    ]
@@ -0,0 +1,250 @@
+"""
+Bulk report export: one ZIP with the PDF report of every selected client.
+
+The report HTML is rendered here (Jinja is fast); the PDFs are rendered on
+a pool of WeasyPrint workers (report_jobs.new_executor), with at most
+IN_FLIGHT_PER_WORKER reports per worker queued at a time. Each PDF is added
+to the ZIP as soon as it finishes and the archive is yielded in chunks as
+it is written, so memory stays bounded by the in-flight reports, however
+many clients are selected. Reports already in the report cache are added
+without rendering, and new ones are stored there.
+
+Progress of a web export lives in instance/exports/<export id>.json, which
+the progress endpoint reads from any worker.
+"""
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+
+from flask import current_app
+
+from numerology_app.extensions import db
+from numerology_app.models import Client
+from numerology_app.utils import client_listing, readings, report_cache, report_jobs, reports
+
+EXPORTS_DIR = "exports"  # inside the instance folder
+MAX_CLIENTS = 2000
+IN_FLIGHT_PER_WORKER = 2
+COPY_CHUNK = 256 * 1024
+
+
+# -------------------
+# Selection
+# -------------------
+def select_client_ids(ids=None, q=None, created_from=None, created_to=None, limit=MAX_CLIENTS):
+    """
+    Ids of the clients to export, in id order: the given ids, narrowed by
+    a name search (as in the client list) and a created_at date range.
+    Clients without a valid DOB have no report and are left out.
+    """
+    query = db.select(Client.id, Client.dob)
+    if ids is not None:
+        query = query.where(Client.id.in_(ids))
+    if q and q.strip():
+        query = query.where(client_listing.name_condition(q))
+    if created_from:
+        query = query.where(Client.created_at >= datetime.combine(created_from, datetime.min.time()))
+    if created_to:
+        query = query.where(Client.created_at <= datetime.combine(created_to, datetime.max.time()))
+    rows = db.session.execute(query.order_by(Client.id)).all()
+    return [row.id for row in rows if readings.is_valid_dob(row.dob)][:limit]
+
+
+def _filename(client):
+    name = "_".join(p for p in (client.first_name, client.last_name) if p)
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "Client"
+    return f"Numerology_Report_{name}_{client.id}.pdf"
+
+
+# -------------------
+# Progress
+# -------------------
+def _progress_path(export_id):
+    return os.path.join(current_app.instance_path, EXPORTS_DIR, f"{export_id}.json")
+
+
+def _save_progress(export_id, progress):
+    path = _progress_path(export_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+
+def start_export(client_ids):
+    """Record a new export of `client_ids`; returns its id."""
+    export_id = uuid.uuid4().hex
+    _save_progress(export_id, {
+        "client_ids": client_ids,
+        "total": len(client_ids),
+        "done": 0,
+        "failed": [],
+        "files": [],
+        "finished": False,
+        "started_at": None,
+    })
+    return export_id
+
+
+def load_progress(export_id):
+    """The progress dict of an export, or None for an unknown id."""
+    if not re.fullmatch(r"[0-9a-f]{32}", export_id or ""):
+        return None
+    try:
+        with open(_progress_path(export_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def progress_recorder(export_id):
+    """A zip_reports() progress callback that keeps the export's file current."""
+    progress = load_progress(export_id)
+    progress["started_at"] = time.time()
+    _save_progress(export_id, progress)
+
+    def record(client_id, filename, error, done, total):
+        progress["done"] = done
+        if error:
+            progress["failed"].append({"id": client_id, "error": error})
+        else:
+            progress["files"].append(filename)
+        progress["finished"] = done == total
+        _save_progress(export_id, progress)
+
+    return record
+
+
+def purge_exports(max_age_s=24 * 3600):
+    """Delete progress files older than max_age_s."""
+    directory = os.path.join(current_app.instance_path, EXPORTS_DIR)
+    cutoff = time.time() - max_age_s
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for entry in entries:
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+# -------------------
+# ZIP Streaming
+# -------------------
+class _Sink:
+    """Write-only file object that zipfile writes into and we drain."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Everything written since the last drain, as zero or one chunk."""
+        if self.chunks:
+            data = b"".join(self.chunks)
+            self.chunks.clear()
+            yield data
+
+
+def _add_file(archive, name, path):
+    with open(path, "rb") as source, archive.open(name, "w") as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK)
+
+
+def zip_reports(client_ids, base_url, workers=None, progress=None):
+    """
+    Yield the ZIP archive of the reports of `client_ids` in chunks, adding
+    each PDF as it finishes. `progress` is called after every client with
+    (client_id, filename, error, done, total). Clients whose report fails
+    are listed in errors.txt at the end of the archive.
+    """
+    workers = workers or current_app.config["REPORT_WORKERS"]
+    workdir = os.path.join(current_app.instance_path, EXPORTS_DIR, uuid.uuid4().hex)
+    os.makedirs(workdir)
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED)  # PDFs are compressed already
+    executor = report_jobs.new_executor(workers)
+    total, done, errors = len(client_ids), 0, []
+    pending = {}  # future -> (client_id, filename, cache key, tmp path)
+    remaining = iter(client_ids)
+    day = report_cache.served_on()  # one date on every report of the archive
+
+    def finish(client_id, filename, error):
+        nonlocal done
+        done += 1
+        if error:
+            errors.append(f"{client_id}\t{filename}\t{error}")
+        if progress:
+            progress(client_id, filename, error, done, total)
+
+    def submit_next():
+        # add cached reports straight away; stop once one report is queued
+        for client_id in remaining:
+            client = db.session.get(Client, client_id)
+            if client is None or not readings.is_valid_dob(client.dob):
+                finish(client_id, None, "client not found or has no valid DOB")
+                continue
+            results = readings.client_results(client)
+            db.session.commit()  # client_results() may have refreshed stale results
+            person = reports.client_person(client)
+            key = report_cache.cache_key(results, person)
+            pdf_key = report_cache.dated_key(key, day)
+            filename = _filename(client)
+            cached = report_cache.get(pdf_key, "pdf")
+            if cached:
+                try:
+                    _add_file(archive, filename, cached)
+                except FileNotFoundError:  # evicted in between: render it
+                    pass
+                else:
+                    finish(client_id, filename, None)
+                    return True
+            html = reports.report_html(results, person, key, day)
+            tmp_path = os.path.join(workdir, f"{client_id}.pdf")
+            future = executor.submit(report_jobs.render_file, html, base_url, tmp_path)
+            pending[future] = (client_id, filename, pdf_key, tmp_path)
+            return True
+        return False
+
+    try:
+        while len(pending) < workers * IN_FLIGHT_PER_WORKER and submit_next():
+            yield from sink.drain()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                client_id, filename, key, tmp_path = pending.pop(future)
+                try:
+                    future.result()
+                except Exception as exc:
+                    finish(client_id, filename, str(exc).strip().splitlines()[-1] if str(exc).strip() else repr(exc))
+                    continue
+                _add_file(archive, filename, tmp_path)
+                report_cache.put_file(key, "pdf", tmp_path)
+                os.remove(tmp_path)
+                finish(client_id, filename, None)
+                yield from sink.drain()
+            while len(pending) < workers * IN_FLIGHT_PER_WORKER and submit_next():
+                yield from sink.drain()
+        if errors:
+            archive.writestr("errors.txt", "client_id\tfile\terror\n" + "\n".join(errors) + "\n")
+        archive.close()
+        yield from sink.drain()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(workdir, ignore_errors=True)
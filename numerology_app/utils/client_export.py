@@ -0,0 +1,120 @@
+"""
+Streaming export of clients with their computed numbers.
+
+Rows are read with yield_per (a server-side cursor where the driver
+supports it), scored one batch at a time with the batch engines and
+written out as CSV or NDJSON by generators, so memory stays flat and the
+first bytes go out before the last row is read.
+"""
+import csv
+import io
+import json
+
+from numerology_app.extensions import db
+from numerology_app.models import Client
+from numerology_app.utils import readings
+
+COLUMNS = [
+    "id", "first_name", "middle_name", "last_name", "dob",
+    "life_path", "expression", "soul_urge", "birthday",
+    "missing", "repeating", "positive_lines", "negative_lines",
+]
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+CHUNK_SIZE = 64 * 1024
+
+
+def _numbers(result):
+    if result is None:
+        return dict.fromkeys(COLUMNS[5:])
+    return {
+        "life_path": result["life_path"],
+        "expression": result["expression"],
+        "soul_urge": result["soul_urge"],
+        "birthday": result["birthday"],
+        "missing": result["missing_repeat"]["missing"],
+        "repeating": result["missing_repeat"]["repeating"],
+        "positive_lines": result["karmic_chart"]["positive_lines"],
+        "negative_lines": result["karmic_chart"]["negative_lines"],
+    }
+
+
+def iter_client_rows(batch_size=1000):
+    """
+    Yield one dict per client, ordered by id, with the computed numbers.
+    Clients whose stored DOB is not a valid date get empty numbers.
+    """
+    result = db.session.execute(
+        db.select(
+            Client.id, Client.first_name, Client.middle_name, Client.last_name, Client.dob
+        ).order_by(Client.id).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        valid = [row for row in partition if readings.is_valid_dob(row.dob)]
+        computed = readings.compute_results_batch(
+            [readings.full_name(r.first_name, r.middle_name, r.last_name) for r in valid],
+            [r.dob for r in valid],
+        )
+        by_id = {row.id: res for row, res in zip(valid, computed)}
+        for row in partition:
+            yield {
+                "id": row.id,
+                "first_name": row.first_name,
+                "middle_name": row.middle_name or "",
+                "last_name": row.last_name or "",
+                "dob": row.dob,
+                **_numbers(by_id.get(row.id)),
+            }
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        return " ".join(f"{k}:{v}" for k, v in value.items())
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return "" if value is None else value
+
+
+def chunked(lines, size):
+    """Join lines into chunks of about `size` characters."""
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def as_csv(rows, chunk_size=CHUNK_SIZE):
+    """Yield CSV text: the header line at once, then chunks of rows."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(COLUMNS)
+    yield buffer.getvalue()
+    yield from chunked(_csv_lines(rows), chunk_size)
+
+
+def as_ndjson(rows, chunk_size=CHUNK_SIZE):
+    """Yield chunks of NDJSON, one JSON document per line."""
+    yield from chunked((json.dumps(row) + "\n" for row in rows), chunk_size)
+
+
+def export(fmt, batch_size=1000):
+    """Generator of text chunks for the requested format ("csv" or "ndjson")."""
+    rows = iter_client_rows(batch_size)
+    if fmt == "csv":
+        return as_csv(rows)
+    if fmt == "ndjson":
+        return as_ndjson(rows)
+    raise ValueError(f"Unknown format: {fmt}")
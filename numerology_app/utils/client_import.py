@@ -0,0 +1,126 @@
+"""
+Streaming bulk import of clients from CSV or NDJSON.
+
+Records are read lazily from the file, normalized like the numerology form,
+scored in batches and inserted with one executemany per batch. Duplicates on
+(first_name, dob), both against the database and inside the batch, are
+skipped with a single query per batch.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert, tuple_
+
+from numerology_app.extensions import db
+from numerology_app.models import Client
+from numerology_app.utils import matching, readings
+
+FIELDS = ("first_name", "middle_name", "last_name", "dob")
+
+
+def read_records(stream, fmt):
+    """Yield one dict per client from a CSV or NDJSON text stream."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def _clean(record):
+    """
+    Normalized client fields, or None when the record has no first name
+    or an unusable DOB.
+    """
+    values = {field: str(record.get(field) or "").strip() for field in FIELDS}
+    if not values["first_name"]:
+        return None
+    try:
+        values["dob"] = readings.normalize_dob(values["dob"])
+    except ValueError:
+        return None
+    if not readings.is_valid_dob(values["dob"]):
+        return None
+    return values
+
+
+def _existing_keys(keys):
+    """The (first_name, dob) pairs among `keys` already in the clients table."""
+    if not keys:
+        return set()
+    rows = db.session.execute(
+        db.select(Client.first_name, Client.dob).where(
+            tuple_(Client.first_name, Client.dob).in_(list(keys))
+        )
+    )
+    return {tuple(row) for row in rows}
+
+
+def import_clients(records, batch_size=1000, commit_every=5000, progress=None):
+    """
+    Insert client records in batches. Returns counts of read, inserted,
+    duplicate and invalid records. `progress` is called with those counts
+    and the elapsed seconds after every commit.
+    """
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    started = time.perf_counter()
+    uncommitted = 0
+    records = iter(records)
+
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        stats["read"] += len(chunk)
+
+        rows = {}
+        for record in chunk:
+            values = _clean(record)
+            if values is None:
+                stats["invalid"] += 1
+                continue
+            key = (values["first_name"], values["dob"])
+            if key in rows:
+                stats["duplicates"] += 1
+                continue
+            rows[key] = values
+
+        existing = _existing_keys(rows.keys())
+        stats["duplicates"] += len(existing)
+        rows = [values for key, values in rows.items() if key not in existing]
+        if not rows:
+            continue
+
+        results = readings.compute_results_batch(
+            [readings.full_name(r["first_name"], r["middle_name"], r["last_name"]) for r in rows],
+            [r["dob"] for r in rows],
+        )
+        now = datetime.utcnow()
+        for values, result in zip(rows, results):
+            values["results"] = readings.stamp_results(
+                result, *(values[field] for field in FIELDS)
+            )
+            values["created_at"] = now
+
+        db.session.execute(insert(Client), rows)
+        stats["inserted"] += len(rows)
+        uncommitted += len(rows)
+
+        if uncommitted >= commit_every:
+            db.session.commit()
+            uncommitted = 0
+            if progress:
+                progress(stats, time.perf_counter() - started)
+
+    db.session.commit()
+    if stats["inserted"]:
+        matching.bump_clients_version()
+    if progress:
+        progress(stats, time.perf_counter() - started)
+    return stats
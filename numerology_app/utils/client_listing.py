@@ -0,0 +1,137 @@
+"""
+Paged listing and typeahead search over the clients table.
+
+Pages are keyset-paginated on (created_at DESC, id DESC): the cursor is the
+last row of the previous page, so every page costs the same no matter how
+deep the reader scrolls. Search matches name prefixes with LIKE against the
+NOCASE indexes on first_name and last_name, so each query is an index range
+scan that stops after `limit` rows.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, or_, tuple_
+
+from numerology_app.extensions import db
+from numerology_app.models import Client
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SEARCH_LIMIT = 20
+
+
+def client_json(client):
+    """The fields the client list and the load-client modal render."""
+    return {
+        "id": client.id,
+        "first_name": client.first_name,
+        "middle_name": client.middle_name or "",
+        "last_name": client.last_name or "",
+        "full_name": client.full_name,
+        "dob": client.dob,
+        "created": client.created_at.strftime("%d-%b-%Y %H:%M") if client.created_at else None,
+    }
+
+
+# -------------------
+# Keyset Pagination
+# -------------------
+def encode_cursor(client):
+    created = client.created_at.isoformat() if client.created_at else ""
+    return f"{created}~{client.id}"
+
+
+def decode_cursor(token):
+    """(created_at or None, id) from a cursor. Raises ValueError if malformed."""
+    created, _, client_id = token.rpartition("~")
+    return (datetime.fromisoformat(created) if created else None), int(client_id)
+
+
+def page_clients(cursor=None, limit=PAGE_SIZE):
+    """
+    One page of clients, newest first, starting after `cursor`.
+    Returns (clients, next_cursor); next_cursor is None on the last page.
+    Clients without created_at (saved before it was set) come last, by id.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    created_at, client_id = decode_cursor(cursor) if cursor else (None, None)
+    newest_first = (Client.created_at.desc(), Client.id.desc())
+
+    # one extra row tells whether another page follows
+    clients = []
+    if cursor is None or created_at is not None:
+        # a row-value comparison lets SQLite seek straight to the cursor
+        query = db.select(Client).where(Client.created_at.is_not(None))
+        if cursor:
+            query = query.where(tuple_(Client.created_at, Client.id) < (created_at, client_id))
+        clients = db.session.execute(query.order_by(*newest_first).limit(limit + 1)).scalars().all()
+
+    if len(clients) <= limit:
+        query = db.select(Client).where(Client.created_at.is_(None))
+        if cursor and created_at is None:
+            query = query.where(Client.id < client_id)
+        query = query.order_by(Client.id.desc()).limit(limit + 1 - len(clients))
+        clients += db.session.execute(query).scalars().all()
+
+    if len(clients) <= limit:
+        return clients, None
+    clients = clients[:limit]
+    return clients, encode_cursor(clients[-1])
+
+
+# -------------------
+# Typeahead Search
+# -------------------
+def _prefix(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _starts_with(column, text):
+    return column.like(_prefix(text), escape="\\")
+
+
+def search_clients(q, limit=SEARCH_LIMIT):
+    """
+    Clients whose name starts with `q`, case-insensitively.
+    One word matches first or last names (first-name matches first);
+    several words match the first name on the first word and the middle
+    or last name on the last word.
+    """
+    words = q.split()
+    if not words:
+        return []
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    def fetch(column, *conditions):
+        # ordered like the NOCASE index, so SQLite reads it in order and stops early
+        query = db.select(Client).where(_starts_with(column, words[0]), *conditions)
+        query = query.order_by(column.collate("NOCASE"), Client.id)
+        return db.session.execute(query.limit(limit)).scalars().all()
+
+    if len(words) > 1:
+        return fetch(
+            Client.first_name,
+            or_(_starts_with(Client.last_name, words[-1]), _starts_with(Client.middle_name, words[-1])),
+        )
+
+    clients = fetch(Client.first_name)
+    if len(clients) < limit:
+        seen = {client.id for client in clients}
+        for client in fetch(Client.last_name):
+            if client.id not in seen and len(clients) < limit:
+                clients.append(client)
+    return clients
+
+
+def name_condition(q):
+    """
+    The search_clients() match as one filter (for selections with no
+    limit): first or last name prefix, or first name plus middle/last.
+    """
+    words = q.split()
+    if len(words) > 1:
+        return and_(
+            _starts_with(Client.first_name, words[0]),
+            or_(_starts_with(Client.last_name, words[-1]), _starts_with(Client.middle_name, words[-1])),
+        )
+    return or_(_starts_with(Client.first_name, words[0]), _starts_with(Client.last_name, words[0]))
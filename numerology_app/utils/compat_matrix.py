@@ -0,0 +1,226 @@
+"""
+All-pairs compatibility for a group of participants (families, teams,
+matchmaking events).
+
+Every pair gets what matchmaking_home shows for two people: the
+relationship title (3/9 pair, same number, friends, enemies), the crystal
+combination from both life paths' stones, and the missing numbers they
+share, plus the best-matches score from matching.py. All of these depend
+only on the two life paths and missing masks, so they are looked up from
+10x10 and 512-entry tables for a whole block of pairs at once; the CSV is
+generated block by block and streamed.
+
+Pairs are (i, j) with i before j in the participant list, and the title is
+read from i's side, as if i were Profile 1 in the form.
+"""
+import csv
+import io
+import json
+
+import numpy as np
+
+from numerology_app.utils import batch, lookups, matching, readings
+from numerology_app.utils.client_export import CHUNK_SIZE, chunked
+
+COLUMNS = [
+    "p1_name", "p1_dob", "p1_life_path",
+    "p2_name", "p2_dob", "p2_life_path",
+    "title", "crystal_suggestion", "shared_missing", "score",
+]
+BLOCK_PAIRS = 200_000
+DEFAULT_TOP = 20
+
+
+# -------------------
+# Participants
+# -------------------
+def read_participants(stream, fmt):
+    """
+    (participants, invalid) from a CSV or NDJSON stream. Each record has a
+    "name" (or first_name/middle_name/last_name) and a "dob" in any format
+    the numerology form accepts. Participants are dicts with name and ISO dob.
+    """
+    if fmt == "csv":
+        records = csv.DictReader(stream)
+    elif fmt == "ndjson":
+        records = (json.loads(line) for line in stream if line.strip())
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    participants, invalid = [], 0
+    for record in records:
+        record = {k.strip().lower(): str(v or "").strip() for k, v in record.items() if k}
+        name = record.get("name") or readings.full_name(
+            record.get("first_name", ""), record.get("middle_name", ""), record.get("last_name", "")
+        )
+        try:
+            dob = readings.normalize_dob(record.get("dob", ""))
+        except ValueError:
+            dob = ""
+        if not name or not readings.is_valid_dob(dob):
+            invalid += 1
+            continue
+        participants.append({"name": name, "dob": dob})
+    return participants, invalid
+
+
+# -------------------
+# Pair Tables
+# -------------------
+class PairTables:
+    """Everything a pair's row needs, indexed by both life paths or a mask."""
+
+    def __init__(self, snapshot=None):
+        snapshot = snapshot or lookups.get_snapshot()
+        self.codes, self.scores, self.crystal = matching.score_tables(snapshot)
+        stones = {n: getattr(snapshot.life_path.get(str(n)), "stone", None) for n in range(10)}
+        self.titles = [[""] * 10 for _ in range(10)]
+        self.crystals = [[""] * 10 for _ in range(10)]
+        for a in range(1, 10):
+            for b in range(1, 10):
+                self.titles[a][b] = matching.relationship_title(a, b)
+                self.crystals[a][b] = crystal_suggestion(stones[a], stones[b])
+        self.shared = [", ".join(map(str, batch.mask_to_numbers(m))) for m in range(1 << 9)]
+
+
+def crystal_suggestion(p1_crystal, p2_crystal):
+    """The crystal combination text of matchmaking_home."""
+    combined_crystals = []
+    if p1_crystal:
+        combined_crystals.append(p1_crystal)
+    if p2_crystal and p2_crystal != p1_crystal:
+        combined_crystals.append(p2_crystal)
+    return " + ".join(combined_crystals) if combined_crystals else "No crystal data found."
+
+
+def _pair_blocks(life_paths, masks, tables, block_pairs=BLOCK_PAIRS):
+    """
+    Yield (i, j, scores, shared_masks) arrays for all pairs i < j,
+    about block_pairs pairs at a time.
+    """
+    n = len(life_paths)
+    i = 0
+    while i < n - 1:
+        # rows i..stop-1 against every later participant
+        pairs = 0
+        stop = i
+        while stop < n - 1 and (pairs == 0 or pairs + (n - stop - 1) <= block_pairs):
+            pairs += n - stop - 1
+            stop += 1
+        first = np.concatenate([np.full(n - r - 1, r) for r in range(i, stop)])
+        second = np.concatenate([np.arange(r + 1, n) for r in range(i, stop)])
+        shared = masks[first] & masks[second]
+        scores = tables.scores[life_paths[first], life_paths[second]] - matching.POPCOUNT[shared]
+        yield first, second, scores, shared
+        i = stop
+
+
+def _row_prefixes(participants, life_paths):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    prefixes = []
+    for person, lp in zip(participants, life_paths):
+        writer.writerow([person["name"], person["dob"], int(lp)])
+        prefixes.append(buffer.getvalue().rstrip("\r\n"))
+        buffer.seek(0)
+        buffer.truncate()
+    return prefixes
+
+
+def _csv_field(text):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([text])
+    return buffer.getvalue().rstrip("\r\n")
+
+
+def matrix_csv(participants, tables=None, chunk_size=CHUNK_SIZE, summary=None, top=DEFAULT_TOP):
+    """
+    Yield the pairwise CSV in chunks: the header at once, then one line per
+    pair. When `summary` is a dict it is filled with pair counts per title
+    and the `top` best-scoring pairs once the generator is exhausted.
+    """
+    tables = tables or PairTables()
+    life_paths, masks = matching.profile_arrays([p["dob"] for p in participants])
+    prefixes = _row_prefixes(participants, life_paths)
+    pair_text = [
+        [f"{_csv_field(tables.titles[a][b])},{_csv_field(tables.crystals[a][b])}" for b in range(10)]
+        for a in range(10)
+    ]
+    shared_text = [_csv_field(text) for text in tables.shared]
+    tracker = _SummaryTracker(tables, top) if summary is not None else None
+
+    def lines():
+        for first, second, scores, shared in _pair_blocks(life_paths, masks, tables):
+            if tracker:
+                tracker.add(first, second, scores, life_paths)
+            columns = (
+                first.tolist(), second.tolist(),
+                life_paths[first].tolist(), life_paths[second].tolist(),
+                shared.tolist(), scores.tolist(),
+            )
+            for i, j, a, b, m, score in zip(*columns):
+                yield f"{prefixes[i]},{prefixes[j]},{pair_text[a][b]},{shared_text[m]},{score}\n"
+        if tracker:
+            summary.update(tracker.result(participants, life_paths, masks))
+
+    yield ",".join(COLUMNS) + "\n"
+    yield from chunked(lines(), chunk_size)
+
+
+def summarize(participants, tables=None, top=DEFAULT_TOP):
+    """Pair counts per title and the top pairs, without writing the CSV."""
+    tables = tables or PairTables()
+    life_paths, masks = matching.profile_arrays([p["dob"] for p in participants])
+    tracker = _SummaryTracker(tables, top)
+    for first, second, scores, _ in _pair_blocks(life_paths, masks, tables):
+        tracker.add(first, second, scores, life_paths)
+    return tracker.result(participants, life_paths, masks)
+
+
+class _SummaryTracker:
+    """Running title counts and top-scoring pairs across pair blocks."""
+
+    def __init__(self, tables, top):
+        self.tables = tables
+        self.top = top
+        self.pairs = 0
+        self.title_counts = np.zeros(len(matching.RELATIONS), dtype=np.int64)
+        self.best = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int16))
+
+    def add(self, first, second, scores, life_paths):
+        self.pairs += len(scores)
+        codes = self.tables.codes[life_paths[first], life_paths[second]]
+        self.title_counts += np.bincount(codes, minlength=len(self.title_counts))
+        if len(scores) > self.top:
+            # drop everything below the top-th score before sorting
+            cutoff = np.partition(scores, len(scores) - self.top)[len(scores) - self.top]
+            keep = scores >= cutoff
+            first, second, scores = first[keep], second[keep], scores[keep]
+        first = np.concatenate([self.best[0], first])
+        second = np.concatenate([self.best[1], second])
+        scores = np.concatenate([self.best[2], scores])
+        # best score first, then participant order
+        order = np.lexsort((second, first, -scores.astype(np.int32)))[:self.top]
+        self.best = (first[order], second[order], scores[order])
+
+    def result(self, participants, life_paths, masks):
+        top_pairs = []
+        for i, j, score in zip(*(a.tolist() for a in self.best)):
+            a, b = int(life_paths[i]), int(life_paths[j])
+            top_pairs.append({
+                "p1": participants[i], "p2": participants[j],
+                "p1_life_path": a, "p2_life_path": b,
+                "title": self.tables.titles[a][b],
+                "crystal_suggestion": self.tables.crystals[a][b],
+                "shared_missing": self.tables.shared[int(masks[i]) & int(masks[j])],
+                "score": score,
+            })
+        return {
+            "participants": len(participants),
+            "pairs": self.pairs,
+            "titles": {
+                matching.RELATION_TITLES[rel]: int(count)
+                for rel, count in zip(matching.RELATIONS, self.title_counts)
+            },
+            "top_pairs": top_pairs,
+        }
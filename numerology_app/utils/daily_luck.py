@@ -0,0 +1,146 @@
+"""
+Every client's lucky year, month and day, precomputed per day.
+
+The lucky month and day depend on the date they are asked for (see
+numerology.future_predictions, which takes that date as `today`).
+`flask precompute-daily` runs batch.lucky_timeline() over all clients for
+the next N days, a batch of clients at a time, and stores one daily_luck
+row per client and day. The future predictions page and the lucky
+clients dashboard then only look rows up.
+
+The numbers are a pure function of the DOB and the day, so a rerun
+rewrites identical rows and readers never see wrong values mid-run.
+Clients added after a run have no rows until the next one, and editing
+or deleting a client drops theirs; for_person() computes the numbers for
+anyone without a row.
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import delete, insert, or_
+
+from numerology_app.extensions import db
+from numerology_app.models import Client, DailyLuck
+from numerology_app.utils import batch, numerology, readings
+
+DEFAULT_DAYS = 7
+LUCKY_NUMBERS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 11, 22)
+PAGE_SIZE = 100
+
+
+# -------------------
+# Precompute
+# -------------------
+def precompute(days=DEFAULT_DAYS, start=None, batch_size=20_000, progress=None):
+    """
+    Store the lucky numbers of every client for `days` days from `start`
+    (today by default), then drop rows outside that window. Commits after
+    each batch of clients; `progress` gets (clients done, elapsed seconds).
+    Returns counts of clients, rows and clients skipped for an invalid DOB.
+    """
+    start = start or date.today()
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + days)
+    day_values = [start + timedelta(days=i) for i in range(days)]
+    stats = {"clients": 0, "rows": 0, "invalid": 0}
+    started = time.perf_counter()
+    last_id = 0
+
+    while True:
+        chunk = db.session.execute(
+            db.select(Client.id, Client.dob).where(Client.id > last_id).order_by(Client.id).limit(batch_size)
+        ).all()
+        if not chunk:
+            break
+        valid = [row for row in chunk if readings.is_valid_dob(row.dob)]
+        stats["invalid"] += len(chunk) - len(valid)
+
+        # Rows of this id range, including clients deleted since the last run
+        db.session.execute(delete(DailyLuck).where(
+            DailyLuck.client_id > last_id, DailyLuck.client_id <= chunk[-1].id, DailyLuck.day >= start,
+        ))
+        if valid:
+            lucky_year, lucky_month, lucky_day = batch.lucky_timeline(
+                *batch.split_dates([row.dob for row in valid]), dates
+            )
+            rows = [
+                {
+                    "client_id": row.id,
+                    "day": day,
+                    "lucky_year": year,
+                    "lucky_month": month,
+                    "lucky_day": lucky,
+                }
+                for row, year, months, lucky_days in zip(
+                    valid, lucky_year.tolist(), lucky_month.tolist(), lucky_day.tolist()
+                )
+                for day, month, lucky in zip(day_values, months, lucky_days)
+            ]
+            # Core insert on the table: skips the ORM's per-row bookkeeping
+            db.session.execute(insert(DailyLuck.__table__), rows)
+            stats["rows"] += len(rows)
+        db.session.commit()
+
+        stats["clients"] += len(chunk)
+        last_id = chunk[-1].id
+        if progress:
+            progress(stats["clients"], time.perf_counter() - started)
+
+    db.session.execute(delete(DailyLuck).where(or_(
+        DailyLuck.client_id > last_id,
+        DailyLuck.day < start,
+        DailyLuck.day >= start + timedelta(days=days),
+    )))
+    db.session.commit()
+    return stats
+
+
+def forget_client(client_id):
+    """Drop a client's rows (their DOB changed or they were deleted)."""
+    db.session.execute(delete(DailyLuck).where(DailyLuck.client_id == client_id))
+
+
+# -------------------
+# Lookups
+# -------------------
+def for_person(first_name, dob, day=None):
+    """
+    {"lucky_year", "lucky_month", "lucky_day"} on `day` (today) for a
+    "YYYY-MM-DD" DOB: the precomputed row of the client with this first
+    name and DOB, or computed when there is none.
+    """
+    day = day or date.today()
+    row = db.session.execute(
+        db.select(DailyLuck.lucky_year, DailyLuck.lucky_month, DailyLuck.lucky_day)
+        .join(Client, Client.id == DailyLuck.client_id)
+        .where(Client.first_name == first_name, Client.dob == dob, DailyLuck.day == day)
+    ).first()
+    if row is None:
+        return numerology.future_predictions(dob, day)
+    return row._asdict()
+
+
+def counts(day):
+    """{lucky day number: clients} on `day`."""
+    rows = db.session.execute(
+        db.select(DailyLuck.lucky_day, db.func.count())
+        .where(DailyLuck.day == day)
+        .group_by(DailyLuck.lucky_day)
+    )
+    return {number: count for number, count in rows}
+
+
+def lucky_clients(day, number, after=0, limit=PAGE_SIZE):
+    """
+    (clients whose lucky day number on `day` is `number`, with their lucky
+    year and month; next `after` cursor or None), ordered by client id.
+    """
+    rows = db.session.execute(
+        db.select(Client, DailyLuck.lucky_year, DailyLuck.lucky_month)
+        .join(Client, Client.id == DailyLuck.client_id)
+        .where(DailyLuck.day == day, DailyLuck.lucky_day == number, DailyLuck.client_id > after)
+        .order_by(DailyLuck.client_id)
+        .limit(limit + 1)
+    ).all()
+    next_after = rows[limit - 1][0].id if len(rows) > limit else None
+    return rows[:limit], next_after
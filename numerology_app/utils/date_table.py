@@ -0,0 +1,222 @@
+"""
+Precomputed per-date profile table.
+
+Every DOB-derived number (life path, birthday, digit counts, missing numbers,
+karmic chart and lines, lucky year) depends only on the date, so they are
+computed once for every day from 1900-01-01 to 2100-12-31 with the batch
+engine and stored in a compact structured array. A lookup is then a single
+index into that array.
+
+The table is built in memory on first use, or memory-mapped from
+instance/date_table.npy when it has been written with `flask build-date-table`.
+"""
+import os
+import time
+from datetime import date
+
+import numpy as np
+from flask import current_app, has_app_context
+
+from numerology_app.utils import batch, numerology
+
+START = date(1900, 1, 1)
+END = date(2100, 12, 31)
+TABLE_FILENAME = "date_table.npy"
+
+DTYPE = np.dtype([
+    ("life_path", "u1"),
+    ("birthday", "u1"),
+    ("digit_counts", "u1", (10,)),
+    ("missing_mask", "u2"),
+    ("positive_lines", "u1"),
+    ("negative_lines", "u1"),
+    ("lucky_year", "u1"),
+])
+
+_START_ORDINAL = START.toordinal()
+_SIZE = END.toordinal() - _START_ORDINAL + 1
+_table = None
+
+
+# -------------------
+# Building / Loading
+# -------------------
+def build_table():
+    """Compute the profile of every date in [START, END]."""
+    dobs = np.arange(np.datetime64(START), np.datetime64(START) + _SIZE)
+    columns = batch.compute_dates(dobs)
+
+    table = np.zeros(_SIZE, dtype=DTYPE)
+    for field in DTYPE.names:
+        table[field] = columns[field]
+    return table
+
+
+def default_path():
+    """Location of the table file inside the Flask instance folder."""
+    if has_app_context():
+        return os.path.join(current_app.instance_path, TABLE_FILENAME)
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    return os.path.join(base_dir, "..", "..", "instance", TABLE_FILENAME)
+
+
+def save_table(table, path=None):
+    path = path or default_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table)
+    return path
+
+
+def load_table(path=None):
+    """Memory-map a saved table, or return None if it is missing or outdated."""
+    path = path or default_path()
+    if not os.path.exists(path):
+        return None
+    table = np.load(path, mmap_mode="r")
+    if table.dtype != DTYPE or table.shape != (_SIZE,):
+        return None
+    return table
+
+
+def get_table():
+    """The per-process table: loaded from disk if available, else built."""
+    global _table
+    if _table is None:
+        table = load_table()
+        _table = table if table is not None else build_table()
+    return _table
+
+
+# -------------------
+# Lookup
+# -------------------
+def date_index(dob: str):
+    """
+    Row index of a "YYYY-MM-DD" string, or None when the string is not in
+    that exact format or falls outside [START, END].
+    """
+    if len(dob) != 10 or dob[4] != "-" or dob[7] != "-":
+        return None
+    year, month, day = dob[:4], dob[5:7], dob[8:]
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    try:
+        index = date(int(year), int(month), int(day)).toordinal() - _START_ORDINAL
+    except ValueError:
+        return None
+    return index if 0 <= index < _SIZE else None
+
+
+# Decoded masks, so a lookup never loops over bits
+_MISSING_LISTS = [batch.mask_to_numbers(mask) for mask in range(1 << 9)]
+_LINE_LISTS = [batch.mask_to_lines(mask) for mask in range(1 << len(batch.KARMIC_LINES))]
+
+
+def row_to_profile(row):
+    life_path, birthday, counts, missing, positive, negative, _ = row.item()
+    counts = counts.tolist()
+    return {
+        "life_path": life_path,
+        "birthday": birthday,
+        "repeating": {d: c for d, c in enumerate(counts) if c},
+        "missing": list(_MISSING_LISTS[missing]),
+        "karmic_chart": {
+            "chart": dict(zip(range(1, 10), counts[1:])),
+            "positive_lines": list(_LINE_LISTS[positive]),
+            "negative_lines": list(_LINE_LISTS[negative]),
+        },
+    }
+
+
+def lookup(dob: str):
+    """Profile of a DOB from the table, or None if it is not covered."""
+    index = date_index(dob)
+    if index is None:
+        return None
+    return row_to_profile(get_table()[index])
+
+
+def lookup_rows(dobs):
+    """
+    Table rows for an array of datetime64 values or "YYYY-MM-DD" strings,
+    for bulk jobs. Raises ValueError if any date is outside [START, END].
+    """
+    days = np.asarray(dobs, dtype="datetime64[D]")
+    index = (days - np.datetime64(START)).astype(np.int64)
+    if index.size and (index.min() < 0 or index.max() >= _SIZE):
+        raise ValueError(f"Dates must be between {START} and {END}")
+    return get_table()[index]
+
+
+def date_profile(dob: str):
+    """
+    Every date-derived number for a DOB, in the same shapes the scalar
+    functions return. Falls back to those functions for dates the table
+    does not cover.
+    """
+    profile = lookup(dob)
+    if profile is not None:
+        return profile
+    return {
+        "life_path": numerology.life_path(dob),
+        "birthday": numerology.birthday_number(dob),
+        "repeating": numerology.repeating_numbers(dob),
+        "missing": numerology.missing_numbers(dob),
+        "karmic_chart": numerology.karmic_chart_and_lines(dob),
+    }
+
+
+# -------------------
+# Verification / Benchmark
+# -------------------
+def _all_dobs():
+    for i in range(_SIZE):
+        yield date.fromordinal(_START_ORDINAL + i).isoformat()
+
+
+def verify_table(table=None):
+    """Compare every row with the scalar functions. Returns mismatching DOBs."""
+    table = get_table() if table is None else table
+    mismatches = []
+    for i, dob in enumerate(_all_dobs()):
+        expected = {
+            "life_path": numerology.life_path(dob),
+            "birthday": numerology.birthday_number(dob),
+            "repeating": numerology.repeating_numbers(dob),
+            "missing": numerology.missing_numbers(dob),
+            "karmic_chart": numerology.karmic_chart_and_lines(dob),
+        }
+        if row_to_profile(table[i]) != expected:
+            mismatches.append(dob)
+    return mismatches
+
+
+def benchmark(samples=20000):
+    """Time table lookups against the scalar functions on random DOBs."""
+    rng = np.random.default_rng(0)
+    dobs = [
+        date.fromordinal(_START_ORDINAL + int(i)).isoformat()
+        for i in rng.integers(0, _SIZE, samples)
+    ]
+    get_table()
+
+    started = time.perf_counter()
+    for dob in dobs:
+        numerology.life_path(dob)
+        numerology.birthday_number(dob)
+        numerology.repeating_numbers(dob)
+        numerology.missing_numbers(dob)
+        numerology.karmic_chart_and_lines(dob)
+    scalar = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for dob in dobs:
+        lookup(dob)
+    table = time.perf_counter() - started
+
+    return {
+        "samples": samples,
+        "scalar_us": scalar / samples * 1e6,
+        "table_us": table / samples * 1e6,
+        "speedup": scalar / table,
+    }
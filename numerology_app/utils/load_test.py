@@ -0,0 +1,137 @@
+"""
+Concurrent read/write load test for the SQLite configuration.
+
+Two scratch copies of a synthetic clients table are hammered by separate
+processes (like gunicorn workers): readers run the numerology_home lookup
+and the first client-list page, writers insert clients one transaction at
+a time. One copy uses SQLite's defaults (rollback journal,
+synchronous=FULL), the other the pragmas from config.SQLITE_PRAGMAS.
+"""
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from numerology_app.config import SQLITE_PRAGMAS, apply_sqlite_pragmas
+
+_RESULTS = json.dumps({"version": 1, "input_hash": "0" * 16, "results": {"notes": "x" * 800}})
+_NAMES = ["Ada", "Amit", "Diya", "Emma", "Kiran", "Lee", "Maya", "Noah", "Priya", "Ravi", "Sara", "Zoe"]
+
+READ_SQL = [
+    "SELECT * FROM clients WHERE first_name = :first_name AND dob = :dob LIMIT 1",
+    "SELECT * FROM clients WHERE created_at IS NOT NULL ORDER BY created_at DESC, id DESC LIMIT 51",
+]
+WRITE_SQL = (
+    "INSERT INTO clients (first_name, last_name, dob, results, created_at) "
+    "VALUES (:first_name, :last_name, :dob, :results, :created_at)"
+)
+
+
+def _client(rng, i):
+    return {
+        "first_name": f"{rng.choice(_NAMES)}{i}",
+        "last_name": "Load",
+        "dob": f"{rng.randint(1950, 2010)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "results": _RESULTS,
+        "created_at": (datetime(2024, 1, 1) + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+    }
+
+
+def build_database(path, rows):
+    """A clients table (current schema and indexes) with `rows` synthetic rows."""
+    from numerology_app.extensions import db
+    from numerology_app.models import Client
+
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine, tables=[Client.__table__])
+    engine.dispose()
+    rng = random.Random(1)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(WRITE_SQL, (_client(rng, i) for i in range(rows)))
+
+
+def _worker(role, index, path, pragmas, start_at, seconds, queue):
+    engine = create_engine(f"sqlite:///{path}")
+    apply_sqlite_pragmas(engine, pragmas)
+    rng = random.Random(index)
+    latencies, errors, i = [], 0, 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = start_at + seconds
+    while time.time() < deadline:
+        i += 1
+        started = time.perf_counter()
+        try:
+            if role == "reader":
+                with engine.connect() as conn:
+                    params = {"first_name": f"Maya{rng.randint(0, 10_000)}", "dob": "1987-06-24"}
+                    conn.execute(text(READ_SQL[0]), params).all()
+                    conn.execute(text(READ_SQL[1])).all()
+            else:
+                with engine.begin() as conn:
+                    conn.execute(text(WRITE_SQL), _client(rng, 10_000_000 * (index + 1) + i))
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    engine.dispose()
+    queue.put((role, latencies, errors))
+
+
+def _summary(latencies, errors, seconds):
+    if not latencies:
+        return {"ops_per_s": 0.0, "p50_ms": None, "p99_ms": None, "max_ms": None, "errors": errors}
+    ordered = sorted(latencies)
+    return {
+        "ops_per_s": len(ordered) / seconds,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "errors": errors,
+    }
+
+
+def run(path, pragmas, readers=4, writers=1, seconds=5.0):
+    """Run readers and writers against `path` for `seconds`; summary per role."""
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue()
+    start_at = time.time() + 1.0  # let every process start before timing
+    procs = [
+        ctx.Process(target=_worker, args=(role, n, path, pragmas, start_at, seconds, queue))
+        for n, role in enumerate(["reader"] * readers + ["writer"] * writers)
+    ]
+    for proc in procs:
+        proc.start()
+    collected = {"reader": ([], 0), "writer": ([], 0)}
+    for _ in procs:
+        role, latencies, errors = queue.get()
+        prev_latencies, prev_errors = collected[role]
+        collected[role] = (prev_latencies + latencies, prev_errors + errors)
+    for proc in procs:
+        proc.join()
+    return {role: _summary(lat, err, seconds) for role, (lat, err) in collected.items()}
+
+
+def compare(rows=50_000, readers=4, writers=1, seconds=5.0):
+    """Load test SQLite defaults against the configured pragmas."""
+    workdir = tempfile.mkdtemp(prefix="numerology-load-")
+    try:
+        seed = os.path.join(workdir, "seed.db")
+        build_database(seed, rows)
+        results = {}
+        for label, pragmas in (("default", {}), ("tuned", SQLITE_PRAGMAS)):
+            path = os.path.join(workdir, f"{label}.db")
+            shutil.copyfile(seed, path)
+            results[label] = run(path, pragmas, readers, writers, seconds)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
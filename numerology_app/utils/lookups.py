@@ -0,0 +1,126 @@
+"""
+In-process snapshot of the interpretation (lookup) tables.
+
+The tables in MODEL_MAP are small and only change through the docs editor,
+so each worker loads them once into immutable rows indexed by number,
+letter or line code, and serves every report from memory.
+
+docs.edit_entry calls bump_version(), which rewrites the lookups stamp file
+in the instance folder (see versions.py). get_snapshot() compares it with the
+stamp the snapshot was loaded under, so an edit invalidates the snapshot in
+every worker without a single query.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from numerology_app.extensions import db
+from numerology_app.models import (
+    LifePath, LifeExpression, SoulUrge,
+    BirthdayDetails, AlphabetDetails,
+    RepeatingNumber, MissingNumber,
+    KarmicLineMeaning,
+    LuckyYearMonthMeaning, LuckyDayMeaning
+)
+from numerology_app.utils import versions
+
+# A dictionary mapping table names to their models
+MODEL_MAP = {
+    "life_path": LifePath,
+    "life_expression": LifeExpression,
+    "soul_urge": SoulUrge,
+    "birthday": BirthdayDetails,
+    "alphabet": AlphabetDetails,
+    "repeating": RepeatingNumber,
+    "missing": MissingNumber,
+    "karmic_lines": KarmicLineMeaning,
+    "lucky_year_month": LuckyYearMonthMeaning,
+    "lucky_day": LuckyDayMeaning
+}
+
+VERSION_NAME = "lookups"  # instance/lookups.version
+
+_row_types = {}
+_snapshot = None
+
+
+class Snapshot:
+    """
+    Immutable copy of every lookup table. Rows are namedtuples with the
+    model's columns, so templates read them exactly like model instances.
+    """
+
+    def __init__(self, tables, stamp):
+        self.stamp = stamp
+        self.tables = MappingProxyType(tables)
+
+        def by_number(name):
+            index = {}
+            for row in tables[name]:
+                index.setdefault(str(row.number), row)
+            return MappingProxyType(index)
+
+        self.life_path = by_number("life_path")
+        self.life_expression = by_number("life_expression")
+        self.soul_urge = by_number("soul_urge")
+        self.birthday = by_number("birthday")
+        self.missing = by_number("missing")
+        self.lucky_year_month = by_number("lucky_year_month")
+        self.lucky_day = by_number("lucky_day")
+        alphabet = {}
+        for row in tables["alphabet"]:
+            alphabet.setdefault(row.letter, row)
+        self.alphabet = MappingProxyType(alphabet)
+
+        repeating = {}
+        for row in tables["repeating"]:
+            repeating.setdefault(int(row.number), []).append(row)
+        self.repeating = MappingProxyType({
+            number: tuple(sorted(rows, key=lambda r: r.repetitions))
+            for number, rows in repeating.items()
+        })
+        # first row per number in table order, like .filter_by(number=...).first()
+        self.repeating_first = by_number("repeating")
+
+        karmic = {}
+        for row in tables["karmic_lines"]:
+            karmic.setdefault((row.line_type, row.numbers), []).append(row)
+        self.karmic_lines = MappingProxyType({key: tuple(rows) for key, rows in karmic.items()})
+
+    def lines(self, line_type, codes):
+        """Karmic line rows of one type for the given codes, ordered by code."""
+        rows = [row for code in codes for row in self.karmic_lines.get((line_type, code), ())]
+        return sorted(rows, key=lambda row: row.numbers)
+
+
+def _row_type(model):
+    if model not in _row_types:
+        columns = [column.name for column in model.__table__.columns]
+        _row_types[model] = namedtuple(model.__name__ + "Row", columns)
+    return _row_types[model]
+
+
+def load_snapshot(stamp):
+    """Read every lookup table (one query each) into a new Snapshot."""
+    tables = {}
+    for name, model in MODEL_MAP.items():
+        row_type = _row_type(model)
+        records = db.session.execute(db.select(model).order_by(model.id)).scalars()
+        tables[name] = tuple(
+            row_type(*(getattr(record, field) for field in row_type._fields))
+            for record in records
+        )
+    return Snapshot(tables, stamp)
+
+
+def get_snapshot():
+    """The per-process snapshot, reloaded when the version stamp moved."""
+    global _snapshot
+    stamp = versions.stamp(VERSION_NAME)
+    if _snapshot is None or _snapshot.stamp != stamp:
+        _snapshot = load_snapshot(stamp)
+    return _snapshot
+
+
+def bump_version():
+    """Invalidate the snapshot in every worker after a lookup table edit."""
+    versions.bump(VERSION_NAME)
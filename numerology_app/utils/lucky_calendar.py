@@ -0,0 +1,197 @@
+"""
+Lucky calendars: a person's lucky day, month and year for every date in
+a range.
+
+timeline() computes the whole range in one batch.lucky_timeline() call
+(the DOB is parsed once, every date's digit sum is a column operation),
+so ten years take a few milliseconds. options() reads the range, target
+numbers and field from request arguments or CLI options; export()
+renders the selected days as JSON, CSV or iCalendar (one all-day event
+per date, for calendar apps).
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from numerology_app.utils import batch
+
+FIELDS = ("lucky_day", "lucky_month", "lucky_year")
+COLUMNS = ("date",) + FIELDS
+MIMETYPES = {"json": "application/json", "csv": "text/csv", "ics": "text/calendar"}
+DEFAULT_YEARS = 1
+MAX_YEARS = 10
+MAX_DAYS = 3660  # ten years and their leap days, with room to spare
+LABELS = {"lucky_day": "Lucky day", "lucky_month": "Lucky month", "lucky_year": "Lucky year"}
+
+
+# -------------------
+# Timeline
+# -------------------
+def timeline(dob, start, end):
+    """
+    {"date": datetime64[D] array, "lucky_day", "lucky_month", "lucky_year":
+    int8 arrays} for every date from `start` to `end` inclusive, for a
+    "YYYY-MM-DD" DOB.
+    """
+    dates = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    lucky_year, lucky_month, lucky_day = batch.lucky_timeline(*batch.split_dates([dob]), dates)
+    return {
+        "date": dates,
+        "lucky_day": lucky_day[0],
+        "lucky_month": lucky_month[0],
+        "lucky_year": np.full(len(dates), lucky_year[0], dtype=np.int8),
+    }
+
+
+def select(columns, numbers=None, field="lucky_day"):
+    """The days of a timeline whose `field` is one of `numbers` (all without)."""
+    if not numbers:
+        return columns
+    keep = np.isin(columns[field], list(numbers))
+    return {name: values[keep] for name, values in columns.items()}
+
+
+def calendar(dob, start, end, numbers=None, field="lucky_day"):
+    """timeline() narrowed to the target numbers."""
+    return select(timeline(dob, start, end), numbers, field)
+
+
+def _tuples(columns):
+    """(date, lucky_day, lucky_month, lucky_year) per selected day, in date order."""
+    dates = np.datetime_as_string(columns["date"]).tolist()
+    return zip(dates, *(columns[field].tolist() for field in FIELDS))
+
+
+def rows(columns):
+    """The selected days as dicts, in date order."""
+    return [dict(zip(COLUMNS, row)) for row in _tuples(columns)]
+
+
+# -------------------
+# Options
+# -------------------
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date.") from None
+
+
+def options(args, today=None):
+    """
+    (start, end, numbers, field) from a mapping with optional "start"
+    (YYYY-MM-DD, default today), "end" or "years" (default 1), "numbers"
+    (comma-separated or a list) and "field" (default lucky_day). Raises ValueError
+    with a message for the user.
+    """
+    start = _parse_date(args["start"], "start") if args.get("start") else (today or date.today())
+    if args.get("end"):
+        end = _parse_date(args["end"], "end")
+    else:
+        try:
+            years = int(args.get("years") or DEFAULT_YEARS)
+        except ValueError:
+            raise ValueError("years must be a whole number.") from None
+        if not 1 <= years <= MAX_YEARS:
+            raise ValueError(f"years must be between 1 and {MAX_YEARS}.")
+        try:
+            end = start.replace(year=start.year + years) - timedelta(days=1)
+        except ValueError:  # from 29 February
+            end = start.replace(year=start.year + years, day=28)
+    if end < start:
+        raise ValueError("end must not be before start.")
+    if (end - start).days + 1 > MAX_DAYS:
+        raise ValueError(f"At most {MAX_DAYS} days (about ten years) per calendar.")
+
+    numbers = args.get("numbers") or ""
+    if not isinstance(numbers, (list, tuple)):  # JSON bodies may send a list
+        numbers = str(numbers).split(",")
+    try:
+        numbers = sorted({int(n) for n in numbers if str(n).strip()})
+    except ValueError:
+        raise ValueError("numbers must be a comma-separated list, e.g. 1,5,22.") from None
+    field = args.get("field") or "lucky_day"
+    if field not in FIELDS:
+        raise ValueError(f"field must be one of {', '.join(FIELDS)}.")
+    return start, end, numbers, field
+
+
+# -------------------
+# Export
+# -------------------
+def export(fmt, columns, name, dob, start, end, numbers, field):
+    """The selected days rendered as `fmt` ("json", "csv" or "ics"), as a str."""
+    if fmt == "ics":
+        return ical(columns, name, dob, field)
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        writer.writerows(_tuples(columns))
+        return out.getvalue()
+    if fmt == "json":
+        return json.dumps({
+            "name": name,
+            "dob": dob,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "field": field,
+            "numbers": numbers,
+            "count": len(columns["date"]),
+            "days": rows(columns),
+        })
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def _ical_text(value):
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """Lines longer than 75 octets continue on lines starting with a space (RFC 5545)."""
+    if len(line.encode()) <= 75:
+        return line
+    parts, current = [], ""
+    for char in line:
+        if len((current + char).encode()) > 75:
+            parts.append(current)
+            current = " "
+        current += char
+    return "\r\n".join(parts + [current])
+
+
+def ical(columns, name, dob, field="lucky_day"):
+    """An iCalendar file with one all-day event per day, summarised by `field`."""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    person = hashlib.sha1(f"{name}|{dob}".encode()).hexdigest()[:12]
+    prefix, suffix = f"SUMMARY:{LABELS[field]} ", f": {_ical_text(name)}"
+    fold = _fold if len(f"{prefix}22{suffix}".encode()) > 75 else str  # long names only
+    starts = np.char.replace(np.datetime_as_string(columns["date"]), "-", "").tolist()
+    ends = np.char.replace(np.datetime_as_string(columns["date"] + 1), "-", "").tolist()
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Numerology Software//Lucky Calendar//EN",
+        "CALSCALE:GREGORIAN",
+        _fold(f"X-WR-CALNAME:{_ical_text(f'Lucky calendar: {name}')}"),
+    ]
+    for start, end, day, month, year, value in zip(
+        starts, ends, *(columns[f].tolist() for f in FIELDS), columns[field].tolist()
+    ):
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{start}-{field}-{person}@numerology",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{start}",
+            f"DTEND;VALUE=DATE:{end}",
+            fold(f"{prefix}{value}{suffix}"),
+            f"DESCRIPTION:Lucky day {day}\\, lucky month {month}\\, lucky year {year}",
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
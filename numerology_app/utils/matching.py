@@ -0,0 +1,270 @@
+"""
+Matchmaking: life-path compatibility, and one-vs-all "best matches" search.
+
+A pair's score depends only on both life paths and both missing-number
+masks, so search keeps a per-process ClientIndex of every client's
+(id, life_path, missing_mask) in NumPy arrays, built once from the date
+table, and scores one client against all of them with array lookups:
+
+    score = RELATION_SCORES[relation] + CRYSTAL_BONUS (same gemstone)
+            - number of missing numbers both share
+
+The index is rebuilt when the clients stamp moves (see versions.py); every
+route that adds, edits or deletes clients calls bump_clients_version().
+"""
+import time
+
+import numpy as np
+
+from numerology_app.extensions import db
+from numerology_app.models import Client
+from numerology_app.utils import batch, date_table, lookups, numerology, readings, versions
+
+# --- Compatibility lookup ---
+COMPAT_LOOKUP = {
+    "1": {"friends": [4, 8], "same": [2, 3, 7, 9], "enemies": [5, 6], "god": "Surya"},
+    "2": {"friends": [7, 9], "same": [1, 3, 4, 6], "enemies": [5, 8], "god": "Chandra"},
+    "3": {"friends": [6, 9], "same": [1, 2, 5, 7], "enemies": [4, 8], "god": "Vishnu"},
+    "4": {"friends": [1, 8], "same": [2, 6, 7, 9], "enemies": [3, 5], "god": "Laxmi"},
+    "5": {"friends": [3, 9], "same": [1, 6, 7, 8], "enemies": [2, 4], "god": "Devi"},
+    "6": {"friends": [3, 9], "same": [2, 4, 5, 7], "enemies": [1, 8], "god": "Narsinh"},
+    "7": {"friends": [2, 6], "same": [3, 4, 5, 8], "enemies": [1, 9], "god": "Bhairav"},
+    "8": {"friends": [1, 4], "same": [2, 5, 7, 9], "enemies": [3, 6], "god": "Hanuman"},
+    "9": {"friends": [3, 6], "same": [2, 4, 5, 8], "enemies": [1, 7], "god": "Hanuman"},
+}
+
+RELATION_TITLES = {
+    "love": "LOVE, SACRIFICE, PURE RELATION",
+    "same_number": "STRONG SAME-NUMBER CONNECTION",
+    "friend": "GOOD COMPATIBILITY (Friendly Numbers)",
+    "enemy": "CHALLENGING COMPATIBILITY",
+    "general": "GENERAL COMPATIBILITY",
+}
+RELATION_SCORES = {"love": 5, "same_number": 4, "friend": 3, "general": 1, "enemy": -3}
+CRYSTAL_BONUS = 1
+RELATIONS = list(RELATION_TITLES)
+
+VERSION_NAME = "clients"  # instance/clients.version
+DEFAULT_TOP_K = 10
+
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(1 << 9)], dtype=np.int16)
+_index = None
+
+
+def life_path_profile(num):
+    """Friends, same, enemies and god of a life path (a fresh dict)."""
+    data = COMPAT_LOOKUP.get(str(num), {"friends": [], "same": [], "enemies": [], "god": "-"})
+    return {**data, "num": num}
+
+
+def relation(lp1, lp2):
+    """Key into RELATION_TITLES for two life paths, seen from the first."""
+    if {lp1, lp2} == {3, 9}:
+        return "love"
+    if lp1 == lp2:
+        return "same_number"
+    profile = life_path_profile(lp1)
+    if lp2 in profile["friends"]:
+        return "friend"
+    if lp2 in profile["enemies"]:
+        return "enemy"
+    return "general"
+
+
+def relationship_title(lp1, lp2):
+    return RELATION_TITLES[relation(lp1, lp2)]
+
+
+def _gem(stone):
+    # "SAPPHIRE (NILAM) IRON/STEEL" -> "SAPPHIRE"
+    return stone.split("(")[0].split()[0].upper() if stone and stone.split() else None
+
+
+def score_tables(snapshot=None):
+    """
+    (relation codes, scores, crystal matches) as 10x10 arrays indexed by
+    both life paths; index 0 stands for "no valid DOB".
+    """
+    snapshot = snapshot or lookups.get_snapshot()
+    gems = {n: _gem(getattr(snapshot.life_path.get(str(n)), "stone", None)) for n in range(1, 10)}
+    codes = np.zeros((10, 10), dtype=np.int8)
+    scores = np.zeros((10, 10), dtype=np.int16)
+    crystal = np.zeros((10, 10), dtype=bool)
+    for a in range(1, 10):
+        for b in range(1, 10):
+            rel = relation(a, b)
+            codes[a, b] = RELATIONS.index(rel)
+            crystal[a, b] = gems[a] is not None and gems[a] == gems[b]
+            scores[a, b] = RELATION_SCORES[rel] + CRYSTAL_BONUS * crystal[a, b]
+    return codes, scores, crystal
+
+
+# -------------------
+# Client Index
+# -------------------
+class ClientIndex:
+    """Life path and missing-number mask of every client, as arrays."""
+
+    def __init__(self, ids, life_paths, missing_masks, stamp=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.life_paths = np.asarray(life_paths, dtype=np.uint8)
+        self.missing_masks = np.asarray(missing_masks, dtype=np.uint16)
+        self.stamp = stamp
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def profile_arrays(dobs):
+    """
+    (life_paths, missing_masks) for a list of DOB strings. Dates in the
+    date table are read from it; other valid dates are computed with the
+    batch engine; invalid DOBs get life path 0.
+    """
+    n = len(dobs)
+    life_paths = np.zeros(n, dtype=np.uint8)
+    masks = np.zeros(n, dtype=np.uint16)
+    in_table, outside = [], []
+    for i, dob in enumerate(dobs):
+        if date_table.date_index(dob) is not None:
+            in_table.append(i)
+        elif readings.is_valid_dob(dob):
+            outside.append(i)
+    if in_table:
+        rows = date_table.lookup_rows([dobs[i] for i in in_table])
+        life_paths[in_table] = rows["life_path"]
+        masks[in_table] = rows["missing_mask"]
+    if outside:
+        columns = batch.split_dates([dobs[i] for i in outside])
+        life_paths[outside] = batch.life_path(*columns)
+        masks[outside] = batch.missing_mask(*columns)
+    return life_paths, masks
+
+
+def build_index(batch_size=10_000, stamp=None):
+    """Read every client's DOB (one streamed query) into a ClientIndex."""
+    ids, life_paths, masks = [], [], []
+    result = db.session.execute(
+        db.select(Client.id, Client.dob).order_by(Client.id).execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        lp, mm = profile_arrays([row.dob or "" for row in partition])
+        ids.append(np.fromiter((row.id for row in partition), dtype=np.int64, count=len(partition)))
+        life_paths.append(lp)
+        masks.append(mm)
+    if not ids:
+        return ClientIndex([], [], [], stamp)
+    return ClientIndex(np.concatenate(ids), np.concatenate(life_paths), np.concatenate(masks), stamp)
+
+
+def get_index():
+    """The per-process client index, rebuilt when the clients stamp moved."""
+    global _index
+    stamp = versions.stamp(VERSION_NAME)
+    if _index is None or _index.stamp != stamp:
+        _index = build_index(stamp=stamp)
+    return _index
+
+
+def bump_clients_version():
+    """Call after adding, editing or deleting clients."""
+    versions.bump(VERSION_NAME)
+
+
+# -------------------
+# One-vs-All Search
+# -------------------
+def rank(index, life_path, missing_mask, k=DEFAULT_TOP_K, exclude_id=None, tables=None):
+    """
+    Positions in `index` of the k best matches for a person with the given
+    life path and missing mask, best first (ties: lower id first), and
+    their scores. Clients without a valid DOB are never returned.
+    """
+    _, scores, _ = tables or score_tables()
+    total = scores[life_path][index.life_paths] - POPCOUNT[index.missing_masks & missing_mask]
+    eligible = index.life_paths > 0
+    if exclude_id is not None:
+        eligible &= index.ids != exclude_id
+    candidates = np.flatnonzero(eligible)
+    if not len(candidates) or k <= 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int16)
+    if len(candidates) > k:
+        # k best by score, plus every candidate tied with the k-th, then sort
+        cand_scores = total[candidates]
+        cutoff = np.partition(cand_scores, len(cand_scores) - k)[len(cand_scores) - k]
+        candidates = candidates[cand_scores >= cutoff]
+    order = np.lexsort((index.ids[candidates], -total[candidates].astype(np.int32)))[:k]
+    top = candidates[order]
+    return top, total[top]
+
+
+def best_matches(client, k=DEFAULT_TOP_K):
+    """
+    The k stored clients that match `client` best, as dicts with the
+    client, score, relation title, crystal match and shared missing numbers.
+    """
+    index = get_index()
+    lp, mask = profile_arrays([client.dob or ""])
+    life_path, missing_mask = int(lp[0]), int(mask[0])
+    if not life_path:
+        return []
+    tables = score_tables()
+    codes, _, crystal = tables
+    top, top_scores = rank(index, life_path, missing_mask, k, exclude_id=client.id, tables=tables)
+
+    top_ids = [int(i) for i in index.ids[top]]
+    clients = {c.id: c for c in db.session.execute(
+        db.select(Client).where(Client.id.in_(top_ids))
+    ).scalars()}
+    matches = []
+    for pos, score in zip(top, top_scores):
+        other_lp = int(index.life_paths[pos])
+        match = clients.get(int(index.ids[pos]))
+        if match is None:  # deleted since the index was built
+            continue
+        matches.append({
+            "client": match,
+            "score": int(score),
+            "life_path": other_lp,
+            "title": RELATION_TITLES[RELATIONS[codes[life_path, other_lp]]],
+            "crystal_match": bool(crystal[life_path, other_lp]),
+            "shared_missing": batch.mask_to_numbers(int(index.missing_masks[pos]) & missing_mask),
+        })
+    return matches
+
+
+def benchmark(clients=200_000, searches=20, k=DEFAULT_TOP_K, seed=3):
+    """
+    Time one-vs-all searches over `clients` random DOBs with the index,
+    against scoring everyone with the scalar numerology functions
+    (measured on a sample and scaled up).
+    """
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, (np.datetime64("2015-12-31") - np.datetime64("1940-01-01")).astype(int), clients)
+    dobs = (np.datetime64("1940-01-01") + days).astype(str).tolist()
+
+    started = time.perf_counter()
+    life_paths, masks = profile_arrays(dobs)
+    index = ClientIndex(np.arange(1, clients + 1), life_paths, masks)
+    build_s = time.perf_counter() - started
+
+    tables = score_tables()
+    started = time.perf_counter()
+    for i in range(searches):
+        rank(index, int(life_paths[i]), int(masks[i]), k, exclude_id=i + 1, tables=tables)
+    search_ms = (time.perf_counter() - started) / searches * 1000
+
+    sample = dobs[:2000]
+    started = time.perf_counter()
+    for dob in sample:
+        lp = numerology.life_path(dob)
+        missing = numerology.missing_numbers(dob)
+        relation(lp, 1), len(missing)
+    scalar_ms = (time.perf_counter() - started) / len(sample) * clients * 1000
+    return {
+        "clients": clients,
+        "build_s": build_s,
+        "search_ms": search_ms,
+        "scalar_ms": scalar_ms,
+        "speedup": scalar_ms / search_ms,
+    }
@@ -0,0 +1,205 @@
+"""
+Request metrics in the Prometheus text format.
+
+With METRICS_ENABLED, init_app() hooks into the app and records, per
+endpoint: request latency, SQL statements and SQL time (engine events),
+and response size as histograms, plus template render time per template.
+GET /metrics returns them in the Prometheus text exposition format
+(behind a bearer token when METRICS_TOKEN is set).
+
+With the flag off nothing is registered, so requests pay nothing.
+
+The numbers live in the memory of each process: run Prometheus against
+every worker, or one worker per scrape target.
+"""
+import bisect
+import hmac
+import threading
+import time
+
+from flask import Response, current_app, g, request, template_rendered, before_render_template
+from sqlalchemy import event
+
+from numerology_app.extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TEMPLATE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self.series.items()):
+            base = _labels(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base}{"," if base else ""}le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {series[-1]}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.series.items()):
+            yield f"{self.name}{{{_labels(zip(self.label_names, labels))}}} {value}"
+
+
+def _labels(pairs):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in pairs)
+
+
+class Registry:
+    """Every metric of one app, updated under one lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter(
+            "numerology_requests_total", "Requests by endpoint, method and status.",
+            ("endpoint", "method", "status"))
+        self.latency = Histogram(
+            "numerology_request_duration_seconds", "Time spent handling a request.",
+            ("endpoint", "method"), LATENCY_BUCKETS)
+        self.sql_statements = Histogram(
+            "numerology_request_sql_statements", "SQL statements executed per request.",
+            ("endpoint",), STATEMENT_BUCKETS)
+        self.sql_seconds = Histogram(
+            "numerology_request_sql_seconds", "Time spent in SQL statements per request.",
+            ("endpoint",), LATENCY_BUCKETS)
+        self.response_size = Histogram(
+            "numerology_response_size_bytes", "Response body size (when known up front).",
+            ("endpoint",), SIZE_BUCKETS)
+        self.template = Histogram(
+            "numerology_template_render_seconds", "Time spent rendering a template.",
+            ("template",), TEMPLATE_BUCKETS)
+
+    def exposition(self):
+        with self.lock:
+            metrics = (self.requests, self.latency, self.sql_statements, self.sql_seconds,
+                       self.response_size, self.template)
+            return "\n".join(line for metric in metrics for line in metric.lines()) + "\n"
+
+
+# -------------------
+# Hooks
+# -------------------
+def _endpoint():
+    return request.url_rule.endpoint if request.url_rule else "unmatched"
+
+
+def _start_request():
+    g.metrics = {"started": time.perf_counter(), "sql_statements": 0, "sql_seconds": 0.0}
+
+
+def _record(response=None, status=None):
+    state = g.pop("metrics", None)
+    if state is None or request.endpoint == "metrics":
+        return
+    endpoint, elapsed = _endpoint(), time.perf_counter() - state["started"]
+    status = response.status_code if response is not None else status
+    size = None
+    if response is not None:
+        # never buffer a streamed body just to measure it
+        size = response.content_length
+        if size is None and not response.is_streamed:
+            size = response.calculate_content_length()
+    registry = current_app.extensions["metrics"]
+    with registry.lock:
+        registry.requests.inc((endpoint, request.method, str(status)))
+        registry.latency.observe((endpoint, request.method), elapsed)
+        registry.sql_statements.observe((endpoint,), state["sql_statements"])
+        registry.sql_seconds.observe((endpoint,), state["sql_seconds"])
+        if size is not None:
+            registry.response_size.observe((endpoint,), size)
+
+
+def _after_request(response):
+    _record(response)
+    return response
+
+
+def _teardown_request(exc):
+    if exc is not None:  # recorded here only if after_request never ran
+        _record(status=500)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    state = g.get("metrics") if g else None
+    if state is not None:
+        state["sql_statements"] += 1
+        state["sql_seconds"] += time.perf_counter() - started
+
+
+def _before_render(sender, template, context, **extra):
+    g.setdefault("metrics_templates", []).append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    started = g.metrics_templates.pop()
+    registry = sender.extensions["metrics"]
+    with registry.lock:
+        registry.template.observe((template.name or "<string>",), time.perf_counter() - started)
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        auth = request.headers.get("Authorization", "")
+        given = auth[len("Bearer "):] if auth.startswith("Bearer ") else ""
+        if not hmac.compare_digest(given, token):
+            return Response("Authentication required.\n", status=401, mimetype="text/plain")
+    return Response(current_app.extensions["metrics"].exposition(), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """Register the hooks and /metrics when METRICS_ENABLED is set."""
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    app.extensions["metrics"] = Registry()
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_template_rendered, app)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
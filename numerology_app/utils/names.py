@@ -0,0 +1,361 @@
+"""
+Compiled name scoring engine.
+
+A NameScorer precompiles a letter mapping and the vowel table once:
+into bytes.translate() tables for scoring a single name, and into 256-entry
+lookup arrays for score_names(), which scores a whole chunk of names in one
+vectorized pass over their concatenated bytes.
+
+Results are identical to numerology.expression_number(), soul_urge() and
+letters_to_numbers(). Names that are not plain ASCII (where upper() can
+change the length, e.g. "ß" -> "SS") go through those functions directly.
+"""
+import random
+import string
+import time
+from itertools import islice
+
+import numpy as np
+
+from numerology_app.utils import batch, numerology
+
+# str.split() also splits on \x1c-\x1f; bytes.split() does not, so the
+# translate tables turn those into plain spaces
+_STR_ONLY_WHITESPACE = b"\x1c\x1d\x1e\x1f"
+_WHITESPACE = b" \t\n\r\x0b\x0c" + _STR_ONLY_WHITESPACE
+_SPLIT_TABLE = bytes.maketrans(_STR_ONLY_WHITESPACE, b"    ")
+_REDUCED = [numerology.reduce_to_single_digit(n) for n in range(1024)]
+
+
+def _reduce(num: int) -> int:
+    if num < len(_REDUCED):
+        return _REDUCED[num]
+    return numerology.reduce_to_single_digit(num)
+
+
+def _digit_total(digits: bytes) -> int:
+    """Sum of a byte string made only of the characters '0'-'9'."""
+    return sum(digits) - 48 * len(digits)
+
+
+def _compile(values: dict, keep_whitespace=True):
+    """
+    Build a bytes.translate() (table, delete) pair mapping the given
+    characters to digit characters and dropping every other byte.
+    """
+    table = bytearray(_SPLIT_TABLE)
+    for ch, value in values.items():
+        table[ord(ch)] = ord(str(value))
+    kept = set(map(ord, values))
+    if keep_whitespace:
+        kept.update(_WHITESPACE)
+    delete = bytes(i for i in range(256) if i not in kept)
+    return bytes(table), delete
+
+
+def _lookup_array(values: dict, dtype=np.int64):
+    """256-entry array: byte value -> mapped number (0 elsewhere)."""
+    array = np.zeros(256, dtype=dtype)
+    for ch, value in values.items():
+        array[ord(ch)] = value
+    return array
+
+
+class NameScorer:
+    """
+    Precompiled scorer for one letter mapping plus the soul urge vowel table.
+    Mapping values must be single digits (0-9).
+    """
+
+    def __init__(self, mapping: dict, vowel_mapping: dict = numerology.VOWEL_MAPPING):
+        if any(not 0 <= value <= 9 for value in mapping.values()):
+            raise ValueError("Mapping values must be between 0 and 9")
+
+        self.mapping = mapping
+        self.vowel_mapping = vowel_mapping
+        self.y_value = vowel_mapping.get("Y", 0)
+        self.vowels = "".join(ch for ch in vowel_mapping if ch != "Y").encode()
+
+        # every ASCII letter, in either case, -> its digit character
+        letters = {ch: mapping.get(ch.upper(), 0) for ch in string.ascii_letters}
+        self.letter_table = _compile(letters)
+
+        # upper-case vowels (without Y) -> digit characters
+        vowels = {ch: value for ch, value in vowel_mapping.items() if ch != "Y"}
+        self.vowel_table = _compile(vowels)
+        self.vowel_table_flat = _compile(vowels, keep_whitespace=False)
+
+        # lookup arrays for score_names(), indexed by upper-cased byte
+        self.letter_values = _lookup_array({ch: letters[ch] for ch in string.ascii_uppercase})
+        self.vowel_values = _lookup_array(vowels)
+        self.is_letter = _lookup_array({ch: True for ch in string.ascii_uppercase}, bool)
+        self.is_vowel = _lookup_array({ch: True for ch in vowels}, bool)
+        self.is_space = _lookup_array({chr(ch): True for ch in _WHITESPACE}, bool)
+
+    # -------------------
+    # Single Name
+    # -------------------
+    def expression(self, full_name: str) -> int:
+        """Same result as numerology.expression_number(full_name, mapping)."""
+        if not full_name.isascii():
+            return numerology.expression_number(full_name, self.mapping)
+        digits = full_name.encode().translate(*self.letter_table)
+        return _reduce(sum(_reduce(_digit_total(part)) for part in digits.split()))
+
+    def soul_urge(self, full_name: str) -> int:
+        """Same result as numerology.soul_urge(full_name)."""
+        if not full_name.isascii():
+            return numerology.soul_urge(full_name)
+        upper = full_name.encode().upper()
+        if b"Y" not in upper:
+            return _reduce(_digit_total(upper.translate(*self.vowel_table_flat)))
+
+        total = 0
+        vowels = self.vowels
+        for part in upper.translate(_SPLIT_TABLE).split():
+            digits = part.translate(*self.vowel_table)
+            total += _digit_total(digits)
+            if b"Y" not in part:
+                continue
+            if not digits:
+                # no other vowel in this part: every Y is a vowel
+                total += self.y_value * part.count(b"Y")
+                continue
+            last = len(part) - 1
+            i = part.find(b"Y")
+            while i != -1:
+                if 0 < i < last and part[i - 1] not in vowels and part[i + 1] not in vowels:
+                    total += self.y_value
+                i = part.find(b"Y", i + 1)
+        return _reduce(total)
+
+    def digit_counts(self, full_name: str) -> list[int]:
+        """
+        Count of every digit 0-9 in letters_to_numbers(full_name, mapping).
+        Index 0 counts letters the mapping does not cover.
+        """
+        if not full_name.isascii():
+            numbers = numerology.letters_to_numbers(full_name, self.mapping)
+            return [numbers.count(d) for d in range(10)]
+        digits = full_name.encode().translate(*self.letter_table)
+        return [digits.count(d) for d in b"0123456789"]
+
+    def score(self, full_name: str) -> dict:
+        """Expression, soul urge, first letter and letter digit counts."""
+        return {
+            "expression": self.expression(full_name),
+            "soul_urge": self.soul_urge(full_name),
+            "alphabet": full_name[0].upper() if full_name else "—",
+            "digit_counts": self.digit_counts(full_name),
+        }
+
+    # -------------------
+    # Many Names
+    # -------------------
+    def _score_chunk(self, names: list[str]):
+        """Vectorized expression, soul urge and digit counts for ASCII names."""
+        n = len(names)
+        # every name followed by a space, so no part ever spans two names
+        data = np.frombuffer((" ".join(names) + " ").encode().upper(), dtype=np.uint8)
+        lengths = np.fromiter(map(len, names), dtype=np.int64, count=n) + 1
+        name_ids = np.repeat(np.arange(n), lengths)
+
+        space = self.is_space[data]
+        prev_space = np.concatenate(([True], space[:-1]))
+        next_space = np.concatenate((space[1:], [True]))
+        in_part = ~space
+        starts = in_part & prev_space
+        # whitespace before the first part gets part 0; it never counts
+        part_ids = np.maximum(np.cumsum(starts) - 1, 0)
+        part_names = name_ids[starts]
+        parts = max(int(starts.sum()), 1)
+
+        # Expression: reduce every part, add them up, reduce again
+        letters = self.letter_values[data]
+        part_totals = np.bincount(part_ids[in_part], weights=letters[in_part], minlength=parts)
+        part_reduced = batch.reduce_array(part_totals.astype(np.int64))
+        expression = batch.reduce_array(
+            np.bincount(part_names, weights=part_reduced, minlength=n).astype(np.int64)
+        )
+
+        # Soul urge: vowels, plus Y when its part has no other vowel or
+        # when it sits between two non-vowels inside the part
+        vowel = self.is_vowel[data]
+        part_has_vowel = np.bincount(part_ids[in_part], weights=vowel[in_part], minlength=parts) > 0
+        is_y = data == ord("Y")
+        prev_vowel = np.concatenate(([False], vowel[:-1]))
+        next_vowel = np.concatenate((vowel[1:], [False]))
+        y_counts = is_y & (
+            ~part_has_vowel[part_ids]
+            | (~prev_space & ~prev_vowel & ~next_space & ~next_vowel)
+        )
+        soul_values = self.vowel_values[data] + self.y_value * y_counts
+        soul_urge = batch.reduce_array(np.bincount(name_ids, weights=soul_values, minlength=n).astype(np.int64))
+
+        # Digit counts over the letters only
+        alpha = self.is_letter[data]
+        counts = np.bincount(
+            name_ids[alpha] * 10 + letters[alpha], minlength=n * 10
+        ).reshape(n, 10)
+        return expression, soul_urge, counts
+
+    def iter_scores(self, names):
+        """Yield (expression, soul_urge, alphabet, digit_counts) per name."""
+        for name in names:
+            score = self.score(name)
+            yield score["expression"], score["soul_urge"], score["alphabet"], score["digit_counts"]
+
+    def score_names(self, names, chunk_size=100_000):
+        """
+        Score an iterable of names in one pass, chunk_size names at a time.
+        Returns a dict of columns: NumPy arrays for the numbers,
+        a list for the first letters.
+        """
+        names = iter(names)
+        expressions, soul_urges, counts, alphabets = [], [], [], []
+        while True:
+            chunk = list(islice(names, chunk_size))
+            if not chunk:
+                break
+            ascii_rows = [i for i, name in enumerate(chunk) if name.isascii()]
+            exp = np.zeros(len(chunk), dtype=np.int64)
+            soul = np.zeros(len(chunk), dtype=np.int64)
+            digit_counts = np.zeros((len(chunk), 10), dtype=np.int64)
+
+            if ascii_rows:
+                rows = np.array(ascii_rows)
+                exp[rows], soul[rows], digit_counts[rows] = self._score_chunk(
+                    [chunk[i] for i in ascii_rows]
+                )
+            if len(ascii_rows) < len(chunk):
+                for i in set(range(len(chunk))).difference(ascii_rows):
+                    exp[i] = self.expression(chunk[i])
+                    soul[i] = self.soul_urge(chunk[i])
+                    digit_counts[i] = self.digit_counts(chunk[i])
+
+            expressions.append(exp)
+            soul_urges.append(soul)
+            counts.append(digit_counts)
+            alphabets.extend(name[0].upper() if name else "—" for name in chunk)
+
+        if not alphabets:
+            return {
+                "expression": np.zeros(0, dtype=np.int64),
+                "soul_urge": np.zeros(0, dtype=np.int64),
+                "alphabet": [],
+                "digit_counts": np.zeros((0, 10), dtype=np.int64),
+            }
+        return {
+            "expression": np.concatenate(expressions),
+            "soul_urge": np.concatenate(soul_urges),
+            "alphabet": alphabets,
+            "digit_counts": np.concatenate(counts),
+        }
+
+
+PYTHAGOREAN = NameScorer(numerology.PYTHAGOREAN_MAPPING)
+
+
+def score_name(full_name: str) -> dict:
+    """Score one name with the Pythagorean mapping."""
+    return PYTHAGOREAN.score(full_name)
+
+
+def score_names(names, chunk_size=100_000):
+    """Score many names with the Pythagorean mapping."""
+    return PYTHAGOREAN.score_names(names, chunk_size)
+
+
+# -------------------
+# Verification / Benchmark
+# -------------------
+def sample_names(count=10000, seed=0):
+    """Random names with Y-heavy parts, punctuation, odd spacing and accents."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + "YYyyAEIOU-'. "
+    extras = ["", " ", "  ", "\t", "\x1c", "Ñ", "é", "ß"]
+    names = []
+    for _ in range(count):
+        parts = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 9)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        names.append(rng.choice(extras) + " ".join(parts) + rng.choice(extras))
+    return names
+
+
+_FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Asha", "Divya", "Emily", "Ishaan", "Jay",
+    "John", "Kavya", "Krishna", "Lynn", "Mary", "Meera", "Neha", "Nirav", "Pooja",
+    "Priya", "Rahul", "Ravi", "Riya", "Rohan", "Sanjay", "Sneha", "Tanya", "Vihaan", "Yash",
+]
+_LAST_NAMES = [
+    "Agarwal", "Bhatt", "Brown", "Desai", "Gupta", "Iyer", "Joshi", "Kapoor", "Kumar",
+    "Mehta", "Nair", "Patel", "Rao", "Reddy", "Shah", "Sharma", "Singh", "Smith", "Yadav",
+]
+
+
+def common_names(count=10000, seed=0):
+    """Realistic first/middle/last name corpus for benchmarks."""
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        parts = [rng.choice(_FIRST_NAMES)]
+        if rng.random() < 0.4:
+            parts.append(rng.choice(_FIRST_NAMES))
+        parts.append(rng.choice(_LAST_NAMES))
+        names.append(" ".join(parts))
+    return names
+
+
+def verify_names(names, scorer=PYTHAGOREAN):
+    """
+    Compare single-name and batch scoring with the scalar functions.
+    Returns the mismatching names.
+    """
+    columns = scorer.score_names(names)
+    mismatches = []
+    for i, name in enumerate(names):
+        numbers = numerology.letters_to_numbers(name, scorer.mapping)
+        expected = {
+            "expression": numerology.expression_number(name, scorer.mapping),
+            "soul_urge": numerology.soul_urge(name),
+            "alphabet": name[0].upper() if name else "—",
+            "digit_counts": [numbers.count(d) for d in range(10)],
+        }
+        batched = {
+            "expression": int(columns["expression"][i]),
+            "soul_urge": int(columns["soul_urge"][i]),
+            "alphabet": columns["alphabet"][i],
+            "digit_counts": columns["digit_counts"][i].tolist(),
+        }
+        if scorer.score(name) != expected or batched != expected:
+            mismatches.append(name)
+    return mismatches
+
+
+def benchmark(names, scorer=PYTHAGOREAN):
+    """Time single and batch scoring against the scalar functions."""
+    started = time.perf_counter()
+    for name in names:
+        numerology.expression_number(name, scorer.mapping)
+        numerology.soul_urge(name)
+        numerology.letters_to_numbers(name, scorer.mapping)
+    scalar = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name in names:
+        scorer.score(name)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scorer.score_names(names)
+    batched = time.perf_counter() - started
+
+    return {
+        "samples": len(names),
+        "scalar_us": scalar / len(names) * 1e6,
+        "single_us": single / len(names) * 1e6,
+        "batch_us": batched / len(names) * 1e6,
+        "speedup": scalar / batched,
+    }
@@ -15,6 +15,9 @@ PYTHAGOREAN_MAPPING = {
     "I": 9, "R": 9
 }
 
+# Vowel values used by soul_urge() (Y only counts when it acts as a vowel)
+VOWEL_MAPPING = {"A": 1, "E": 5, "I": 9, "O": 6, "U": 3, "Y": 7}
+
 # -------------------
 # Helper Functions
 # -------------------
@@ -112,7 +115,7 @@ def soul_urge(full_name: str) -> int:
     - Reduce final total to a single digit, unless it's 11, 22, or 33.
     """
 
-    vowel_mapping = {"A": 1, "E": 5, "I": 9, "O": 6, "U": 3, "Y": 7}
+    vowel_mapping = VOWEL_MAPPING
     name_parts = full_name.strip().upper().split()
 
     grand_total = 0
@@ -316,15 +319,15 @@ def _get_lucky_year(dob: str) -> int:
     reduced_month = _reduce_number(sum(int(d) for d in month_str))
     return _reduce_number(reduced_day + reduced_month)
 
-def _get_lucky_month(lucky_year_num: int) -> int:
-    """Calculates the Lucky Month based on the Lucky Year."""
-    current_month = datetime.now().month
+def _get_lucky_month(lucky_year_num: int, today=None) -> int:
+    """Calculates the Lucky Month based on the Lucky Year and `today`'s month."""
+    current_month = (today or datetime.now()).month
     reduced_current_month = _reduce_number(current_month)
     return _reduce_number(lucky_year_num + reduced_current_month)
 
-def _get_lucky_day(dob_str: str) -> int:
-    """Calculates the Lucky Day based on DOB and current date."""
-    current_date = datetime.now()
+def _get_lucky_day(dob_str: str, today=None) -> int:
+    """Calculates the Lucky Day based on DOB and `today` (a date, default now)."""
+    current_date = today or datetime.now()
     
     dob_digits = [int(d) for d in dob_str if d.isdigit()]
     current_date_digits = [int(d) for d in current_date.strftime('%d%m%Y') if d.isdigit()]
@@ -334,14 +337,17 @@ def _get_lucky_day(dob_str: str) -> int:
 
 # --- MAIN FUNCTION (called by your route) ---
 
-def future_predictions(dob: str):
+def future_predictions(dob: str, today=None):
     """
     Calculate Future Lucky Year, Lucky Month, and Lucky Day
     by calling separate helper functions.
+
+    Month and day depend on the reference date `today` (a date or
+    datetime), which defaults to now; pass it to get a stable answer.
     """
     lucky_year = _get_lucky_year(dob)
-    lucky_month = _get_lucky_month(lucky_year)
-    lucky_day = _get_lucky_day(dob)
+    lucky_month = _get_lucky_month(lucky_year, today)
+    lucky_day = _get_lucky_day(dob, today)
 
     return {
         "lucky_year": lucky_year,
@@ -0,0 +1,113 @@
+"""
+Query-count budgets for the report and detail pages.
+
+count_queries() records every statement the engine executes. check_routes()
+renders each budgeted route for a set of sample DOBs with very different
+numbers of missing and repeated digits, and reports any route whose
+statement count goes over its budget or changes with the input, which is
+how an N+1 loop shows up. A route that does not answer 200 (a redirect
+for a missing reading, an error) fails too: it ran fewer statements than
+the page would have.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from numerology_app.extensions import db
+from numerology_app.utils import lookups, reading_store, readings
+
+# Statements allowed per request once the lookup snapshot is warm
+ROUTE_BUDGETS = {
+    "/numerology/report": 0,
+    "/numerology/details/repeating": 1,
+    "/numerology/details/missing": 1,
+    "/numerology/details/karmic-lines": 2,
+    "/numerology/details/future-predictions": 3,  # daily_luck row, then meanings
+}
+MATCHMAKING_BUDGET = 2
+
+# Few missing digits / many repeats, and the other way round
+SAMPLE_PEOPLE = [
+    ("Ada Lovelace", "1815-12-10"),
+    ("Noah Brown", "1999-09-09"),
+    ("Maya Singh", "2000-02-20"),
+    ("Priya Raman", "1987-06-24"),
+    ("Lee Chan", "1111-11-11"),
+]
+
+
+def budget_for(method, path):
+    """The declared statement budget of a request, or None."""
+    if method == "GET":
+        return ROUTE_BUDGETS.get(path)
+    if method == "POST" and path == "/matchmaking/":
+        return MATCHMAKING_BUDGET
+    return None
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Collect the SQL statements executed inside the block into a list."""
+    engine = engine or db.engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def check_routes(app, people=SAMPLE_PEOPLE):
+    """
+    Render every budgeted route for each sample person. Returns the failing
+    routes as (route, problem) and all counts by route.
+    """
+    client = app.test_client()
+    with app.app_context():
+        lookups.get_snapshot()  # warm the snapshot so it is not counted
+
+    matchmaking = "/matchmaking/ (POST)"
+    counts = {route: [] for route in ROUTE_BUDGETS}
+    counts[matchmaking] = []
+    statuses = {route: set() for route in counts}
+    for name, dob in people:
+        with app.app_context():
+            reading_id = reading_store.save(
+                readings.compute_results(name, dob),
+                {"first_name": name, "middle_name": "", "last_name": "", "dob": dob},
+            )
+        try:
+            with client.session_transaction() as sess:
+                sess["user"] = "query-budget"
+                sess["reading_id"] = reading_id
+
+            for route in ROUTE_BUDGETS:
+                with app.app_context(), count_queries() as statements:
+                    response = client.get(route)
+                counts[route].append(len(statements))
+                statuses[route].add(response.status_code)
+
+            partner_name, partner_dob = people[-1]
+            with app.app_context(), count_queries() as statements:
+                response = client.post("/matchmaking/", data={
+                    "p1_name": name, "p1_dob": dob,
+                    "p2_name": partner_name, "p2_dob": partner_dob,
+                })
+            counts[matchmaking].append(len(statements))
+            statuses[matchmaking].add(response.status_code)
+        finally:
+            with app.app_context():
+                reading_store.delete(reading_id)
+
+    budgets = dict(ROUTE_BUDGETS, **{matchmaking: MATCHMAKING_BUDGET})
+    failures = []
+    for route, route_counts in counts.items():
+        if statuses[route] != {200}:
+            failures.append((route, f"answered {sorted(statuses[route])} instead of 200"))
+        elif max(route_counts) > budgets[route] or len(set(route_counts)) > 1:
+            failures.append((route, f"ran {route_counts} queries (budget {budgets[route]}, must be constant)"))
+    return failures, counts
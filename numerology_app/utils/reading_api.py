@@ -0,0 +1,188 @@
+"""
+Building the JSON documents served by the /api/v1 blueprint.
+
+Every request reads the lookup tables through one snapshot (passed in by
+the route), computes numbers with compute_results_batch() in blocks, and
+never touches the session, so a batch of thousands of people costs a few
+array lookups per person. Batches carry each interpretation text once, in
+a meanings table keyed by lookup table and number, instead of repeating
+it in every reading.
+
+A person is a JSON object with "name" (or first_name/middle_name/last_name)
+and "dob" in any format the numerology form accepts.
+"""
+import json
+
+from numerology_app.utils import compat_matrix, date_table, matching, readings
+
+BLOCK_SIZE = 1000
+
+# Lookup row fields that are bookkeeping, not content
+_HIDDEN_FIELDS = {"id", "number_key"}
+
+
+class InvalidPerson(ValueError):
+    """A person record the API cannot compute a reading for."""
+
+
+def parse_person(record):
+    """(full name, ISO dob) from a person record; raises InvalidPerson."""
+    if not isinstance(record, dict):
+        raise InvalidPerson("Each person must be a JSON object.")
+    name = str(record.get("name") or "").strip() or readings.full_name(*(
+        str(record.get(field) or "").strip() for field in ("first_name", "middle_name", "last_name")
+    ))
+    raw_dob = str(record.get("dob") or "").strip()
+    if not raw_dob:
+        raise InvalidPerson("dob is required.")
+    try:
+        dob = readings.normalize_dob(raw_dob)
+    except ValueError:
+        dob = ""
+    if not readings.is_valid_dob(dob):
+        raise InvalidPerson(f"Invalid date of birth: '{raw_dob}'.")
+    if not name:
+        raise InvalidPerson("name (or first_name) is required.")
+    return name, dob
+
+
+def _row(row):
+    if row is None:
+        return None
+    return {k: v for k, v in row._asdict().items() if k not in _HIDDEN_FIELDS}
+
+
+def meanings(results, snapshot):
+    """Interpretation text for every number in `results`, from the snapshot."""
+    prediction = results["future_prediction"]
+    missing_repeat = results["missing_repeat"]
+    karmic = results["karmic_chart"]
+    return {
+        "life_path": _row(snapshot.life_path.get(str(results["life_path"]))),
+        "expression": _row(snapshot.life_expression.get(str(results["expression"]))),
+        "soul_urge": _row(snapshot.soul_urge.get(str(results["soul_urge"]))),
+        "birthday": _row(snapshot.birthday.get(str(results["birthday"]))),
+        "alphabet": _row(snapshot.alphabet.get(str(results["alphabet"]))),
+        "missing": [_row(snapshot.missing.get(str(n))) for n in missing_repeat["missing"]],
+        "repeating": [_row(snapshot.repeating_first.get(str(n))) for n in missing_repeat["repeating"]],
+        "positive_lines": [_row(r) for r in snapshot.lines("positive", _line_codes(karmic["positive_lines"]))],
+        "negative_lines": [_row(r) for r in snapshot.lines("negative", _line_codes(karmic["negative_lines"]))],
+        "lucky_year": _row(snapshot.lucky_year_month.get(str(prediction["lucky_year"]))),
+        "lucky_month": _row(snapshot.lucky_year_month.get(str(prediction["lucky_month"]))),
+        "lucky_day": _row(snapshot.lucky_day.get(str(prediction["lucky_day"]))),
+    }
+
+
+def _line_codes(line_names):
+    # "Physical Line (1-4-7)" -> "1-4-7"
+    return [name[name.rfind("(") + 1:-1] for name in line_names]
+
+
+def reading(name, dob, results, snapshot=None):
+    """One reading document; meanings are included when a snapshot is given."""
+    document = {"name": name, "dob": dob, "results": results}
+    if snapshot is not None:
+        document["meanings"] = meanings(results, snapshot)
+    return document
+
+
+def meaning_refs(results):
+    """(lookup table, key) for every meaning a reading refers to."""
+    prediction = results["future_prediction"]
+    missing_repeat = results["missing_repeat"]
+    karmic = results["karmic_chart"]
+    refs = [
+        ("life_path", str(results["life_path"])),
+        ("life_expression", str(results["expression"])),
+        ("soul_urge", str(results["soul_urge"])),
+        ("birthday", str(results["birthday"])),
+        ("alphabet", str(results["alphabet"])),
+        ("lucky_year_month", str(prediction["lucky_year"])),
+        ("lucky_year_month", str(prediction["lucky_month"])),
+        ("lucky_day", str(prediction["lucky_day"])),
+    ]
+    refs += [("missing", str(n)) for n in missing_repeat["missing"]]
+    refs += [("repeating", str(n)) for n in missing_repeat["repeating"]]
+    refs += [("positive_lines", code) for code in _line_codes(karmic["positive_lines"])]
+    refs += [("negative_lines", code) for code in _line_codes(karmic["negative_lines"])]
+    return refs
+
+
+def meanings_table(refs, snapshot):
+    """
+    {table: {key: meaning}} for a set of meaning_refs(), so a batch sends
+    each interpretation once however many people share it.
+    """
+    table = {}
+    for name, key in sorted(refs):
+        if name in ("positive_lines", "negative_lines"):
+            rows = snapshot.lines(name.split("_")[0], [key])
+            value = [_row(row) for row in rows]
+        elif name == "repeating":
+            value = _row(snapshot.repeating_first.get(key))
+        else:
+            value = _row(getattr(snapshot, name).get(key))
+        table.setdefault(name, {})[key] = value
+    return table
+
+
+def iter_readings(records, refs=None, block_size=BLOCK_SIZE):
+    """
+    Yield one document per record, in order: a reading with its "index",
+    or {"index", "error"} for a record that could not be parsed. When
+    `refs` is a set, the meaning_refs() of every reading are added to it.
+    """
+    for start in range(0, len(records), block_size):
+        parsed, documents = [], {}
+        for i, record in enumerate(records[start:start + block_size], start):
+            try:
+                parsed.append((i, *parse_person(record)))
+            except InvalidPerson as exc:
+                documents[i] = {"index": i, "error": str(exc)}
+        if parsed:
+            indexes, full_names, dobs = zip(*parsed)
+            for i, name, dob, results in zip(
+                indexes, full_names, dobs, readings.compute_results_batch(full_names, dobs)
+            ):
+                documents[i] = {"index": i, **reading(name, dob, results)}
+                if refs is not None:
+                    refs.update(meaning_refs(results))
+        for i in range(start, min(start + block_size, len(records))):
+            yield documents[i]
+
+
+def ndjson_lines(documents):
+    for document in documents:
+        yield json.dumps(document) + "\n"
+
+
+def match(p1, p2, snapshot):
+    """
+    What matchmaking_home shows for two parsed people (name, dob), plus
+    the best-matches score; Profile 1's side decides the title.
+    """
+    people = []
+    for name, dob in (p1, p2):
+        profile = date_table.date_profile(dob)
+        life_path = profile["life_path"]
+        people.append({
+            "name": name,
+            "dob": dob,
+            **matching.life_path_profile(life_path),
+            "missing": profile["missing"],
+            "missing_details": [_row(snapshot.missing.get(str(n))) for n in profile["missing"]],
+            "stone": getattr(snapshot.life_path.get(str(life_path)), "stone", None),
+        })
+    a, b = people[0]["num"], people[1]["num"]
+    _, scores, crystal = matching.score_tables(snapshot)
+    shared = sorted(set(people[0]["missing"]) & set(people[1]["missing"]))
+    return {
+        "title": matching.relationship_title(a, b),
+        "relation": matching.relation(a, b),
+        "crystal_suggestion": compat_matrix.crystal_suggestion(people[0]["stone"], people[1]["stone"]),
+        "crystal_match": bool(crystal[a, b]),
+        "shared_missing": shared,
+        "score": int(scores[a, b]) - len(shared),
+        "p1": people[0],
+        "p2": people[1],
+    }
@@ -0,0 +1,192 @@
+"""
+Server-side store of the reading on the numerology page.
+
+The signed session cookie used to carry the whole results dict and the
+person fields; now it only holds session["reading_id"], a short random
+id, and the reading lives in instance/readings/<id>. Each file has one
+compact JSON line per section:
+
+    person             [first_name, middle_name, last_name, "DD MM YYYY"]
+    numbers            [life_path, expression, soul_urge, birthday, alphabet]
+    karmic_chart       [[digit, count, ...], positive_lines, negative_lines]
+    future_prediction  [lucky_year, lucky_month, lucky_day]
+    missing_repeat     [[digit, count, ...], missing]
+
+so a detail page decodes only the line it shows. load() rebuilds the
+sections as the session used to return them (digit keys as strings),
+which keeps report cache keys unchanged.
+
+Every load touches the file's mtime; readings untouched for
+READING_TTL_S are treated as gone, and save() sweeps them out at most
+every PURGE_INTERVAL_S per process (`flask purge-readings` does it on
+demand).
+"""
+import json
+import os
+import re
+import secrets
+import time
+
+from flask import current_app, session
+
+STORE_DIR = "readings"  # inside the instance folder
+SECTIONS = ("numbers", "karmic_chart", "future_prediction", "missing_repeat")
+LINES = ("person",) + SECTIONS
+NUMBERS = ("life_path", "expression", "soul_urge", "birthday", "alphabet")
+PERSON = ("first_name", "middle_name", "last_name", "dob")
+PURGE_INTERVAL_S = 600
+
+_ID = re.compile(r"^[A-Za-z0-9_-]{16}$")
+_last_purge = 0.0
+
+
+def _dir():
+    return os.path.join(current_app.instance_path, STORE_DIR)
+
+
+def path(reading_id):
+    return os.path.join(_dir(), reading_id)
+
+
+# -------------------
+# Encoding
+# -------------------
+def _pairs(mapping):
+    """{digit: count} as a flat [digit, count, ...] list."""
+    return [x for digit, count in mapping.items() for x in (int(digit), count)]
+
+
+def _mapping(pairs):
+    return {str(pairs[i]): pairs[i + 1] for i in range(0, len(pairs), 2)}
+
+
+def encode(results, person):
+    """The file contents for a results dict and its person fields."""
+    chart = results.get("karmic_chart", {})
+    future = results.get("future_prediction", {})
+    missing_repeat = results.get("missing_repeat", {})
+    lines = {
+        "person": [person.get(name, "") for name in PERSON],
+        "numbers": [results.get(name) for name in NUMBERS],
+        "karmic_chart": [
+            _pairs(chart.get("chart", {})),
+            chart.get("positive_lines", []),
+            chart.get("negative_lines", []),
+        ],
+        "future_prediction": [future.get("lucky_year"), future.get("lucky_month"), future.get("lucky_day")],
+        "missing_repeat": [_pairs(missing_repeat.get("repeating", {})), missing_repeat.get("missing", [])],
+    }
+    return "".join(json.dumps(lines[name], separators=(",", ":")) + "\n" for name in LINES)
+
+
+def _decode(name, line):
+    value = json.loads(line)
+    if name == "person":
+        return dict(zip(PERSON, value))
+    if name == "numbers":
+        return dict(zip(NUMBERS, value))
+    if name == "karmic_chart":
+        chart, positive, negative = value
+        return {"chart": _mapping(chart), "positive_lines": positive, "negative_lines": negative}
+    if name == "future_prediction":
+        return dict(zip(("lucky_year", "lucky_month", "lucky_day"), value))
+    repeating, missing = value
+    return {"repeating": _mapping(repeating), "missing": missing}
+
+
+# -------------------
+# Store
+# -------------------
+def save(results, person, reading_id=None):
+    """Store a reading (replacing `reading_id`'s, if given); returns its id."""
+    if reading_id is None or not _ID.match(reading_id):
+        reading_id = secrets.token_urlsafe(12)
+    target = path(reading_id)
+    os.makedirs(_dir(), exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(encode(results, person))
+    os.replace(tmp_path, target)
+    _maybe_purge()
+    return reading_id
+
+
+def load(reading_id, sections=SECTIONS):
+    """
+    (results holding only `sections`, person) of a stored reading, or None
+    when the id is unknown or expired.
+    """
+    if not reading_id or not _ID.match(reading_id):
+        return None
+    stored = path(reading_id)
+    try:
+        if time.time() - os.stat(stored).st_mtime > current_app.config["READING_TTL_S"]:
+            return None
+        with open(stored, encoding="utf-8") as f:
+            lines = dict(zip(LINES, f))
+        os.utime(stored)
+    except FileNotFoundError:
+        return None
+    results = {}
+    for name in sections:
+        if name == "numbers":
+            results.update(_decode(name, lines[name]))
+        else:
+            results[name] = _decode(name, lines[name])
+    return results, _decode("person", lines["person"])
+
+
+def delete(reading_id):
+    if reading_id and _ID.match(reading_id):
+        try:
+            os.remove(path(reading_id))
+        except FileNotFoundError:
+            pass
+
+
+def purge(ttl_s=None):
+    """Delete readings untouched for `ttl_s` (READING_TTL_S); returns how many."""
+    ttl_s = current_app.config["READING_TTL_S"] if ttl_s is None else ttl_s
+    cutoff = time.time() - ttl_s
+    removed = 0
+    try:
+        entries = list(os.scandir(_dir()))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.time()
+    if now - _last_purge >= PURGE_INTERVAL_S:
+        _last_purge = now
+        purge()
+
+
+# -------------------
+# Session
+# -------------------
+def remember(results, person):
+    """Store the reading for this session."""
+    session["reading_id"] = save(results, person, session.get("reading_id"))
+
+
+def current(*sections):
+    """
+    (results, person) of this session's reading, with only `sections`
+    (all by default); ({}, {}) when there is none.
+    """
+    reading = load(session.get("reading_id"), sections or SECTIONS)
+    return reading if reading is not None else ({}, {})
+
+
+def forget():
+    delete(session.pop("reading_id", None))
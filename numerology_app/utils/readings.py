@@ -0,0 +1,214 @@
+"""
+Building the numerology `results` dict for a person.
+
+compute_results() is what numerology_home keeps in the reading store;
+compute_results_batch() produces the same dicts for many people at once
+with the date table and the compiled name scorer.
+
+Results saved on a Client row are stamped with RESULTS_VERSION and a hash
+of the name and DOB (see stamp_results); load_results() only returns them
+while both still match.
+"""
+import hashlib
+import re
+from datetime import date
+
+from numerology_app.utils import batch, date_table, names, numerology
+
+# Bump whenever a calculation changes, so stored results get recomputed
+RESULTS_VERSION = 1
+
+
+def normalize_dob(raw: str) -> str:
+    """
+    Turn a form DOB ("DD MM YYYY", with spaces, slashes, dots, plus signs
+    or hyphens) into "YYYY-MM-DD". ISO input ("YYYY-MM-DD") is accepted
+    as well. Raises ValueError for anything else.
+    """
+    # 1. Replace all common separators with a single hyphen
+    temp_dob = raw.strip().replace(" ", "-").replace("/", "-").replace(".", "-").replace("+", "-")
+
+    # 2. Condense multiple hyphens (e.g., "15--04") into one
+    temp_dob = re.sub(r'-+', '-', temp_dob)
+
+    # 3. Now split by the single hyphen
+    parts = temp_dob.split('-')
+    if len(parts) != 3:
+        raise ValueError("Invalid date format")
+
+    if len(parts[0]) == 4:
+        year, month, day = parts
+    else:
+        day, month, year = parts
+
+    # Sanity check for year length
+    if len(year) != 4:
+        raise ValueError("Year must be 4 digits")
+
+    return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+
+def full_name(first_name, middle_name="", last_name=""):
+    return " ".join([p for p in [first_name, middle_name, last_name] if p])
+
+
+def compute_results(name: str, dob: str) -> dict:
+    """All numbers for one person, as numerology_home stores them (see reading_store)."""
+    profile = date_table.date_profile(dob)
+    name_score = names.score_name(name)
+    return {
+        "life_path": profile["life_path"],
+        "expression": name_score["expression"],
+        "soul_urge": name_score["soul_urge"],
+        "birthday": profile["birthday"],
+        "alphabet": name_score["alphabet"],
+        "karmic_chart": profile["karmic_chart"],
+        "future_prediction": numerology.future_predictions(dob),
+        "missing_repeat": {"repeating": profile["repeating"], "missing": profile["missing"]},
+    }
+
+
+def compute_results_batch(full_names, dobs) -> list[dict]:
+    """
+    compute_results() for many people at once. Every DOB must be a valid
+    "YYYY-MM-DD" date; dates outside the date table use the scalar path.
+    """
+    full_names, dobs = list(full_names), list(dobs)
+    scores = names.score_names(full_names)
+    covered = [i for i, dob in enumerate(dobs) if date_table.date_index(dob) is not None]
+
+    results = [None] * len(dobs)
+    if covered:
+        rows = date_table.lookup_rows([dobs[i] for i in covered])
+        lucky_year, lucky_month, lucky_day = batch.future_predictions(
+            *batch.split_dates([dobs[i] for i in covered])
+        )
+        for j, i in enumerate(covered):
+            profile = date_table.row_to_profile(rows[j])
+            results[i] = {
+                "life_path": profile["life_path"],
+                "expression": int(scores["expression"][i]),
+                "soul_urge": int(scores["soul_urge"][i]),
+                "birthday": profile["birthday"],
+                "alphabet": scores["alphabet"][i],
+                "karmic_chart": profile["karmic_chart"],
+                "future_prediction": {
+                    "lucky_year": int(lucky_year[j]),
+                    "lucky_month": int(lucky_month[j]),
+                    "lucky_day": int(lucky_day[j]),
+                },
+                "missing_repeat": {"repeating": profile["repeating"], "missing": profile["missing"]},
+            }
+
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = compute_results(full_names[i], dobs[i])
+    return results
+
+
+def is_valid_dob(dob: str) -> bool:
+    """True for a real calendar date in "YYYY-MM-DD" form."""
+    try:
+        date.fromisoformat(dob)
+    except ValueError:
+        return False
+    return len(dob) == 10
+
+
+# -------------------
+# Stored Results
+# -------------------
+def input_hash(first_name, middle_name, last_name, dob) -> str:
+    """Short hash of everything the stored results depend on."""
+    key = "\x1f".join([first_name or "", middle_name or "", last_name or "", dob or ""])
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def stamp_results(results, first_name, middle_name, last_name, dob) -> dict:
+    """
+    The JSON stored in Client.results. Future predictions depend on today's
+    date, so they are left out and recomputed on every read.
+    """
+    return {
+        "version": RESULTS_VERSION,
+        "input_hash": input_hash(first_name, middle_name, last_name, dob),
+        "results": {k: v for k, v in results.items() if k != "future_prediction"},
+    }
+
+
+def is_fresh(stored, first_name, middle_name, last_name, dob) -> bool:
+    return (
+        isinstance(stored, dict)
+        and stored.get("version") == RESULTS_VERSION
+        and stored.get("input_hash") == input_hash(first_name, middle_name, last_name, dob)
+    )
+
+
+def load_results(stored, first_name, middle_name, last_name, dob):
+    """Results from Client.results if the stamp still matches, else None."""
+    if not is_fresh(stored, first_name, middle_name, last_name, dob):
+        return None
+    results = dict(stored["results"])
+    results["future_prediction"] = numerology.future_predictions(dob)
+    return results
+
+
+def client_results(client):
+    """
+    Results for a saved client: from storage when fresh, otherwise
+    recomputed and stored on the row (the caller commits).
+    """
+    fields = (client.first_name, client.middle_name, client.last_name, client.dob)
+    results = load_results(client.results, *fields)
+    if results is None:
+        results = compute_results(full_name(*fields[:3]), client.dob)
+        client.results = stamp_results(results, *fields)
+    return results
+
+
+def recompute_stored(stale_only=True, batch_size=1000, progress=None):
+    """
+    Recompute Client.results in id order, batch_size rows at a time.
+    With stale_only, rows whose stamp still matches are left alone.
+    Clients with an invalid DOB get their results cleared.
+    Returns counts of checked, recomputed and cleared rows.
+    """
+    from numerology_app.extensions import db
+    from numerology_app.models import Client
+
+    stats = {"checked": 0, "recomputed": 0, "cleared": 0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(
+                Client.id, Client.first_name, Client.middle_name,
+                Client.last_name, Client.dob, Client.results,
+            ).where(Client.id > last_id).order_by(Client.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stats["checked"] += len(rows)
+
+        fields = {row.id: (row.first_name, row.middle_name, row.last_name, row.dob) for row in rows}
+        if stale_only:
+            rows = [row for row in rows if not is_fresh(row.results, *fields[row.id])]
+        valid = [row for row in rows if is_valid_dob(row.dob)]
+        computed = compute_results_batch(
+            [full_name(*fields[row.id][:3]) for row in valid], [row.dob for row in valid]
+        )
+
+        updates = [
+            {"id": row.id, "results": stamp_results(result, *fields[row.id])}
+            for row, result in zip(valid, computed)
+        ]
+        updates += [{"id": row.id, "results": None} for row in rows if not is_valid_dob(row.dob)]
+        if updates:
+            db.session.execute(db.update(Client), updates)
+        db.session.commit()
+
+        stats["recomputed"] += len(valid)
+        stats["cleared"] += len(rows) - len(valid)
+        if progress:
+            progress(stats)
+    return stats
@@ -0,0 +1,131 @@
+"""
+Content-addressed cache of rendered reports.
+
+A report is fully determined by the results dict (less the future
+prediction, which it does not show), the person fields and the lookup
+tables it quotes, so cache_key() hashes exactly those (plus
+REPORT_VERSION for template changes). The cached HTML leaves out the
+"Generated on" date, which reports.report_html() fills in when serving.
+PDFs carry it, so they are cached under dated_key(), a key per day; that
+key doubles as the ETag of both kinds: a browser that already has today's
+report gets a 304 before anything is rendered, and anyone else gets the
+cached HTML or PDF from instance/report_cache/<key>.<kind>.
+
+Hits touch the file's mtime; put() evicts the least recently used files
+once the directory grows past REPORT_CACHE_MAX_BYTES.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+from flask import current_app
+
+from numerology_app.utils import lookups, versions
+
+CACHE_DIR = "report_cache"  # inside the instance folder
+REPORT_VERSION = 3  # bump when numerology/report.html or report.css changes
+UNRENDERED = ("future_prediction",)  # results the report does not show
+
+
+def cache_key(results, person):
+    """sha256 over everything a rendered report depends on, but its date."""
+    payload = json.dumps(
+        {
+            "version": REPORT_VERSION,
+            "lookups": versions.stamp(lookups.VERSION_NAME),
+            "results": {name: value for name, value in results.items() if name not in UNRENDERED},
+            "person": person,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def served_on():
+    """The date on reports served now (UTC)."""
+    return datetime.utcnow().date()
+
+
+def dated_key(key, day=None):
+    """The key of a report generated on `day` (today): its ETag, and its PDF's cache key."""
+    return hashlib.sha256(f"{key}|{(day or served_on()).isoformat()}".encode()).hexdigest()
+
+
+def _dir():
+    return os.path.join(current_app.instance_path, CACHE_DIR)
+
+
+def path(key, kind):
+    return os.path.join(_dir(), f"{key}.{kind}")
+
+
+def get(key, kind):
+    """Path of a cached file (marking it recently used), or None."""
+    cached = path(key, kind)
+    try:
+        os.utime(cached)
+    except FileNotFoundError:
+        return None
+    return cached
+
+
+def get_text(key, kind):
+    cached = get(key, kind)
+    if cached is None:
+        return None
+    try:
+        with open(cached, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:  # evicted in between
+        return None
+
+
+def put(key, kind, data):
+    """Store `data` (str or bytes) atomically, then enforce the size cap."""
+    target = path(key, kind)
+    os.makedirs(_dir(), exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data.encode("utf-8") if isinstance(data, str) else data)
+    os.replace(tmp_path, target)
+    evict()
+    return target
+
+
+def put_file(key, kind, source):
+    """Store a copy of an existing file (hard-linked when possible)."""
+    target = path(key, kind)
+    os.makedirs(_dir(), exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+    evict()
+    return target
+
+
+def evict(max_bytes=None):
+    """Delete least recently used files until the cache fits in max_bytes."""
+    max_bytes = current_app.config["REPORT_CACHE_MAX_BYTES"] if max_bytes is None else max_bytes
+    try:
+        entries = [e for e in os.scandir(_dir()) if e.is_file() and not e.name.endswith(".tmp")]
+    except FileNotFoundError:
+        return 0
+    stats = [(st.st_mtime_ns, st.st_size, e.path) for e in entries for st in (e.stat(),)]
+    total = sum(size for _, size, _ in stats)
+    removed = 0
+    for _, size, cached in sorted(stats):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(cached)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,269 @@
+"""
+Background PDF rendering.
+
+numerology_report_pdf renders the report HTML (fast) and enqueue()s it: a
+row in the report_jobs table plus a task on this process's worker pool.
+Workers are separate processes that import WeasyPrint and build a
+report_render.RenderContext once, when they start, and then render one
+job after another with it: each reads its HTML from
+the table, writes instance/reports/<job id>.pdf and marks the row done
+(or failed). Because status lives in the table, any web worker can answer
+the status and download requests.
+
+Jobs left queued by a restart are picked up by `flask report-worker`,
+which also deletes finished jobs older than a day.
+
+A job is leased for REPORT_JOB_LEASE_S: one still queued or running
+after that lost its worker (the process died, the web process restarted
+mid-render, the pool broke). active_job() ignores such jobs, so the
+report can be queued again; run_pending() requeues stale running jobs
+and purge() deletes them once they are as old as finished ones.
+"""
+import multiprocessing
+import os
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, create_engine, or_, text
+
+from numerology_app.extensions import db
+from numerology_app.models import ReportJob
+from numerology_app.utils import report_render
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+REPORTS_DIR = "reports"  # inside the instance folder
+RETENTION = timedelta(days=1)
+
+_executor = None
+
+# Set in each worker process by _init_worker()
+_context = None
+_load_error = None
+_engine = None
+
+
+def output_dir(instance_path=None):
+    return os.path.join(instance_path or current_app.instance_path, REPORTS_DIR)
+
+
+def pdf_path(job_id, directory=None):
+    return os.path.join(directory or output_dir(), f"{job_id}.pdf")
+
+
+# -------------------
+# Worker Process
+# -------------------
+def load_weasyprint():
+    """Import WeasyPrint (with the GTK runtime on the path on Windows)."""
+    gtk_path = r"C:\Program Files\GTK3-Runtime Win64\bin"
+    if os.name == "nt" and gtk_path not in os.environ["PATH"]:
+        os.environ["PATH"] = gtk_path + os.pathsep + os.environ["PATH"]
+
+    import weasyprint
+    return weasyprint
+
+
+def _init_worker(database_uri, render_settings):
+    global _context, _load_error, _engine
+    from numerology_app.config import apply_sqlite_pragmas
+
+    try:
+        _context = report_render.RenderContext(load_weasyprint(), **render_settings)
+    except (ImportError, OSError):
+        # a missing GTK/Pango fails every job with this error instead of breaking the pool
+        _load_error = traceback.format_exc(limit=1)
+    _engine = create_engine(database_uri)
+    apply_sqlite_pragmas(_engine)
+
+
+def _now():
+    return datetime.utcnow().isoformat(sep=" ")
+
+
+def _update(job_id, **fields):
+    assignments = ", ".join(f"{name} = :{name}" for name in fields)
+    with _engine.begin() as conn:
+        conn.execute(text(f"UPDATE report_jobs SET {assignments} WHERE id = :id"), {**fields, "id": job_id})
+
+
+def _render(job_id, directory):
+    """Render one queued job to <directory>/<job_id>.pdf (runs in a worker)."""
+    with _engine.begin() as conn:
+        claimed = conn.execute(
+            text("UPDATE report_jobs SET status = :running, started_at = :now "
+                 "WHERE id = :id AND status = :queued"),
+            {"id": job_id, "running": RUNNING, "queued": QUEUED, "now": _now()},
+        ).rowcount
+        if not claimed:  # already taken by another worker, or deleted
+            return None
+        row = conn.execute(
+            text("SELECT html, base_url FROM report_jobs WHERE id = :id"), {"id": job_id}
+        ).first()
+    if _context is None:
+        _update(job_id, status=FAILED, error=_load_error, finished_at=_now())
+        return FAILED
+    try:
+        pdf = _context.render(row.html, row.base_url)
+        path = pdf_path(job_id, directory)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    except Exception:
+        _update(job_id, status=FAILED, error=traceback.format_exc(limit=5), finished_at=_now())
+        return FAILED
+    _update(job_id, status=DONE, html=None, finished_at=_now())
+    return DONE
+
+
+def render_file(html, base_url, path):
+    """Render `html` to a PDF at `path` in a worker; returns the size in bytes."""
+    if _context is None:
+        raise RuntimeError(_load_error)
+    pdf = _context.render(html, base_url)
+    with open(path, "wb") as f:
+        f.write(pdf)
+    return len(pdf)
+
+
+# -------------------
+# Web Process
+# -------------------
+def new_executor(workers):
+    """A new pool of WeasyPrint worker processes."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # spawn: workers must not inherit the web process's connections and threads
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(current_app.config["SQLALCHEMY_DATABASE_URI"], report_render.settings()),
+    )
+
+
+def get_executor():
+    """This process's worker pool, started on first use."""
+    global _executor
+    if _executor is None:
+        _executor = new_executor(current_app.config["REPORT_WORKERS"])
+    return _executor
+
+
+def enqueue(html, base_url, filename, cache_key=None):
+    """Save a job for the rendered report `html` and hand it to the pool."""
+    job = ReportJob(
+        id=uuid.uuid4().hex, status=QUEUED, filename=filename,
+        html=html, base_url=base_url, cache_key=cache_key,
+    )
+    global _executor
+    db.session.add(job)
+    db.session.commit()
+    try:
+        get_executor().submit(_render, job.id, output_dir())
+    except BrokenProcessPool:
+        # a worker died: drop the pool (the next job starts a new one) and fail this job
+        _executor = None
+        job.status = FAILED
+        job.error = traceback.format_exc(limit=1)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return job
+
+
+def get_job(job_id):
+    return db.session.get(ReportJob, job_id)
+
+
+def _lease_cutoff():
+    return datetime.utcnow() - timedelta(seconds=current_app.config["REPORT_JOB_LEASE_S"])
+
+
+def active_job(cache_key):
+    """A queued or running job already rendering this report, if any (within its lease)."""
+    cutoff = _lease_cutoff()
+    return db.session.execute(
+        db.select(ReportJob)
+        .where(
+            ReportJob.cache_key == cache_key,
+            or_(
+                and_(ReportJob.status == QUEUED, ReportJob.created_at >= cutoff),
+                and_(ReportJob.status == RUNNING, ReportJob.started_at >= cutoff),
+            ),
+        )
+        .limit(1)
+    ).scalar()
+
+
+def requeue_stale():
+    """Put running jobs whose lease ran out back in the queue; returns how many."""
+    requeued = db.session.execute(
+        db.update(ReportJob)
+        .where(ReportJob.status == RUNNING, ReportJob.started_at < _lease_cutoff())
+        .values(status=QUEUED, started_at=None)
+    ).rowcount
+    db.session.commit()
+    return requeued
+
+
+def job_status(job):
+    """What the status endpoint returns for a job (failed once its lease ran out)."""
+    status, error = job.status, job.error.strip().splitlines()[-1] if job.error else None
+    started = job.started_at if status == RUNNING else job.created_at
+    if status in (QUEUED, RUNNING) and started is not None and started < _lease_cutoff():
+        status, error = FAILED, "The worker rendering this report stopped; request the PDF again."
+    return {
+        "id": job.id,
+        "status": status,
+        "filename": job.filename,
+        "error": error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def run_pending(workers=None, progress=None):
+    """
+    Render every queued job (e.g. left over by a restart, or running past
+    its lease) on a fresh pool and wait for them. `progress` is called
+    with (job_id, status).
+    """
+    requeue_stale()
+    job_ids = db.session.execute(
+        db.select(ReportJob.id).where(ReportJob.status == QUEUED).order_by(ReportJob.created_at)
+    ).scalars().all()
+    if not job_ids:
+        return 0
+    directory = output_dir()
+    with new_executor(workers or current_app.config["REPORT_WORKERS"]) as executor:
+        futures = {executor.submit(_render, job_id, directory): job_id for job_id in job_ids}
+        for future, job_id in futures.items():
+            status = future.result()
+            if progress:
+                progress(job_id, status)
+    return len(job_ids)
+
+
+def purge(max_age=RETENTION):
+    """
+    Delete finished jobs older than `max_age`, and jobs that started
+    running that long ago and never finished, with their files.
+    """
+    cutoff = datetime.utcnow() - max_age
+    old = db.session.execute(
+        db.select(ReportJob).where(or_(
+            and_(ReportJob.status.in_([DONE, FAILED]), ReportJob.finished_at < cutoff),
+            and_(ReportJob.status == RUNNING, ReportJob.started_at < cutoff),
+        ))
+    ).scalars().all()
+    for job in old:
+        try:
+            os.remove(pdf_path(job.id))
+        except FileNotFoundError:
+            pass
+        db.session.delete(job)
+    db.session.commit()
+    return len(old)
@@ -0,0 +1,190 @@
+"""
+Reusable WeasyPrint state for the PDF workers.
+
+Rendering a report from scratch re-parses its large inline stylesheet
+(and the Google Fonts @import behind it), re-registers the fonts and
+fetches static/img/logo_white.png over HTTP from our own server, every
+time. A RenderContext is built once per worker process and keeps:
+
+- the report stylesheet (numerology/report.css) parsed into a CSS object,
+  with its @font-face fonts in one FontConfiguration;
+- a URL fetcher that serves /static/... straight from the static folder
+  and keeps every fetched resource in memory, so the logo is read once.
+
+WeasyPrint's own image cache (the `cache` option) is not shared: in
+WeasyPrint 62 a second document rendered with the same cache fails on
+the logo, an RGBA PNG whose cached data the first one replaced.
+
+document() removes the inlined <style> block from the report HTML when it
+is exactly the stylesheet the context parsed, and passes the parsed CSS
+as `stylesheets` instead. WeasyPrint gives those the user origin, which
+ranks the same as the author origin here: the report has no other
+stylesheet, and user declarations, like author ones, come after the
+user-agent sheet and before style attributes. `flask bench-report-render`
+checks that both ways give the same layout. HTML rendered with another
+stylesheet (a report cached before a template change) is rendered as it is.
+"""
+import mimetypes
+import os
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flask import current_app, render_template
+from werkzeug.security import safe_join
+
+STYLESHEET = "numerology/report.css"
+
+
+def settings():
+    """What a worker needs to build its RenderContext (picklable)."""
+    return {
+        "stylesheet": render_template(STYLESHEET),
+        "static_folder": current_app.static_folder,
+        "static_url_path": current_app.static_url_path,
+    }
+
+
+class RenderContext:
+    """Parsed CSS, fonts and fetched resources reused across renders."""
+
+    def __init__(self, weasyprint, stylesheet, static_folder, static_url_path):
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.weasyprint = weasyprint
+        self.stylesheet = stylesheet
+        self.inline_style = f"<style>{stylesheet}</style>"
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path.rstrip("/") + "/"
+        self.font_config = FontConfiguration()
+        self.resources = {}  # url -> url_fetcher result
+        self._css = {}  # base_url -> parsed stylesheet
+
+    def fetch(self, url, base_url):
+        """url_fetcher: static files from disk, everything fetched only once."""
+        if url not in self.resources:
+            self.resources[url] = self._static_file(url, base_url) or self._download(url)
+        return dict(self.resources[url])
+
+    def _static_file(self, url, base_url):
+        parts, base = urlsplit(url), urlsplit(base_url)
+        if parts.netloc != base.netloc or not parts.path.startswith(self.static_url_path):
+            return None
+        path = safe_join(self.static_folder, parts.path[len(self.static_url_path):])
+        if path is None or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        return {"string": data, "mime_type": mimetypes.guess_type(path)[0], "redirected_url": url}
+
+    def _download(self, url):
+        result = self.weasyprint.default_url_fetcher(url)
+        if "file_obj" in result:
+            with result.pop("file_obj") as file_obj:
+                result["string"] = file_obj.read()
+        return result
+
+    def _fetcher(self, base_url):
+        return lambda url: self.fetch(url, base_url)
+
+    def css(self, base_url):
+        """The report stylesheet, parsed on first use for this base URL."""
+        if base_url not in self._css:
+            self._css[base_url] = self.weasyprint.CSS(
+                string=self.stylesheet, base_url=base_url,
+                url_fetcher=self._fetcher(base_url), font_config=self.font_config,
+            )
+        return self._css[base_url]
+
+    def document(self, html, base_url):
+        """The laid-out report (a WeasyPrint Document)."""
+        stylesheets = []
+        if self.inline_style in html:
+            html = html.replace(self.inline_style, "", 1)
+            stylesheets.append(self.css(base_url))
+        document = self.weasyprint.HTML(string=html, base_url=base_url, url_fetcher=self._fetcher(base_url))
+        return document.render(stylesheets=stylesheets, font_config=self.font_config)
+
+    def render(self, html, base_url):
+        """The PDF bytes of a rendered report."""
+        return self.document(html, base_url).write_pdf()
+
+
+# -------------------
+# Benchmark
+# -------------------
+def _serve_app(app):
+    """Serve `app` on a free local port in a thread; returns (server, base_url)."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def _layout(document):
+    """
+    Every box of every page (kind, position, size, text, font and colour),
+    for comparing two renders of a report. Walks WeasyPrint's page boxes.
+    """
+    return [
+        (
+            type(box).__name__,
+            round(box.position_x, 2), round(box.position_y, 2),
+            round(box.width or 0, 2), round(box.height or 0, 2),
+            getattr(box, "text", None),
+            tuple(box.style["font_family"]), box.style["font_size"], box.style["font_weight"],
+            tuple(box.style["color"]), tuple(box.style["background_color"]),
+        )
+        for page in document.pages
+        for box in page._page_box.descendants()
+    ]
+
+
+def benchmark(html, reports=10):
+    """
+    Per-report latency of rendering `html` the way numerology_report_pdf
+    used to (a fresh HTML() whose logo and fonts are fetched from a local
+    server), against a warm RenderContext. Both run in this process.
+    `same_layout` says whether both lay the report out box for box alike.
+    """
+    from numerology_app.utils.report_jobs import load_weasyprint
+
+    weasyprint = load_weasyprint()
+    server, base_url = _serve_app(current_app._get_current_object())
+    try:
+        def timed(render):
+            times = []
+            for _ in range(reports):
+                started = time.perf_counter()
+                render()
+                times.append((time.perf_counter() - started) * 1000)
+            return times
+
+        fresh = timed(lambda: weasyprint.HTML(string=html, base_url=base_url).write_pdf())
+
+        started = time.perf_counter()
+        context = RenderContext(weasyprint, **settings())
+        context.render(html, base_url)
+        first_ms = (time.perf_counter() - started) * 1000
+        reused = timed(lambda: context.render(html, base_url))
+        same_layout = _layout(weasyprint.HTML(string=html, base_url=base_url).render()) == _layout(
+            context.document(html, base_url)
+        )
+    finally:
+        server.shutdown()
+
+    fresh_ms, reused_ms = statistics.median(fresh), statistics.median(reused)
+    return {
+        "reports": reports,
+        "fresh_ms": fresh_ms,
+        "first_ms": first_ms,
+        "reused_ms": reused_ms,
+        "speedup": fresh_ms / reused_ms,
+        "same_layout": same_layout,
+    }
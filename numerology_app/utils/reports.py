@@ -0,0 +1,151 @@
+"""
+Building the numerology report (numerology/report.html) for a person.
+
+lookup_details() turns a results dict into the template context from the
+lookup snapshot; report_html() renders it through the report cache and
+dates it. Shared by the report routes, the PDF jobs and bulk exports.
+"""
+from flask import render_template
+from markupsafe import Markup
+
+from numerology_app.utils import lookups, report_cache
+
+GENERATED_ON = "<!-- generated on -->"  # in cached HTML, replaced when served
+
+
+def active_lines_from_chart(karmic_chart_dict):
+    """
+    Returns (positive_line_codes, negative_line_codes) based on the Lo Shu chart counts.
+    """
+    lines = [
+        ('1-2-3', [1, 2, 3]),
+        ('4-5-6', [4, 5, 6]),
+        ('7-8-9', [7, 8, 9]),
+        ('1-4-7', [1, 4, 7]),
+        ('2-5-8', [2, 5, 8]),
+        ('3-6-9', [3, 6, 9]),
+        ('1-5-9', [1, 5, 9]),
+        ('3-5-7', [3, 5, 7]),
+    ]
+
+    chart = karmic_chart_dict.get("chart", {}) if karmic_chart_dict else {}
+    def count(n):  # handles int keys and string keys
+        return chart.get(n, chart.get(str(n), 0)) or 0
+
+    positives, negatives = [], []
+    for code, trio in lines:
+        counts = [count(n) for n in trio]
+        if all(c > 0 for c in counts):
+            positives.append(code)
+        if all(c == 0 for c in counts):
+            negatives.append(code)
+    return positives, negatives
+
+
+def lookup_details(results):
+    """
+    Given a results dict (see reading_store), fetches full text from lookup tables.
+    Returns a dict with all sections ready for the report template.
+    """
+    if not results:
+        return {}
+
+    # Core numbers from results
+    life_path_no = results.get('life_path')
+    expression_no = results.get('expression')
+    soul_urge_no = results.get('soul_urge')
+    birthday_no = results.get('birthday')
+    first_alpha = results.get('alphabet')
+
+    # Lookups come from the in-memory snapshot (safe fallbacks)
+    snapshot = lookups.get_snapshot()
+    life_path = snapshot.life_path.get(str(life_path_no)) if life_path_no else None
+    life_expression = snapshot.life_expression.get(str(expression_no)) if expression_no else None
+    soul_urge = snapshot.soul_urge.get(str(soul_urge_no)) if soul_urge_no else None
+    birthday = snapshot.birthday.get(str(birthday_no)) if birthday_no else None
+    alphabet = snapshot.alphabet.get(str(first_alpha)) if first_alpha and first_alpha != '—' else None
+
+    # Missing / repeating numbers
+    missings = results.get('missing_repeat', {}).get('missing', []) or []
+    repeating = results.get('missing_repeat', {}).get('repeating', {}) or {}
+
+    missing_rows = []
+    for m in missings:
+        row = snapshot.missing.get(str(m))
+        missing_rows.append({
+            "number": str(m),
+            "details": (row.details if row and row.details else "—")
+        })
+
+    repeating_rows = []
+    for k, v in repeating.items():  # k is number, v is count
+        row = snapshot.repeating_first.get(str(k))
+        repeating_rows.append({
+            "number": str(k),
+            "value": v,
+            "meaning": (row.meaning if row and row.meaning else "—")
+        })
+
+    # Karmic chart + lines
+    karmic = results.get('karmic_chart') or {}
+    pos_codes, neg_codes = active_lines_from_chart(karmic) 
+
+    pos_lines = snapshot.lines('positive', pos_codes)
+    neg_lines = snapshot.lines('negative', neg_codes)
+
+    return {
+        "life_path_no": life_path_no,
+        "expression_no": expression_no,
+        "soul_urge_no": soul_urge_no,
+        "birthday_no": birthday_no,
+        "first_alpha": first_alpha,
+
+        "life_path": life_path,
+        "life_expression": life_expression,
+        "soul_urge": soul_urge,
+        "birthday": birthday,
+        "alphabet": alphabet,
+
+        "karmic": karmic,
+        "positive_line_rows": pos_lines,
+        "negative_line_rows": neg_lines,
+
+        "missing_rows": missing_rows,
+        "repeating_rows": repeating_rows,
+    }
+
+
+def render_report(results, person):
+    """The report HTML, with GENERATED_ON where its date goes."""
+    ctx = lookup_details(results)
+    ctx["generated_on"] = Markup(GENERATED_ON)
+    ctx["person"] = person
+    return render_template("numerology/report.html", **ctx)
+
+
+def report_html(results, person, key, day=None):
+    """
+    The rendered report for a cache key (rendering it on a miss), generated
+    on `day` (report_cache.served_on()).
+    """
+    html_str = report_cache.get_text(key, "html")
+    if html_str is None:
+        html_str = render_report(results, person)
+        report_cache.put(key, "html", html_str)
+    day = day or report_cache.served_on()
+    return html_str.replace(GENERATED_ON, day.strftime("%d %B %Y"), 1)
+
+
+def client_person(client):
+    """
+    The person fields of a saved client as numerology_home keeps them in
+    the reading store (DOB as "DD MM YYYY"), so a client's report
+    has the same cache key however it was opened.
+    """
+    year, month, day = client.dob.split("-")
+    return {
+        "first_name": client.first_name,
+        "middle_name": client.middle_name or "",
+        "last_name": client.last_name or "",
+        "dob": f"{day} {month} {year}",
+    }
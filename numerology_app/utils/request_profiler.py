@@ -0,0 +1,243 @@
+"""
+On-demand profiling of single requests.
+
+With PROFILER_ENABLED, a request carrying `X-Profile: <mode>` (or the
+query flag `?_profile=<mode>`) runs under a profiler, if it is
+authenticated: a logged-in session, or an X-Profile-Token header equal
+to PROFILER_TOKEN. Modes:
+
+    sample (or 1)  a thread samples the request's stack every
+                   PROFILER_INTERVAL_MS and writes <id>.folded, the
+                   collapsed-stack format flamegraph.pl, speedscope and
+                   inferno read directly
+    cprofile       deterministic cProfile; writes <id>.prof (pstats,
+                   for snakeviz or flameprof) and <id>.folded built
+                   from its call graph
+
+Each profile gets <id>.json with the request's method, path, query and
+form inputs, endpoint, user, status and duration, in instance/profiles/.
+Inputs whose name looks like a credential (SENSITIVE) are written as
+"[redacted]", and the auth blueprint is never profiled. Only the
+newest PROFILER_MAX_PROFILES are kept, so the hook can stay enabled in
+production. The profile id is returned in an X-Profile-Id header.
+"""
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request, session
+
+PROFILES_DIR = "profiles"  # inside the instance folder
+MODES = {"1": "sample", "sample": "sample", "cprofile": "cprofile"}
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MIN_PATH_S = 1e-6  # cProfile call-graph paths cheaper than this are left out
+MAX_DEPTH = 200
+SENSITIVE = re.compile(r"password|passwd|token|secret|csrf", re.IGNORECASE)
+UNPROFILED_BLUEPRINTS = {"auth"}  # logins and password changes
+
+
+def output_dir():
+    return os.path.join(current_app.instance_path, PROFILES_DIR)
+
+
+def _func_name(func):
+    """'function (file:line)' for a (filename, line, function) triple."""
+    filename, line, function = func
+    if filename.startswith(PACKAGE_ROOT):
+        filename = os.path.relpath(filename, PACKAGE_ROOT)
+    elif filename != "~":  # "~" marks built-ins in pstats
+        filename = os.path.basename(filename)
+    return f"{function} ({filename}:{line})".replace(";", ":")
+
+
+# -------------------
+# Profilers
+# -------------------
+class Sampler:
+    """Samples one thread's stack on a timer into collapsed-stack counts."""
+
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_func_name((code.co_filename, code.co_firstlineno, code.co_name)))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Deterministic:
+    """cProfile over the request."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def folded(self):
+        """
+        Collapsed stacks from the call graph: every caller -> callee path
+        from the roots, weighted by each function's own time (in
+        microseconds) split across its callers by call count. An
+        approximation, since cProfile does not keep whole stacks.
+        """
+        stats = pstats.Stats(self.profile).stats  # func -> (cc, nc, tt, ct, callers)
+        callees = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, (_, calls, _, _) in callers.items():
+                callees.setdefault(caller, []).append((func, calls))
+        lines = Counter()
+
+        def walk(func, path, share):
+            _, calls, own_s, total_s, _ = stats[func]
+            if total_s * share < MIN_PATH_S or len(path) >= MAX_DEPTH:
+                return
+            path = path + [_func_name(func)]
+            if int(own_s * share * 1_000_000):
+                lines[";".join(path)] += int(own_s * share * 1_000_000)
+            for callee, callee_calls in callees.get(func, ()):
+                if callee != func:  # direct recursion
+                    walk(callee, path, share * callee_calls / (stats[callee][1] or 1))
+
+        for func, (_, _, _, _, callers) in stats.items():
+            if not callers:
+                walk(func, [], 1.0)
+        return "".join(f"{stack} {weight}\n" for stack, weight in lines.most_common())
+
+    def write_stats(self, path):
+        self.profile.dump_stats(path)
+
+
+# -------------------
+# Hooks
+# -------------------
+def _requested_mode():
+    value = request.headers.get("X-Profile") or request.args.get("_profile")
+    return MODES.get((value or "").lower()) if value else None
+
+
+def _authenticated():
+    if "user" in session:
+        return True
+    token = current_app.config.get("PROFILER_TOKEN")
+    given = request.headers.get("X-Profile-Token", "")
+    return bool(token) and hmac.compare_digest(given, token)
+
+
+def _redacted(values):
+    """request.args/request.form as lists, with credential-like fields hidden."""
+    return {
+        key: ["[redacted]"] if SENSITIVE.search(key) else items
+        for key, items in values.to_dict(flat=False).items()
+    }
+
+
+def _start_request():
+    if request.blueprint in UNPROFILED_BLUEPRINTS:
+        return
+    mode = _requested_mode()
+    if mode is None or not _authenticated():
+        return
+    if mode == "sample":
+        profiler = Sampler(current_app.config["PROFILER_INTERVAL_MS"] / 1000)
+    else:
+        profiler = Deterministic()
+    g.request_profile = {"mode": mode, "profiler": profiler, "started": time.perf_counter()}
+    profiler.start()
+
+
+def _after_request(response):
+    state = g.pop("request_profile", None)
+    if state is None:
+        return response
+    state["profiler"].stop()
+    elapsed = time.perf_counter() - state["started"]
+    profile_id = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    save(profile_id, state["mode"], state["profiler"], {
+        "method": request.method,
+        "path": request.path,
+        "args": _redacted(request.args),
+        "form": _redacted(request.form),  # the inputs, to reproduce the request
+        "endpoint": request.endpoint,
+        "user": session.get("user"),
+        "status": response.status_code,
+        "duration_ms": elapsed * 1000,
+    })
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def save(profile_id, mode, profiler, metadata):
+    """Write a profile's files, then drop the oldest past the cap."""
+    directory = output_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile_id)
+    with open(f"{base}.folded", "w", encoding="utf-8") as f:
+        f.write(profiler.folded())
+    if mode == "cprofile":
+        profiler.write_stats(f"{base}.prof")
+    metadata = {"id": profile_id, "mode": mode, "created_at": datetime.utcnow().isoformat(), **metadata}
+    if mode == "sample":
+        metadata["interval_ms"] = current_app.config["PROFILER_INTERVAL_MS"]
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    purge(current_app.config["PROFILER_MAX_PROFILES"])
+
+
+def purge(max_profiles):
+    """Keep the files of the newest `max_profiles` profiles."""
+    directory = output_dir()
+    profiles = {}
+    for entry in os.scandir(directory):
+        profile_id = entry.name.split(".", 1)[0]
+        profiles.setdefault(profile_id, []).append(entry.path)
+    ids = sorted(profiles)  # ids start with their UTC timestamp
+    removed = 0
+    for profile_id in ids[:max(len(ids) - max_profiles, 0)]:
+        for path in profiles[profile_id]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        removed += 1
+    return removed
+
+
+def init_app(app):
+    """Register the profiling hook when PROFILER_ENABLED is set."""
+    if not app.config.get("PROFILER_ENABLED"):
+        return
+    app.before_request(_start_request)
+    app.after_request(_after_request)
@@ -0,0 +1,205 @@
+"""
+Per-request SQL profiler and N+1 detector (development and staging).
+
+With SQL_PROFILER on, every statement a request executes is recorded with
+its duration and the line in numerology_app that issued it. Statements
+are grouped by shape (the SQL with literals and IN lists collapsed); a
+shape run SQL_PROFILER_NPLUS1 times or more in one request is flagged as
+an N+1 suspect.
+
+Each response gets an X-SQL-Profile header with the summary and the
+address of the full profile, /_debug/requests/<id>; the last
+SQL_PROFILER_HISTORY profiles are kept in memory. Requests with a
+declared budget (query_budget.budget_for) that go over it are marked,
+and with SQL_PROFILER_ENFORCE they raise QueryBudgetExceeded, which
+fails the test that made the request. Like check-queries, budgets hold
+once the lookup snapshot is warm: statements loading it are not counted.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from numerology_app.extensions import db
+from numerology_app.utils import lookups, query_budget
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARAMS_PREVIEW = 200  # characters of the bound parameters kept per statement
+# Statements run inside these don't count against budgets (they hold "once warm")
+UNBUDGETED = {lookups.load_snapshot.__code__}
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its declared budget."""
+
+
+def shape(statement):
+    """The statement with literals and IN lists collapsed, for grouping."""
+    statement = _IN_LIST.sub("IN (...)", statement)
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def _caller():
+    """
+    ('path/to/module.py:123 in function' of the innermost app frame,
+    whether the statement counts against the request's budget).
+    """
+    caller, budgeted = "?", True
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if caller == "?" and code.co_filename.startswith(PACKAGE_DIR) and code.co_filename != __file__:
+            relative = os.path.relpath(code.co_filename, os.path.dirname(PACKAGE_DIR))
+            caller = f"{relative}:{frame.f_lineno} in {code.co_name}"
+        if code in UNBUDGETED:
+            budgeted = False
+            break
+        frame = frame.f_back
+    return caller, budgeted
+
+
+class Profile:
+    """The statements of one request."""
+
+    def __init__(self, method, path, endpoint):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self.statements = []  # dicts: sql, params, ms, caller, budgeted
+        self.status = None
+        self.budget = None
+
+    @property
+    def sql_ms(self):
+        return sum(s["ms"] for s in self.statements)
+
+    def suspects(self, threshold):
+        """N+1 suspects: [{"shape", "count", "ms", "callers"}], most frequent first."""
+        groups = {}
+        for statement in self.statements:
+            group = groups.setdefault(shape(statement["sql"]), {"count": 0, "ms": 0.0, "callers": {}})
+            group["count"] += 1
+            group["ms"] += statement["ms"]
+            group["callers"][statement["caller"]] = group["callers"].get(statement["caller"], 0) + 1
+        return sorted(
+            ({"shape": text, **group} for text, group in groups.items() if group["count"] >= threshold),
+            key=lambda group: -group["count"],
+        )
+
+    @property
+    def budgeted(self):
+        """Statements that count against the budget (not loading lookups)."""
+        return sum(1 for s in self.statements if s["budgeted"])
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.budgeted > self.budget
+
+    def summary(self, threshold):
+        parts = [f"{len(self.statements)} statements", f"{self.sql_ms:.1f} ms"]
+        unbudgeted = len(self.statements) - self.budgeted
+        if unbudgeted:
+            parts.append(f"{unbudgeted} loading lookups")
+        suspects = len(self.suspects(threshold))
+        if suspects:
+            parts.append(f"{suspects} N+1 suspects")
+        if self.over_budget:
+            parts.append(f"over budget of {self.budget}")
+        return ", ".join(parts)
+
+
+class History:
+    """The most recent profiles, by id."""
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.profiles = OrderedDict()
+
+    def add(self, profile):
+        with self.lock:
+            self.profiles[profile.id] = profile
+            while len(self.profiles) > self.size:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+    def recent(self):
+        with self.lock:
+            return list(reversed(self.profiles.values()))
+
+
+# -------------------
+# Hooks
+# -------------------
+def _start_request():
+    g.sql_profile = Profile(request.method, request.path, request.endpoint)
+
+
+def _after_request(response):
+    profile = g.get("sql_profile")
+    if profile is None or request.blueprint == "debug":
+        return response
+    config = current_app.config
+    profile.status = response.status_code
+    profile.budget = query_budget.budget_for(request.method, request.path)
+    current_app.extensions["sql_profiler"].add(profile)
+    response.headers["X-SQL-Profile"] = (
+        f"{profile.summary(config['SQL_PROFILER_NPLUS1'])}; /_debug/requests/{profile.id}"
+    )
+    if profile.over_budget and config["SQL_PROFILER_ENFORCE"]:
+        raise QueryBudgetExceeded(
+            f"{request.method} {request.path} ran {profile.budgeted} statements "
+            f"(budget {profile.budget}); see /_debug/requests/{profile.id}"
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["sql_profiler_started"].pop()
+    profile = g.get("sql_profile") if g else None
+    if profile is not None:
+        caller, budgeted = _caller()
+        profile.statements.append({
+            "sql": statement,
+            "params": repr(parameters)[:PARAMS_PREVIEW],
+            "ms": (time.perf_counter() - started) * 1000,
+            "caller": caller,
+            "budgeted": budgeted,
+        })
+
+
+def init_app(app):
+    """Profile every request and serve /_debug/requests when SQL_PROFILER is set."""
+    if not app.config.get("SQL_PROFILER"):
+        return
+    from numerology_app.routes.debug import debug_bp
+
+    app.extensions["sql_profiler"] = History(app.config["SQL_PROFILER_HISTORY"])
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+    app.register_blueprint(debug_bp)
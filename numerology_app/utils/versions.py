@@ -0,0 +1,37 @@
+"""
+Cross-worker invalidation stamps.
+
+Each name has a small file in the instance folder (e.g. lookups.version)
+that bump() atomically replaces. Per-process caches remember the stamp()
+they were built under and rebuild when it changes, so a write in one
+gunicorn worker invalidates the caches of every other worker without a
+query.
+"""
+import os
+import time
+
+from flask import current_app
+
+
+def _path(name):
+    return os.path.join(current_app.instance_path, f"{name}.version")
+
+
+def stamp(name):
+    """(inode, mtime_ns) of the stamp file, or None if it was never bumped."""
+    # bump() replaces the file, so the inode changes with every bump
+    try:
+        stat = os.stat(_path(name))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def bump(name):
+    """Invalidate every cache built under the current stamp of `name`."""
+    path = _path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, path)